@@ -0,0 +1,36 @@
+"""Add full-text search to tea_profiles
+
+Revision ID: 3c9a41d7e2b6
+Revises: 195fc95e0ff3
+Create Date: 2026-10-18 10:12:41.538210
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.db.full_text_search import POSTGRES_FULL_TEXT_SEARCH_DDL, SEARCH_VECTOR_COLUMN
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a41d7e2b6'
+down_revision: Union[str, Sequence[str], None] = '195fc95e0ff3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # Adds the generated search_vector column and its GIN index. Adding a stored
+    # generated column rewrites the table, but tea_profiles is small.
+    for statement in POSTGRES_FULL_TEXT_SEARCH_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.execute(f"DROP INDEX IF EXISTS ix_tea_profiles_{SEARCH_VECTOR_COLUMN}")
+    op.execute(f"ALTER TABLE tea_profiles DROP COLUMN IF EXISTS {SEARCH_VECTOR_COLUMN}")
+    op.execute("DROP FUNCTION IF EXISTS tea_profiles_array_to_text(text[])")
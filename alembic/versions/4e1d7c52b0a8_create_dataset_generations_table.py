@@ -0,0 +1,38 @@
+"""Create dataset_generations table
+
+Revision ID: 4e1d7c52b0a8
+Revises: b57e0c3a9f21
+Create Date: 2026-10-18 15:02:41.538120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1d7c52b0a8'
+down_revision: Union[str, Sequence[str], None] = 'b57e0c3a9f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    op.create_table('dataset_generations',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column(
+            'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), 
+            nullable=False
+        ),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_table('dataset_generations')
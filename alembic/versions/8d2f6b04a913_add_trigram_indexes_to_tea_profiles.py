@@ -0,0 +1,53 @@
+"""Add trigram indexes to tea_profiles
+
+Revision ID: 8d2f6b04a913
+Revises: 3c9a41d7e2b6
+Create Date: 2026-10-18 11:02:17.904126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6b04a913'
+down_revision: Union[str, Sequence[str], None] = '3c9a41d7e2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The text columns TeaProfilesRepository.list filters with lower(column) LIKE '%...%'.
+# Listed explicitly so that this migration doesn't change if the model does.
+TRIGRAM_INDEXED_COLUMNS = [
+    'name',
+    'tea_type',
+    'processing',
+    'oxidation_level',
+    'cultural_significance',
+    'cultural_significance_source',
+    'country_of_origin',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # pg_trgm ships with PostgreSQL, but has to be enabled once per database.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # The indexes are on lower(column) because that's the expression the repository
+    # filters on. PostgreSQL only uses an expression index for the same expression.
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_tea_profiles_{column}_trgm '
+            f'ON tea_profiles USING GIN (lower({column}) gin_trgm_ops)'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    for column in TRIGRAM_INDEXED_COLUMNS:
+        op.execute(f'DROP INDEX IF EXISTS ix_tea_profiles_{column}_trgm')
+
+    # Leave pg_trgm installed, since other objects in the database may depend on it.
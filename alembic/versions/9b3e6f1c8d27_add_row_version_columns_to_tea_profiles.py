@@ -0,0 +1,80 @@
+"""Add row version columns to tea_profiles
+
+Revision ID: 9b3e6f1c8d27
+Revises: 4e1d7c52b0a8
+Create Date: 2026-10-18 17:41:09.284513
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.db.row_versions import get_content_hash
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e6f1c8d27'
+down_revision: Union[str, Sequence[str], None] = '4e1d7c52b0a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The columns a content hash covers (see get_content_column_names). Listed explicitly so
+# that this migration doesn't change if the model does.
+CONTENT_COLUMNS = [
+    'name',
+    'alternative_names',
+    'tea_type',
+    'cultivars',
+    'processing',
+    'oxidation_level',
+    'cultural_significance',
+    'cultural_significance_source',
+    'country_of_origin',
+    'subregions',
+    'liquor_appearance',
+    'liquor_aroma',
+    'liquor_taste',
+    'liquor_body_mouthfeel',
+    'body_effect',
+    'dry_leaf_appearance',
+    'dry_leaf_aroma',
+    'wet_leaf_appearance',
+    'wet_leaf_aroma',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    # Existing rows are stamped with the time of the migration.
+    op.add_column('tea_profiles', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), 
+        nullable=False
+    ))
+    op.add_column('tea_profiles', sa.Column('content_hash', sa.String(32), nullable=True))
+
+    # Backfill the content hashes in Python, so that they're computed exactly as the app
+    # computes them.
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(f"SELECT id, {', '.join(CONTENT_COLUMNS)} FROM tea_profiles")
+    ).mappings()
+
+    for row in rows.all():
+        connection.execute(
+            sa.text("UPDATE tea_profiles SET content_hash = :content_hash WHERE id = :id"),
+            {
+                "id": row["id"],
+                "content_hash": get_content_hash(
+                    {column: row[column] for column in CONTENT_COLUMNS}
+                ),
+            }
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    op.drop_column('tea_profiles', 'content_hash')
+    op.drop_column('tea_profiles', 'updated_at')
@@ -0,0 +1,74 @@
+"""Add normalized array columns to tea_profiles
+
+Revision ID: b57e0c3a9f21
+Revises: 8d2f6b04a913
+Create Date: 2026-10-18 12:26:50.117364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b57e0c3a9f21'
+down_revision: Union[str, Sequence[str], None] = '8d2f6b04a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The array columns that get a normalized twin (<column>_normalized). Listed explicitly 
+# so that this migration doesn't change if the model does.
+ARRAY_COLUMNS = [
+    'alternative_names',
+    'cultivars',
+    'subregions',
+    'liquor_appearance',
+    'liquor_aroma',
+    'liquor_taste',
+    'liquor_body_mouthfeel',
+    'body_effect',
+    'dry_leaf_appearance',
+    'dry_leaf_aroma',
+    'wet_leaf_appearance',
+    'wet_leaf_aroma',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+
+    for column in ARRAY_COLUMNS:
+        op.add_column('tea_profiles', 
+            sa.Column(f'{column}_normalized', postgresql.ARRAY(sa.String()), nullable=True))
+
+        # Backfill with the same normalization as normalize_array in 
+        # src/db/types/sqlite_compatible_array.py: lowercase and trim each element, 
+        # then drop blanks and duplicates, keeping the first occurrence's position.
+        op.execute(f"""
+            UPDATE tea_profiles SET {column}_normalized = ARRAY(
+                SELECT element FROM (
+                    SELECT DISTINCT ON (lower(btrim(e))) lower(btrim(e)) AS element, i
+                    FROM unnest({column}) WITH ORDINALITY AS elements(e, i)
+                    WHERE btrim(e) <> ''
+                    ORDER BY lower(btrim(e)), i
+                ) AS normalized
+                ORDER BY i
+            )
+            WHERE {column} IS NOT NULL
+        """)
+
+        # GIN indexes answer array containment (@>) filters.
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_tea_profiles_{column}_normalized_gin '
+            f'ON tea_profiles USING GIN ({column}_normalized)'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+
+    for column in ARRAY_COLUMNS:
+        op.execute(f'DROP INDEX IF EXISTS ix_tea_profiles_{column}_normalized_gin')
+        op.drop_column('tea_profiles', f'{column}_normalized')
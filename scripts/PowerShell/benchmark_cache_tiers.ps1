@@ -0,0 +1,18 @@
+# .\scripts\PowerShell\benchmark_cache_tiers.ps1
+Write-Host "Benchmarking cache hit latency for each cache tier..."
+
+# Ensure we're running from repo root so Python can resolve src.*
+Set-Location "$PSScriptRoot\..\.."
+
+# Activate venv if needed
+& "$PSScriptRoot\..\..\venv\Scripts\Activate.ps1"
+
+# Run the Python benchmark module, passing along any arguments (ex: --body-bytes 2000)
+python -m src.app.benchmark_cache_tiers @args
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Benchmark failed. Python exited with code $LASTEXITCODE"
+    exit $LASTEXITCODE
+}
+
+Write-Host "Benchmark complete"
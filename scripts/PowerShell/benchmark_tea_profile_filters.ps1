@@ -0,0 +1,18 @@
+# .\scripts\PowerShell\benchmark_tea_profile_filters.ps1
+Write-Host "Benchmarking tea profile filters with and without trigram indexes..."
+
+# Ensure we're running from repo root so Python can resolve src.*
+Set-Location "$PSScriptRoot\..\.."
+
+# Activate venv if needed
+& "$PSScriptRoot\..\..\venv\Scripts\Activate.ps1"
+
+# Run the Python benchmark module, passing along any arguments (ex: --rows 10000)
+python -m src.app.benchmark_tea_profile_filters @args
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Benchmark failed. Python exited with code $LASTEXITCODE"
+    exit $LASTEXITCODE
+}
+
+Write-Host "Benchmark complete"
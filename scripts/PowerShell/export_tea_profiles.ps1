@@ -0,0 +1,18 @@
+# .\scripts\PowerShell\export_tea_profiles.ps1
+Write-Host "Exporting tea profiles..."
+
+# Ensure we're running from repo root so Python can resolve src.*
+Set-Location "$PSScriptRoot\..\.."
+
+# Activate venv if needed
+& "$PSScriptRoot\..\..\venv\Scripts\Activate.ps1"
+
+# Run the Python export module, passing along any arguments (ex: --format parquet)
+python -m src.app.export_tea_profiles @args
+
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "Export failed. Python exited with code $LASTEXITCODE"
+    exit $LASTEXITCODE
+}
+
+Write-Host "Export complete"
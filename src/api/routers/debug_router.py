@@ -2,6 +2,11 @@ import time
 from fastapi import APIRouter
 
 from src.cache.simple_cache import cache  # adjust import if needed
+from src.cache.single_flight import single_flight
+from src.cache.cache_executor import cache_executor
+from src.cache.dataset_generation import dataset_generations
+from src.db.db_executor import db_executor
+from src.core.metrics import metrics_aggregator
 
 router = APIRouter()
 
@@ -10,18 +15,43 @@ def debug_cache():
     ''' Returns observability metrics for cache. '''
     now = time.time()
 
+    regions = cache.stats()
     keys_info = []
-    for key, entry in cache.store.items():
+
+    # Copy the entries first, since requests may change the cache while we read it.
+    for key, entry in list(cache.store.items()):
         ttl_remaining = max(0, int(entry["expires_at"] - now))
 
         keys_info.append({
             "key": key,
             "ttl_remaining": ttl_remaining,
+            "stale": cache.is_stale(entry),
+            "region": entry["region"],
+            "size": entry["size"],
             "timestamp": entry["timestamp"].isoformat()
         })
 
     return {
         "hits": cache.hits,
         "misses": cache.misses,
+        "stale_hits": cache.stale_hits,
+        "resident_bytes": sum(region["bytes"] for region in regions.values()),
+        "evictions": sum(region["evictions"] for region in regions.values()),
+        "regions": regions,
+        "single_flight": single_flight.stats(),
+        "shared": cache.backend.stats() if cache.backend is not None else None,
+        "executor": cache_executor.stats(),
+        "dataset_generations": dataset_generations.snapshot(),
         "keys": keys_info
     }
+
+
+@router.get("/debug/db_executor")
+def debug_db_executor():
+    ''' Returns queue depth and wait times for the DB executor. '''
+    return db_executor.stats()
+
+@router.get("/debug/metrics")
+def debug_metrics():
+    ''' Returns metric totals since startup and the last flushed window. '''
+    return metrics_aggregator.snapshot()
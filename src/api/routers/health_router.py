@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Request
 
 from src.app.health_services import HealthService
+from src.db.db_executor import db_executor
 from src.core.rate_limit.config_rate_limit import HIGH_RATE_LIMIT, LOW_RATE_LIMIT
 from src.core.rate_limit.setup_rate_limit import rate_limiter
 
@@ -24,5 +25,6 @@ async def health(request: Request):
 @router.get("/connections")
 @rate_limiter.limit(LOW_RATE_LIMIT)
 async def health_connections(request: Request):
-    # Smoke test to tell us if resources are reachable.
-    return health_service.check_all_connections()
\ No newline at end of file
+    # Smoke test to tell us if resources are reachable. The checks block while they
+    # connect, so run them on the DB executor rather than the event loop.
+    return await db_executor.run(health_service.check_all_connections)
\ No newline at end of file
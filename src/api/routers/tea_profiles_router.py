@@ -1,19 +1,48 @@
-from fastapi import APIRouter, Depends, Request, Response
-from sqlalchemy.orm import Session
-from typing import List, get_origin, get_args, Union, cast, Any
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, List, get_origin, get_args, Union, cast, Any
 from datetime import datetime, timezone
+from functools import lru_cache, partial
 import sentry_sdk
 from starlette import status
 
-from src.utils.session_utils import get_session
-from src.api.schemas.tea_profiles_schema import TeaProfileSchema, TeaProfileFilters
+from src.utils.session_utils import get_async_session
+from src.api.schemas.tea_profiles_schema import (
+    TeaProfileSchema, TeaProfileFilters, TeaProfileBatchSchema, TeaProfileFacetsSchema,
+    get_tea_profile_projection_schema
+)
+from src.constants.tea_profiles_constants import (
+    TeaProfileModelFields, SUMMARY_TEA_PROFILE_MODEL_FIELDS
+)
 from src.api.constants.responses import COMMON_RESPONSES
-from src.db.repositories.tea_profiles_repository import TeaProfilesRepository
+from src.db.repositories.async_tea_profiles_repository import AsyncTeaProfilesRepository
+from src.db.models.tea_profiles_model import TeaProfileModel
 from src.core.rate_limit.config_rate_limit import HIGH_RATE_LIMIT, LOW_RATE_LIMIT
 from src.core.rate_limit.setup_rate_limit import rate_limiter
-from src.cache.simple_cache import cache, CacheEntry
-from src.utils.etag import generate_etag
-from src.utils.date_utils import http_date
+from src.catalog.catalog_engine import catalog
+from src.cache.simple_cache import cache, CacheEntry, DETAIL_REGION, LIST_REGION
+from src.cache.cached_response import CachedResponse, build_cached_response
+from src.cache.single_flight import single_flight
+from src.cache.dataset_generation import dataset_generations
+from src.cache.cache_keys import get_cache_key
+from src.core.compression import choose_encoding, gzip_stream
+from src.export.export_stream import ExportWriter, stream_export
+from src.export.export_formats import (
+    DEFAULT_EXPORT_FORMAT, get_export_formats, get_export_writer
+)
+from src.core.sentry import start_span
+from src.core.metrics import metrics_aggregator
+from src.utils.cursor_utils import encode_cursor, decode_cursor
+from src.utils.filter_utils import canonicalize_filters
+from src.utils.etag import (
+    generate_etag_from_row_versions, get_etag_generation, parse_if_none_match
+)
+from src.utils.date_utils import as_utc
+from src.app.errors import TeaProfileValidationError
 import logging
 
 # use __name__ to get a logger named after the module we're in.
@@ -62,23 +91,341 @@ def get_tea_profile_filters(request: Request) -> TeaProfileFilters: # type: igno
     # Return a Pydantic model with the provided filters.
     return TeaProfileFilters(**params)
 
+# Turn the opaque cursor from the query string back into the last id the client saw.
+def _get_after_id(cursor: str | None) -> int | None:
+    if cursor is None:
+        return None
+
+    try:
+        return decode_cursor(cursor)
+    
+    except ValueError as exc:
+        raise TeaProfileValidationError(
+            "Invalid pagination cursor.",
+            details = {"cursor": cursor}
+        ) from exc
+
+# Sparse fieldsets: turn the fields query param into the tuple of columns to select
+# and serialize, or None for the full tea profile. Clients can ask for the compact 
+# "summary" representation or list the fields they want, ex: ?fields=name,tea_type
+def _get_fields(fields: str | None) -> tuple[str, ...] | None:
+    if fields is None:
+        return None
+
+    if fields.strip().lower() == "summary":
+        requested = set(SUMMARY_TEA_PROFILE_MODEL_FIELDS)
+    else:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+
+    unknown = requested - set(TeaProfileSchema.model_fields)
+
+    if unknown or not requested:
+        raise TeaProfileValidationError(
+            "Invalid fields requested.",
+            details = {"fields": fields, "unknown": sorted(unknown)}
+        )
+
+    # Always include the id, since cursors are built from it. Keep the schema's field
+    # order so that the same set of fields always maps to the same tuple (and cache key).
+    requested.add(TeaProfileModelFields.ID)
+
+    return tuple(field for field in TeaProfileSchema.model_fields if field in requested)
+
+# Keep page sizes between 1 and MAX_PAGE_SIZE (to prevent huge queries) and offsets
+# non-negative, before they're used in a query or cache key. Out of range values would
+# otherwise each get their own cache entry for the same (or an invalid) page.
+def _clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _clamp_offset(offset: int) -> int:
+    return max(0, offset)
+
+# A full page means there may be more rows, so hand back a cursor pointing just past
+# the last row. A short page means we've reached the end.
+def _get_next_cursor(tea_profiles: List[Any], limit: int) -> str | None:
+    if tea_profiles and len(tea_profiles) == limit:
+        return encode_cursor(tea_profiles[-1].id)
+
+    return None
+
+# TypeAdapters let Pydantic validate and dump types that aren't BaseModels (like a
+# list of schemas) straight to JSON bytes. Build them once at import time.
+_tea_profile_adapter = TypeAdapter(TeaProfileSchema)
+
+# One adapter per distinct field set (None = every field), built on first use.
+@lru_cache(maxsize = 64)
+def _get_tea_profiles_adapter(fields: tuple[str, ...] | None) -> TypeAdapter:
+    if fields is None:
+        return TypeAdapter(List[TeaProfileSchema])
+
+    return TypeAdapter(List[get_tea_profile_projection_schema(fields)])
+
+# The dataset generation of tea_profiles (see src/cache/dataset_generation.py). Every
+# cache key and ETag built from tea profiles includes it, so responses built before an
+# ingestion are never served after it.
+def _get_generation() -> int:
+    return dataset_generations.current(TeaProfileModel.__tablename__)
+
+# Optimization: When tea_profiles moves to a new generation, drop the entries built from
+# older ones right away. Nothing will look them up again, and they'd otherwise hold on to
+# memory until they're evicted or expire.
+def _drop_old_generations(table_name: str, generation: int) -> None:
+    if table_name != TeaProfileModel.__tablename__:
+        return
+
+    current_suffix = f":g{generation}"
+    dropped = cache.delete_matching(
+        lambda key: key.startswith(("tea_profiles:", "tea_profile:"))
+            and not key.endswith(current_suffix)
+    )
+    logger.info(f"Dropped {dropped} cached responses from older tea_profiles generations.")
+
+dataset_generations.add_listener(_drop_old_generations)
+
+# Cache-Control policy: fresh for max_age seconds, then served stale while it's 
+# revalidated in the background, so browsers and CDNs don't make their users wait on a
+# refresh either.
+#
+# These are much shorter than our own cache's TTLs. Our cache learns about ingestions 
+# through the dataset generation, but browsers and CDNs only find out when they 
+# revalidate. Revalidating is cheap, since unchanged ETags get a 304.
+def _get_cache_control(max_age: int, stale_while_revalidate: int) -> str:
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+# Lists, searches, and facets are cached in the list region, single tea profiles in the
+# detail region (see src/cache/simple_cache.py).
+LIST_CACHE_CONTROL = _get_cache_control(300, 60)
+DETAIL_CACHE_CONTROL = _get_cache_control(600, 120)
+
+# Enforce a maximum page size (and batch size) to prevent huge queries.
+MAX_PAGE_SIZE = 200
+
+# Optimization: Validators from row versions (see src/db/row_versions.py). A tea
+# profile's ETag is its content_hash and its Last-Modified is when its content last
+# changed. A list's ETag is built from its ids and the newest updated_at among them, and
+# its Last-Modified is that updated_at. Neither needs the rendered body, and both are the
+# same on every worker and across restarts. Rows without a row version fall back to
+# hashing the body (see build_cached_response).
+def _get_tea_profiles_validators(
+    tea_profiles: List[Any]
+) -> tuple[str | None, datetime | None]:
+    updated_ats = [getattr(tea_profile, "updated_at", None) for tea_profile in tea_profiles]
+
+    if any(updated_at is None for updated_at in updated_ats):
+        return None, None
+
+    last_modified = max((as_utc(updated_at) for updated_at in updated_ats), default = None)
+    etag = generate_etag_from_row_versions(
+        [tea_profile.id for tea_profile in tea_profiles], last_modified
+    )
+
+    return etag, last_modified
+
+def _get_tea_profile_validators(tea_profile: Any) -> tuple[str | None, datetime | None]:
+    updated_at = getattr(tea_profile, "updated_at", None)
+
+    return (
+        getattr(tea_profile, "content_hash", None),
+        as_utc(updated_at) if updated_at is not None else None
+    )
+
+def _render_tea_profiles(tea_profiles: List[Any], fields: tuple[str, ...] | None) -> bytes:
+    adapter = _get_tea_profiles_adapter(fields)
+    return adapter.dump_json(adapter.validate_python(tea_profiles, from_attributes = True))
+
+def _render_tea_profile(tea_profile: Any) -> bytes:
+    return _tea_profile_adapter.dump_json(
+        _tea_profile_adapter.validate_python(tea_profile, from_attributes = True)
+    )
+
+def _respond_from_cache(
+    request: Request,
+    cached_response: CachedResponse,
+    head_only: bool = False,
+) -> Response:
+    '''Answers a request from a rendered cache entry, honoring conditional headers.'''
+
+    # Optimization: ETags (Entity tags) are another caching mechanism that saves 
+    # bandwidth and makes the app feel instant. The backend first sends a fingerprint of a 
+    # resource (a hashed string) with its response via a header when the client 
+    # makes the request. This string represents the current state of the resource. The 
+    # client stores the ETag with the cached response. On subsequent requests for the same
+    # resource, the client sends the ETag back in the "If-None-Match" header. The server
+    # computes the current ETag for the resource. If it matches, it knows the resource 
+    # hasn't changed, and it returns 304 Not Modified with no body (this is the part that
+    # saves bandwidth). The ETag was computed when the cache entry was filled, so this
+    # is just a string comparison.
+    inm = request.headers.get("if-none-match")
+
+    if cached_response["etag"] in parse_if_none_match(inm):
+        return Response(
+            status_code = status.HTTP_304_NOT_MODIFIED, 
+            headers = cached_response["headers"]
+        )
+
+    # Optimization: Last-Modified is similar to ETags but uses a date instead 
+    # of a hashstring fingerprint. When the client makes a request, the server 
+    # includes a Last-Modified header with the timestamp corresponding to when 
+    # the resource last changed. The client stores that timestamp. On subsequent 
+    # requests, it sends back an "If-Modified-Since" header. The server checks 
+    # whether the resource was modified after the timestamp and returns 
+    # 304 Not Modified with no body if not. If it was modified, it returns 
+    # 200 OK with the new content and an updated Last-Modified. Same benefits 
+    # as Etags, except the precision is capped at 1 sec and it does not consider 
+    # the case where content is generated identically as it was on the first request.
+    ims = request.headers.get("if-modified-since")
+
+    if ims:
+        try:
+            ims_dt = datetime.strptime(
+                ims, "%a, %d %b %Y %H:%M:%S GMT"
+            ).replace(tzinfo = timezone.utc)
+
+            if ims_dt >= cached_response["last_modified"].replace(microsecond = 0):
+                return Response(
+                    status_code = status.HTTP_304_NOT_MODIFIED, 
+                    headers = cached_response["headers"]
+                )
+            
+        except ValueError:
+            pass
+
+    # Optimization: Pick a pre-compressed variant of the body that the client accepts
+    # (see CachedResponse) and label it with Content-Encoding. GZipMiddleware skips
+    # responses that already have a Content-Encoding, so nothing gets compressed twice.
+    body = cached_response["body"]
+    headers = cached_response["headers"]
+
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding"), list(cached_response["variants"])
+    )
+
+    if encoding is not None:
+        body = cached_response["variants"][encoding]
+        headers = {**headers, "Content-Encoding": encoding}
+
+    # HEAD gets the same headers as GET (including the real Content-Length) but no body.
+    if head_only:
+        return Response(
+            status_code = status.HTTP_200_OK, 
+            headers = {**headers, "Content-Length": str(len(body))}
+        )
+
+    # Hand back the pre-rendered bytes as is. Returning a Response directly skips 
+    # FastAPI's response_model validation and serialization.
+    return Response(content = body, media_type = "application/json", headers = headers)
+
+# Optimization: Conditional GET fast path. Every ETag starts with the dataset generation
+# its response was built from (see build_cached_response), and every change to the data
+# moves the generation (see src/cache/dataset_generation.py). So if a client's ETag was
+# built from the current generation, the response it has is still the current one, and
+# we can say so with a 304 before building a cache key, looking in the cache, or using
+# the database session (AsyncSessions only connect when they run their first query).
+# Revalidating a response the client already has then costs a header parse and an int
+# comparison.
+#
+# This trusts the generation exactly as much as the cache does: cached responses are 
+# only replaced within a generation when they expire, so a client could otherwise
+# have been sent the same old ETag from the cache anyway.
+def _respond_not_modified_if_current(
+    request: Request,
+    generation: int,
+    cache_control: str,
+    endpoint: str,
+) -> Response | None:
+    '''Returns a 304 if the request's If-None-Match has an ETag from generation.'''
+
+    for etag in parse_if_none_match(request.headers.get("if-none-match")):
+        if get_etag_generation(etag) == generation:
+            metrics_aggregator.count("http.not_modified.fast_path", attributes = {
+                "endpoint": endpoint
+            })
+
+            return Response(
+                status_code = status.HTTP_304_NOT_MODIFIED,
+                headers = {
+                    "ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"
+                }
+            )
+
+    return None
+
+# Stale entries being refreshed, by cache key. Holding on to each task also keeps it from
+# being garbage collected before it finishes.
+_background_refreshes: dict[str, asyncio.Task] = {}
+
+def _refresh_in_background(
+    cache_key: str,
+    fetch: Callable[[AsyncSession], Awaitable[CachedResponse]],
+    session: AsyncSession,
+) -> None:
+    '''Starts one background fetch for a stale cache entry, unless one is already running.'''
+
+    if cache_key in _background_refreshes:
+        return
+
+    async def refresh():
+        try:
+            # The request's session is closed once its response is sent, so the refresh
+            # opens its own session on the same engine.
+            async with AsyncSession(
+                bind = session.bind, expire_on_commit = False
+            ) as refresh_session:
+                await single_flight.do(cache_key, partial(fetch, refresh_session))
+
+        except Exception:
+            # The stale entry keeps being served until its hard TTL, so just log it.
+            logger.exception(f"Failed to refresh stale cache entry {cache_key}")
+
+        finally:
+            del _background_refreshes[cache_key]
+
+    _background_refreshes[cache_key] = asyncio.create_task(refresh())
+
+def _respond_from_cache_entry(
+    request: Request,
+    cache_key: str,
+    cached_entry: CacheEntry,
+    fetch: Callable[[AsyncSession], Awaitable[CachedResponse]],
+    session: AsyncSession,
+    head_only: bool = False,
+) -> Response:
+    '''Answers a request from a cache hit, refreshing the entry first if it's stale.'''
+
+    # Optimization: Stale-while-revalidate. A stale entry (past its soft TTL, see
+    # SimpleCache) is served right away, and a single background fetch replaces it. 
+    # Nobody waits on the database just because an entry aged out.
+    if cache.is_stale(cached_entry):
+        _refresh_in_background(cache_key, fetch, session)
+
+    return _respond_from_cache(request, cached_entry["value"], head_only)
+
 async def _get_tea_profiles_common(
     request: Request,
-    response: Response,
     filters_dict: dict[str, Any],
-    session: Session,
+    session: AsyncSession,
     limit: int,
     offset: int,
+    after_id: int | None = None,
+    fields: tuple[str, ...] | None = None,
     head_only: bool = False,
 ):
-    '''Gets all tea profiles that match the set filters, limit, and offset.'''
+    '''
+        Gets all tea profiles that match the set filters, limit, offset, and cursor,
+        projected down to fields if given.
+    '''
 
     # The Sentry spans througout this wrapper should only wrap the exact thing we want
     # to measure. The first span wraps the entire contents of the wrapper because it 
     # represents the entire endpoint's execution.
     with sentry_sdk.start_span(op = "endpoint", name = "tea_profiles"):
-        # Enforce a maximum limit to prevent huge queries.
-        limit = min(limit, 200)
+        # Optimization: Canonicalize the request before building the cache key, so that
+        # requests for the same results share one cache entry. Ex: ?country_of_origin=China
+        # and ?country_of_origin=china. The catalog and repository filter by the same
+        # canonical form (see canonicalize_filters).
+        limit = _clamp_limit(limit)
+        offset = _clamp_offset(offset)
+        filters_dict = canonicalize_filters(filters_dict)
 
         # These tags become indexed fields in Sentry that allow us to filter, group,
         # build dashboards, slice performance data, search for events, and compare 
@@ -91,95 +438,82 @@ async def _get_tea_profiles_common(
         sentry_sdk.set_tag("endpoint", "tea_profiles")
         sentry_sdk.set_tag("limit", limit)
         sentry_sdk.set_tag("offset", offset)
+        sentry_sdk.set_tag("paginated_by_cursor", after_id is not None)
         sentry_sdk.set_tag("filters", str(filters_dict))
+        sentry_sdk.set_tag("sparse_fields", fields is not None)
+
+        generation = _get_generation()
+
+        not_modified = _respond_not_modified_if_current(
+            request, generation, LIST_CACHE_CONTROL, "tea_profiles"
+        )
+        if not_modified is not None:
+            return not_modified
 
         # Build cache
-        cache_key = f"tea_profiles:list:{filters_dict}:{limit}:{offset}"
+        cache_key = get_cache_key(
+            "tea_profiles:list",
+            {
+                "filters": filters_dict, "limit": limit, "offset": offset,
+                "after_id": after_id, "fields": fields,
+            },
+            generation
+        )
+
+        async def fetch_tea_profiles(session: AsyncSession) -> CachedResponse:
+            # If there is no existing cached tea profiles, try the in-memory catalog (see
+            # src/catalog/catalog_engine.py), which answers without a database connection.
+            with sentry_sdk.start_span(op = "catalog", name = "fetch tea profiles"):
+                tea_profiles = catalog.list(
+                    filters = filters_dict, limit = limit, offset = offset, after_id = after_id,
+                    generation = generation
+                )
+
+            sentry_sdk.set_tag("served_from_catalog", tea_profiles is not None)
 
-        with sentry_sdk.start_span(op = "cache", name = "cache lookup"):
+            # If the catalog isn't loaded, proceed as normal.
+            # Optimization: We get pagination from limit + offset or the cursor.
+            if tea_profiles is None:
+                repo = AsyncTeaProfilesRepository(session)
+                with sentry_sdk.start_span(op = "db", name = "fetch tea profiles"):
+                    tea_profiles = await repo.list(
+                        filters = filters_dict, limit = limit, offset = offset, 
+                        after_id = after_id, columns = fields
+                    )
+
+            # Render the response once and cache the bytes along with their headers.
+            with sentry_sdk.start_span(op = "serialize", name = "render tea profiles"):
+                headers = {"Cache-Control": LIST_CACHE_CONTROL}
+
+                next_cursor = _get_next_cursor(tea_profiles, limit)
+                if next_cursor is not None:
+                    headers["X-Next-Cursor"] = next_cursor
+
+                etag, last_modified = _get_tea_profiles_validators(tea_profiles)
+                cached_response = build_cached_response(
+                    _render_tea_profiles(tea_profiles, fields), headers, generation,
+                    etag, last_modified
+                )
+
+            await cache.set_async(cache_key, cached_response, LIST_REGION)
+            return cached_response
+
+        with start_span(op = "cache", name = "cache lookup"):
             # Try to get tea profiles from cache first.
-            cached_entry = cache.get(cache_key)
+            cached_entry = await cache.get_async(cache_key)
 
         if cached_entry is not None:
-            cached_entry = cast(CacheEntry, cached_entry)
-            cached_value = cached_entry["value"]
-            last_modified = cached_entry["timestamp"]
-
-            # Optimization: ETags (Entity tags) are another caching mechanism that saves 
-            # bandwidth and makes the app feel instant. The backend first sends a fingerprint of a 
-            # resource (a hashed string) with its response via a header when the client 
-            # makes the request. This string represents the current state of the resource. The 
-            # client stores the ETag with the cached response. On subsequent requests for the same
-            # resource, the client sends the ETag back in the "If-None-Match" header. The server
-            # computes the current ETag for the resource. If it matches, it knows the resource 
-            # hasn't changed, and it returns 304 Not Modified with no body (this is the part that
-            # saves bandwidth).
-            with sentry_sdk.start_span(op = "etag", name = "generate etag"):
-                etag = generate_etag(cached_value)
-
-            inm = request.headers.get("if-none-match")
-
-            if inm == etag:
-                return Response(status_code = status.HTTP_304_NOT_MODIFIED)
-
-            # Optimization: Last-Modified is similar to ETags but uses a date instead 
-            # of a hashstring fingerprint. When the client makes a request, the server 
-            # includes a Last-Modified header with the timestamp corresponding to when 
-            # the resource last changed. The client stores that timestamp. On subsequent 
-            # requests, it sends back an "If-Modified-Since" header. The server checks 
-            # whether the resource was modified after the timestamp and returns 
-            # 304 Not Modified with no body if not. If it was modified, it returns 
-            # 200 OK with the new content and an updated Last-Modified. Same benefits 
-            # as Etags, except the precision is capped at 1 sec and it does not consider 
-            # the case where content is generated identically as it was on the first request.
-            ims = request.headers.get("if-modified-since")
-
-            if ims:
-                try:
-                    ims_dt = datetime.strptime(
-                        ims, "%a, %d %b %Y %H:%M:%S GMT"
-                    ).replace(tzinfo = timezone.utc)
-
-                    if ims_dt >= last_modified.replace(microsecond = 0):
-                        return Response(status_code = status.HTTP_304_NOT_MODIFIED)
-                    
-                except ValueError:
-                    pass
-
-            response.headers["ETag"] = etag
-            response.headers["Last-Modified"] = http_date(last_modified)
-            response.headers["Cache-Control"] = "public, max-age=300" # 300 seconds = 5 minutes
-
-            if head_only:
-                response.headers["Content-Length"] = "0"
-                return Response(status_code = status.HTTP_200_OK, headers = dict(response.headers))
-            else:
-                return cached_value
-
-        # If there is no existing cached tea profiles, proceed as normal.
-        # Optimization: We get pagination from limit + offset.
-        repo = TeaProfilesRepository(session)
-        with sentry_sdk.start_span(op = "db", name = "fetch tea profiles"):
-            tea_profiles = repo.list(filters = filters_dict, limit = limit, offset = offset)
-
-        # Cache the tea profiles.
-        cache.set(cache_key, tea_profiles)
-        cached_entry = cache.get(cache_key)
-        cached_entry = cast(CacheEntry, cached_entry)
-        cached_value = cached_entry["value"]
-        last_modified = cached_entry["timestamp"]
-
-        with sentry_sdk.start_span(op = "etag", name = "generate etag"):
-            etag = generate_etag(cached_value)
-            
-        inm = request.headers.get("if-none-match")
+            return _respond_from_cache_entry(
+                request, cache_key, cast(CacheEntry, cached_entry), fetch_tea_profiles, session,
+                head_only
+            )
 
-        if inm == etag:
-            return Response(status_code = status.HTTP_304_NOT_MODIFIED)
-
-        response.headers["ETag"] = etag
-        response.headers["Last-Modified"] = http_date(last_modified)
-        response.headers["Cache-Control"] = "public, max-age=300"
+        # Optimization: Concurrent misses on the same key share one fetch (see
+        # src/cache/single_flight.py), so an expired popular page costs one query
+        # rather than one per waiting request.
+        cached_response = await single_flight.do(
+            cache_key, partial(fetch_tea_profiles, session)
+        )
 
         # Verify caching is working.
         # cached = tea_profiles_cache.get(cache_key)
@@ -189,14 +523,10 @@ async def _get_tea_profiles_common(
 
         # logger.debug(f"[CACHE MISS] tea list {cache_key}")
 
-        if head_only:
-            response.headers["Content-Length"] = "0"
-            return Response(status_code = status.HTTP_200_OK, headers = dict(response.headers))
-        else:
-            return cached_value
+        return _respond_from_cache(request, cached_response, head_only)
 
 # Depends is FastAPI's dependency injection system. It allows us to call the 
-# get_session context manager without needing to use a "with" statement or
+# get_async_session generator without needing to use a "with" statement or
 # other boilerplate code in every route that needs it. FastAPI handles the 
 # lifecycle management (opening, closing sessions) for us. Using Depends 
 # also makes it easier to swap dependencies in tests. Swagger/OpenAPI docs will
@@ -210,6 +540,18 @@ async def _get_tea_profiles_common(
 # def get_x(filters: TeaProfileFilters = Depends()): # query
 # def get_x(limit: int = Query(10)):                 # query
 #
+# Optimization: Pagination comes in two flavors. limit + offset is kept for
+# compatibility, but the database has to walk past every skipped row, so deep pages
+# get slower and slower. Clients that page through everything (like the frontend's
+# infinite scroll) should use the cursor instead: leave it off for the first page,
+# then pass back the X-Next-Cursor response header to get the next one. When there
+# is no X-Next-Cursor header, there are no more pages.
+#
+# Optimization: Sparse fieldsets. List views only render a few fields, so clients can
+# pass ?fields=summary for a compact representation or ?fields=name,tea_type,... for 
+# exactly the fields they need. Only those columns are SELECTed, hydrated, serialized,
+# and sent. Leaving fields off returns full tea profiles, as v1 always has.
+#
 # IMPORTANT: We must register both "[routePrefix]" and "[routePrefix]/" to avoid
 # FastAPI's default trailing-slash 307 redirect, which downgrades HTTPS to HTTP
 # and gets blocked by browsers as mixed content in production.
@@ -223,22 +565,24 @@ async def _get_tea_profiles_common(
 @rate_limiter.limit(LOW_RATE_LIMIT)
 async def get_tea_profiles(
     request: Request, # required for rate limiter
-    response: Response, # required for cache-control headers
     filters: TeaProfileFilters = Depends(get_tea_profile_filters), # type: ignore
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    cursor: str | None = None,
+    fields: str | None = None
 ):
     # filters.model_dump(exclude_none = True) returns the Pydantic model as a
     # dict, dropping all fields that have a value of None. 
     #
-    # TeaProfileFilters does not belong in TeaProfilesRepository (it's part of the API layer,
+    # TeaProfileFilters does not belong in the repository (it's part of the API layer,
     # as it's a Pydantic request schema), so save the dict returned by model_dump here and 
     # pass that along rather than the schema itself. We'll also use filters_dict in the cache.
     filters_dict = filters.model_dump(exclude_none = True)
 
     return await _get_tea_profiles_common(
-        request, response, filters_dict, session, limit, offset, head_only = False
+        request, filters_dict, session, limit, offset, _get_after_id(cursor), 
+        _get_fields(fields), head_only = False
     )
 
 # Optimization: HEAD requests are a cheap way for clients to determine if resources
@@ -256,100 +600,442 @@ async def get_tea_profiles(
 @rate_limiter.limit(LOW_RATE_LIMIT)
 async def head_tea_profiles(
     request: Request, 
-    response: Response, 
     filters: TeaProfileFilters = Depends(get_tea_profile_filters), # type: ignore
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    cursor: str | None = None,
+    fields: str | None = None
 ):
     filters_dict = filters.model_dump(exclude_none = True)
 
     return await _get_tea_profiles_common(
-        request, response, filters_dict, session, limit, offset, head_only = True
+        request, filters_dict, session, limit, offset, _get_after_id(cursor), 
+        _get_fields(fields), head_only = True
     )
 
 ####################################################################################
 
-async def _get_tea_profile_common(
+async def _search_tea_profiles_common(
     request: Request,
-    response: Response,
-    tea_profile_id: int, 
-    session: Session,
-    head_only: bool = False,
+    query: str,
+    session: AsyncSession,
+    limit: int,
+) -> Response:
+    '''Gets the tea profiles that best match a full-text search query.'''
+
+    with sentry_sdk.start_span(op = "endpoint", name = "tea_profiles_search"):
+        limit = _clamp_limit(limit)
+
+        sentry_sdk.set_tag("endpoint", "tea_profiles_search")
+        sentry_sdk.set_tag("limit", limit)
+
+        # Searches are case-insensitive and ignore extra whitespace, so normalize the 
+        # query before building the cache key to get more cache hits.
+        query = " ".join(query.lower().split())
+        generation = _get_generation()
+
+        not_modified = _respond_not_modified_if_current(
+            request, generation, LIST_CACHE_CONTROL, "tea_profiles_search"
+        )
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = get_cache_key(
+            "tea_profiles:search", {"query": query, "limit": limit}, generation
+        )
+
+        async def fetch_search_results(session: AsyncSession) -> CachedResponse:
+            repo = AsyncTeaProfilesRepository(session)
+            with sentry_sdk.start_span(op = "db", name = "search tea profiles"):
+                tea_profiles = await repo.search(query, limit = limit)
+
+            with sentry_sdk.start_span(op = "serialize", name = "render tea profiles"):
+                etag, last_modified = _get_tea_profiles_validators(tea_profiles)
+                cached_response = build_cached_response(
+                    _render_tea_profiles(tea_profiles, None), 
+                    {"Cache-Control": LIST_CACHE_CONTROL},
+                    generation, etag, last_modified
+                )
+
+            await cache.set_async(cache_key, cached_response, LIST_REGION)
+            return cached_response
+
+        with start_span(op = "cache", name = "cache lookup"):
+            cached_entry = await cache.get_async(cache_key)
+
+        if cached_entry is not None:
+            return _respond_from_cache_entry(
+                request, cache_key, cast(CacheEntry, cached_entry), fetch_search_results, session
+            )
+
+        cached_response = await single_flight.do(cache_key, partial(fetch_search_results, session))
+
+        return _respond_from_cache(request, cached_response)
+
+# Optimization: Full-text search backed by an inverted index, ranked by relevance. 
+# Unlike the substring filters on the list route, this doesn't have to look at every 
+# row. Ex: /api/v1/tea_profiles/search?q=west lake
+#
+# IMPORTANT: This must be registered before /{tea_profile_id}, or FastAPI will try
+# (and fail) to parse "search" as a tea profile id.
+@router.get("/search", response_model = List[TeaProfileSchema], 
+    responses = COMMON_RESPONSES # type: ignore
+)
+@rate_limiter.limit(LOW_RATE_LIMIT)
+async def search_tea_profiles(
+    request: Request, # required for rate limiter
+    q: str = Query(..., min_length = 1, max_length = 200),
+    session: AsyncSession = Depends(get_async_session),
+    limit: int = 100
 ):
-    '''Gets an entire tea profile for one tea.'''
+    return await _search_tea_profiles_common(request, q, session, limit)
 
-    with sentry_sdk.start_span(op = "endpoint", name = "tea_profile"):
-        sentry_sdk.set_tag("endpoint", "tea_profile")
-        sentry_sdk.set_tag("tea_profile_id", tea_profile_id)
+####################################################################################
 
-        # Try to get tea profile from cache first.
-        cache_key = f"tea_profile:{tea_profile_id}"
+_tea_profile_facets_adapter = TypeAdapter(TeaProfileFacetsSchema)
+
+async def _get_tea_profile_facets_common(
+    request: Request,
+    filters_dict: dict[str, Any],
+    session: AsyncSession,
+) -> Response:
+    '''Counts the values of the facet fields across the tea profiles matching filters.'''
+
+    with sentry_sdk.start_span(op = "endpoint", name = "tea_profiles_facets"):
+        # Same canonical form as the list route.
+        filters_dict = canonicalize_filters(filters_dict)
+
+        sentry_sdk.set_tag("endpoint", "tea_profiles_facets")
+        sentry_sdk.set_tag("filters", str(filters_dict))
+
+        generation = _get_generation()
+
+        not_modified = _respond_not_modified_if_current(
+            request, generation, LIST_CACHE_CONTROL, "tea_profiles_facets"
+        )
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = get_cache_key("tea_profiles:facets", {"filters": filters_dict}, generation)
+
+        async def fetch_facets(session: AsyncSession) -> CachedResponse:
+            # Optimization: The in-memory catalog counts facets with a few bitmap ANDs. 
+            # Otherwise, the database counts them with a GROUP BY per facet (all in one
+            # query), so only the counts come back.
+            with sentry_sdk.start_span(op = "catalog", name = "count tea profile facets"):
+                facets = catalog.facets(filters_dict, generation = generation)
+
+            if facets is None:
+                repo = AsyncTeaProfilesRepository(session)
+                with sentry_sdk.start_span(op = "db", name = "count tea profile facets"):
+                    facets = await repo.facets(filters_dict)
 
-        with sentry_sdk.start_span(op = "cache", name = "cache lookup"):
-            cached_entry = cache.get(cache_key)
+            with sentry_sdk.start_span(op = "serialize", name = "render tea profile facets"):
+                cached_response = build_cached_response(
+                    _tea_profile_facets_adapter.dump_json(
+                        _tea_profile_facets_adapter.validate_python(facets)
+                    ),
+                    {"Cache-Control": LIST_CACHE_CONTROL},
+                    generation
+                )
+
+            await cache.set_async(cache_key, cached_response, LIST_REGION)
+            return cached_response
+
+        with start_span(op = "cache", name = "cache lookup"):
+            cached_entry = await cache.get_async(cache_key)
 
         if cached_entry is not None:
-            cached_entry = cast(CacheEntry, cached_entry)
-            cached_value = cached_entry["value"]
-            last_modified = cached_entry["timestamp"]
+            return _respond_from_cache_entry(
+                request, cache_key, cast(CacheEntry, cached_entry), fetch_facets, session
+            )
 
-            # ETag check
-            with sentry_sdk.start_span(op = "etag", name = "generate etag"):
-                etag = generate_etag(cached_value)
+        cached_response = await single_flight.do(cache_key, partial(fetch_facets, session))
 
-            inm = request.headers.get("if-none-match")
+        return _respond_from_cache(request, cached_response)
 
-            if inm == etag:
-                return Response(status_code = status.HTTP_304_NOT_MODIFIED)
+# Optimization: Filter sidebars need to know how many teas match each tea type,
+# country, oxidation level, and common descriptor for the current selection. Rather 
+# than fetching whole lists and counting on the client, they can ask for the counts.
+# Takes the same filters as the list route. Ex: 
+#
+#     /api/v1/tea_profiles/facets?country_of_origin=china
+#
+# IMPORTANT: This must be registered before /{tea_profile_id}, or FastAPI will try
+# (and fail) to parse "facets" as a tea profile id.
+@router.get("/facets", response_model = TeaProfileFacetsSchema, 
+    responses = COMMON_RESPONSES # type: ignore
+)
+@rate_limiter.limit(LOW_RATE_LIMIT)
+async def get_tea_profile_facets(
+    request: Request, # required for rate limiter
+    filters: TeaProfileFilters = Depends(get_tea_profile_filters), # type: ignore
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await _get_tea_profile_facets_common(
+        request, filters.model_dump(exclude_none = True), session
+    )
 
-            ims = request.headers.get("if-modified-since")
+####################################################################################
 
-            # Last-Modified check
-            if ims:
-                try:
-                    ims_dt = datetime.strptime(
-                        ims, "%a, %d %b %Y %H:%M:%S GMT"
-                    ).replace(tzinfo = timezone.utc)
+# Turn ?ids=3,1,2 into [3, 1, 2], dropping duplicates but keeping the client's order.
+def _get_tea_profile_ids(ids: str) -> List[int]:
+    try:
+        tea_profile_ids = [int(id_.strip()) for id_ in ids.split(",") if id_.strip()]
 
-                    if ims_dt >= last_modified.replace(microsecond = 0):
-                        return Response(status_code = status.HTTP_304_NOT_MODIFIED)
-                except ValueError:
-                    pass
+    except ValueError as exc:
+        raise TeaProfileValidationError(
+            "Tea profile ids must be comma-separated integers.",
+            details = {"ids": ids}
+        ) from exc
 
-            response.headers["ETag"] = etag
-            response.headers["Last-Modified"] = http_date(last_modified)
-            response.headers["Cache-Control"] = "public, max-age=300"
+    tea_profile_ids = list(dict.fromkeys(tea_profile_ids))
 
-            if head_only:
-                response.headers["Content-Length"] = "0"
-                return Response(status_code = status.HTTP_200_OK, headers = dict(response.headers))
-            else:
-                return cached_value
+    if not tea_profile_ids or len(tea_profile_ids) > MAX_PAGE_SIZE:
+        raise TeaProfileValidationError(
+            f"Between 1 and {MAX_PAGE_SIZE} tea profile ids must be requested.",
+            details = {"ids": ids}
+        )
 
-        # If there is no existing cached tea profile, proceed as normal. 
-        repo = TeaProfilesRepository(session)
-        with sentry_sdk.start_span(op = "db", name = "fetch tea profile"):
-            tea_profile = repo.get_by_id(tea_profile_id)
+    return tea_profile_ids
 
-        # Cache the tea profile.
-        cache.set(cache_key, tea_profile)
-        cached_entry = cache.get(cache_key)
-        cached_entry = cast(CacheEntry, cached_entry)
-        cached_value = cached_entry["value"]
-        last_modified = cached_entry["timestamp"]
+# The batch and single tea profile routes share per-id entries.
+def _get_tea_profile_cache_key(tea_profile_id: int, generation: int) -> str:
+    return f"tea_profile:{tea_profile_id}:g{generation}"
 
-        with sentry_sdk.start_span(op = "etag", name = "generate etag"):
-            etag = generate_etag(cached_value)
+async def _get_tea_profiles_batch_common(
+    tea_profile_ids: List[int],
+    session: AsyncSession,
+) -> Response:
+    '''Gets many tea profiles by id, from the cache where possible.'''
 
-        inm = request.headers.get("if-none-match")
+    with sentry_sdk.start_span(op = "endpoint", name = "tea_profiles_batch"):
+        sentry_sdk.set_tag("endpoint", "tea_profiles_batch")
+        sentry_sdk.set_tag("batch_size", len(tea_profile_ids))
 
-        if inm == etag:
-            return Response(status_code = status.HTTP_304_NOT_MODIFIED)
+        cached_responses: dict[int, CachedResponse] = {}
+        generation = _get_generation()
+
+        # Satisfy as much as we can from the same per-id entries the single tea profile 
+        # route fills, so the two routes warm each other's cache. Stale entries are served as 
+        # is; the single tea profile route refreshes them.
+        with start_span(op = "cache", name = "cache lookup"):
+            # The L2 lookups of the L1 misses (if any) run side by side.
+            cached_entries = await asyncio.gather(*[
+                cache.get_async(_get_tea_profile_cache_key(tea_profile_id, generation))
+                for tea_profile_id in tea_profile_ids
+            ])
+
+            for tea_profile_id, cached_entry in zip(tea_profile_ids, cached_entries):
+                if cached_entry is not None:
+                    cached_entry = cast(CacheEntry, cached_entry)
+                    cached_responses[tea_profile_id] = cached_entry["value"]
+
+        # Optimization: Fetch all of the misses in a single WHERE id IN (...) round trip
+        # instead of one query per id.
+        missing_ids = [id_ for id_ in tea_profile_ids if id_ not in cached_responses]
+
+        if missing_ids:
+            repo = AsyncTeaProfilesRepository(session)
+            with sentry_sdk.start_span(op = "db", name = "fetch tea profiles by id"):
+                tea_profiles = await repo.get_by_ids(missing_ids)
+
+            with sentry_sdk.start_span(op = "serialize", name = "render tea profiles"):
+                for tea_profile in tea_profiles:
+                    etag, last_modified = _get_tea_profile_validators(tea_profile)
+                    cached_response = build_cached_response(
+                        _render_tea_profile(tea_profile), 
+                        {"Cache-Control": DETAIL_CACHE_CONTROL},
+                        generation, etag, last_modified
+                    )
+
+                    await cache.set_async(
+                        _get_tea_profile_cache_key(tea_profile.id, generation), 
+                        cached_response, DETAIL_REGION
+                    )
+                    cached_responses[tea_profile.id] = cached_response
+
+        found_ids = [id_ for id_ in tea_profile_ids if id_ in cached_responses]
+        not_found_ids = [id_ for id_ in tea_profile_ids if id_ not in cached_responses]
+
+        # Optimization: Every tea profile is already rendered to JSON bytes, so splice 
+        # them into the response rather than parsing and re-serializing them.
+        body = b"".join([
+            b'{"tea_profiles":[',
+            b",".join(cached_responses[id_]["body"] for id_ in found_ids),
+            b'],"etags":',
+            json.dumps({id_: cached_responses[id_]["etag"] for id_ in found_ids}).encode(),
+            b',"not_found":',
+            json.dumps(not_found_ids).encode(),
+            b"}",
+        ])
+
+        return Response(
+            content = body, 
+            media_type = "application/json",
+            headers = {"Cache-Control": DETAIL_CACHE_CONTROL}
+        )
+
+# Optimization: Views that show several teas at once (comparisons, favorites) can 
+# fetch them all in one request instead of one request (and one rate limit token, 
+# session, and query) per tea. Ex: /api/v1/tea_profiles/batch?ids=3,1,2
+#
+# IMPORTANT: This must be registered before /{tea_profile_id}, or FastAPI will try
+# (and fail) to parse "batch" as a tea profile id.
+@router.get("/batch", response_model = TeaProfileBatchSchema, 
+    responses = COMMON_RESPONSES # type: ignore
+)
+@rate_limiter.limit(LOW_RATE_LIMIT)
+async def get_tea_profiles_batch(
+    request: Request, # required for rate limiter
+    ids: str,
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await _get_tea_profiles_batch_common(_get_tea_profile_ids(ids), session)
+
+####################################################################################
+
+def _get_export_writer(export_format: str) -> ExportWriter:
+    try:
+        return get_export_writer(export_format)
+
+    except ValueError as exc:
+        raise TeaProfileValidationError(
+            "Unsupported export format.",
+            details = {"format": export_format, "available": get_export_formats()}
+        ) from exc
+
+def _export_tea_profiles_common(
+    request: Request,
+    session: AsyncSession,
+    writer: ExportWriter,
+) -> Response:
+    '''
+        Streams every tea profile through writer, gzipped if the client accepts it and
+        the format is worth compressing.
+    '''
+
+    with sentry_sdk.start_span(op = "endpoint", name = "tea_profiles_export"):
+        sentry_sdk.set_tag("endpoint", "tea_profiles_export")
+        sentry_sdk.set_tag("export_format", writer.format_name)
+
+        # An export holds every row of a generation, so its ETag is just the generation
+        # (and the format), and clients re-downloading an unchanged catalog get a 304.
+        generation = _get_generation()
+
+        not_modified = _respond_not_modified_if_current(
+            request, generation, LIST_CACHE_CONTROL, "tea_profiles_export"
+        )
+        if not_modified is not None:
+            return not_modified
+
+        headers = {
+            "ETag": f"{generation}-{writer.format_name}",
+            "Cache-Control": LIST_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+            "Content-Disposition": (
+                f'attachment; filename="tea_profiles.{writer.file_extension}"'
+            ),
+        }
+
+        # Not cached: an export is as big as the catalog, and is streamed straight from
+        # the database instead. The request's session is only used for its engine.
+        chunks = stream_export(cast(Any, session.bind), writer)
+
+        # Optimization: Compress on the fly, chunk by chunk. GZipMiddleware leaves
+        # responses with a Content-Encoding alone, so nothing is compressed twice.
+        accept_encoding = request.headers.get("accept-encoding")
+
+        if writer.compressible and choose_encoding(accept_encoding, ["gzip"]) == "gzip":
+            chunks = gzip_stream(chunks)
+            headers["Content-Encoding"] = "gzip"
+
+        # Parquet and Arrow are already compact (see ExportWriter.compressible), so say
+        # so explicitly to keep GZipMiddleware from compressing them anyway.
+        elif not writer.compressible:
+            headers["Content-Encoding"] = "identity"
+
+        return StreamingResponse(chunks, media_type = writer.media_type, headers = headers)
+
+# Optimization: Pulls the whole catalog in one request, as NDJSON (one tea profile per
+# line) by default, or in another format with ?format= (see src/export/export_formats.py):
+# CSV for spreadsheets or re-ingesting, and Parquet or Arrow for analytics tools. Paging
+# through the list route with offsets costs more for every page (the database walks past
+# every skipped row), so reading everything that way is quadratic.
+# The export reads the table once, in order, through a server-side cursor, and streams
+# it out as it goes, so memory use doesn't grow with the catalog. Ex:
+#
+#     curl --compressed https://.../api/v1/tea_profiles/export > tea_profiles.ndjson
+#     curl "https://.../api/v1/tea_profiles/export?format=parquet" > tea_profiles.parquet
+#
+# IMPORTANT: This must be registered before /{tea_profile_id}, or FastAPI will try
+# (and fail) to parse "export" as a tea profile id.
+@router.get("/export", 
+    response_class = StreamingResponse,
+    responses = COMMON_RESPONSES # type: ignore
+)
+@rate_limiter.limit(LOW_RATE_LIMIT)
+async def export_tea_profiles(
+    request: Request, # required for rate limiter
+    export_format: str = Query(DEFAULT_EXPORT_FORMAT, alias = "format"),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return _export_tea_profiles_common(request, session, _get_export_writer(export_format))
+
+####################################################################################
+
+async def _get_tea_profile_common(
+    request: Request,
+    tea_profile_id: int, 
+    session: AsyncSession,
+    head_only: bool = False,
+):
+    '''Gets an entire tea profile for one tea.'''
+
+    with sentry_sdk.start_span(op = "endpoint", name = "tea_profile"):
+        sentry_sdk.set_tag("endpoint", "tea_profile")
+        sentry_sdk.set_tag("tea_profile_id", tea_profile_id)
+
+        generation = _get_generation()
+
+        # Check whether the client's copy is current before anything else.
+        not_modified = _respond_not_modified_if_current(
+            request, generation, DETAIL_CACHE_CONTROL, "tea_profile"
+        )
+        if not_modified is not None:
+            return not_modified
+
+        # Try to get tea profile from cache first.
+        cache_key = _get_tea_profile_cache_key(tea_profile_id, generation)
+
+        async def fetch_tea_profile(session: AsyncSession) -> CachedResponse:
+            # If there is no existing cached tea profile, proceed as normal. 
+            repo = AsyncTeaProfilesRepository(session)
+            with sentry_sdk.start_span(op = "db", name = "fetch tea profile"):
+                tea_profile = await repo.get_by_id(tea_profile_id)
+
+            # Render the response once and cache the bytes along with their headers.
+            with sentry_sdk.start_span(op = "serialize", name = "render tea profile"):
+                etag, last_modified = _get_tea_profile_validators(tea_profile)
+                cached_response = build_cached_response(
+                    _render_tea_profile(tea_profile), {"Cache-Control": DETAIL_CACHE_CONTROL},
+                    generation, etag, last_modified
+                )
+
+            await cache.set_async(cache_key, cached_response, DETAIL_REGION)
+            return cached_response
+
+        with start_span(op = "cache", name = "cache lookup"):
+            cached_entry = await cache.get_async(cache_key)
+
+        if cached_entry is not None:
+            return _respond_from_cache_entry(
+                request, cache_key, cast(CacheEntry, cached_entry), fetch_tea_profile, session,
+                head_only
+            )
 
-        response.headers["ETag"] = etag
-        response.headers["Last-Modified"] = http_date(last_modified)
-        response.headers["Cache-Control"] = "public, max-age=300"
+        cached_response = await single_flight.do(cache_key, partial(fetch_tea_profile, session))
 
         # Verify caching is working.
         # cached = tea_profile_cache.get(tea_profile_id)
@@ -359,11 +1045,7 @@ async def _get_tea_profile_common(
 
         # logger.debug(f"[CACHE MISS] tea profile {tea_profile_id}")
 
-        if head_only:
-            response.headers["Content-Length"] = "0"
-            return Response(status_code = status.HTTP_200_OK, headers = dict(response.headers))
-        else:
-            return cached_value
+        return _respond_from_cache(request, cached_response, head_only)
 
 
 @router.get("/{tea_profile_id}", response_model = TeaProfileSchema, 
@@ -372,12 +1054,11 @@ async def _get_tea_profile_common(
 @rate_limiter.limit(HIGH_RATE_LIMIT)
 async def get_tea_profile(
     request: Request, # required for rate limiter
-    response: Response, # required for cache-control headers
     tea_profile_id: int, 
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     return await _get_tea_profile_common(
-        request, response, tea_profile_id, session, head_only = False
+        request, tea_profile_id, session, head_only = False
     )
 
 @router.head("/{tea_profile_id}", 
@@ -388,10 +1069,9 @@ async def get_tea_profile(
 @rate_limiter.limit(HIGH_RATE_LIMIT)
 async def head_tea_profile(
     request: Request, 
-    response: Response, 
     tea_profile_id: int, 
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     return await _get_tea_profile_common(
-        request, response, tea_profile_id, session, head_only = True
+        request, tea_profile_id, session, head_only = True
     )
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import create_model
-from typing import Optional, Union, get_origin, get_args
+from functools import lru_cache
+from pydantic import BaseModel, create_model
+from typing import List, Optional, Union, get_origin, get_args
 
 from src.db.models.tea_profiles_model import TeaProfileModel
 from src.utils.schema_utils import get_schema_from_model
@@ -10,6 +11,33 @@ from src.utils.schema_utils import get_schema_from_model
 # in FastAPI.
 TeaProfileSchema = get_schema_from_model(TeaProfileModel)
 
+# Sparse fieldsets: a projected schema holds only the requested fields, so we only
+# serialize (and send) what the client asked for. Each distinct field set builds its 
+# schema once. fields must be a tuple (rather than a list) so lru_cache can hash it.
+@lru_cache(maxsize = 64)
+def get_tea_profile_projection_schema(fields: tuple[str, ...]) -> type[BaseModel]:
+    return get_schema_from_model(
+        TeaProfileModel, 
+        name = "TeaProfileProjectionSchema", 
+        include = fields
+    )
+
+# Response for fetching many tea profiles at once. etags maps each found id to the
+# ETag of its tea profile so clients can revalidate them individually later. Only used
+# to document the batch route; the route itself assembles the JSON from cached bytes.
+class TeaProfileBatchSchema(BaseModel):
+    tea_profiles: List[TeaProfileSchema] # type: ignore
+    etags: dict[int, str]
+    not_found: List[int]
+
+# Response for the facets route: how many tea profiles match the filters, and for each
+# facet field, how many of those have each value. Ex:
+#
+#     {"total": 12, "facets": {"tea_type": {"green": 9, "white": 3}, ...}}
+class TeaProfileFacetsSchema(BaseModel):
+    total: int
+    facets: dict[str, dict[str, int]]
+
 # old, brittle way
 # class TeaProfileSchema(BaseModel):
 #     id: int
@@ -0,0 +1,129 @@
+# Benchmarks cache hit latency for each cache tier (see src/cache/cache_backend.py):
+#
+#     l1:      a hit in the worker's own SimpleCache (an in-process dict)
+#     sqlite:  an L1 miss answered by the SQLite shared-memory tier, which every worker
+#              process on the machine shares
+#     redis:   an L1 miss answered by a Redis-protocol server, if --redis-url is given
+#
+# Every hit returns a cached response like the list route's (see CachedResponse), with
+# a body of --body-bytes. L2 hits go through SimpleCache.get, so they include
+# deserializing the entry and copying it into L1. Ex:
+#
+#     python -m src.app.benchmark_cache_tiers
+#     python -m src.app.benchmark_cache_tiers --body-bytes 2000 200000 --repeats 5000
+#     python -m src.app.benchmark_cache_tiers --redis-url redis://localhost:6379/0
+#
+# The SQLite file is created in a temporary directory and deleted afterwards.
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.cache.cache_backend import CacheBackend, RedisCacheBackend, SqliteCacheBackend
+from src.cache.cached_response import build_cached_response
+from src.cache.simple_cache import SimpleCache
+
+DEFAULT_BODY_BYTES = [2_000, 50_000, 500_000]
+DEFAULT_REPEATS = 2_000
+
+# Large enough for the biggest bodies above times the number of repeats.
+BENCHMARK_MAX_BYTES = 8 * 1024 * 1024 * 1024
+
+def _build_body(body_bytes: int) -> bytes:
+    '''Renders a page of tea-profile-like JSON of about body_bytes.'''
+
+    tea_profile = {
+        "name": "Benchmark Tea",
+        "tea_type": "oolong",
+        "country_of_origin": "Taiwan",
+        "liquor_aroma": ["floral", "honey", "orchid"],
+        "liquor_taste": ["sweet", "creamy"],
+    }
+    profile_bytes = len(json.dumps(tea_profile))
+    count = max(1, body_bytes // profile_bytes)
+
+    return json.dumps([{**tea_profile, "id": i} for i in range(count)]).encode("utf-8")
+
+def _time_hits(cache: SimpleCache, keys: list[str]) -> list[float]:
+    '''Returns the latency in microseconds of cache.get for each key.'''
+
+    timings = []
+
+    for key in keys:
+        start = time.perf_counter()
+        entry = cache.get(key)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+        if entry is None:
+            raise SystemExit(f"Expected a hit for {key}.")
+
+    return timings
+
+def _time_l1(cached_response: dict, repeats: int) -> list[float]:
+    cache = SimpleCache(max_bytes = BENCHMARK_MAX_BYTES)
+    cache.set("key", cached_response)
+
+    # The same key every time: each lookup is an L1 hit.
+    return _time_hits(cache, ["key"] * repeats)
+
+def _time_l2(backend: CacheBackend, cached_response: dict, repeats: int) -> list[float]:
+    keys = [f"benchmark:{i}" for i in range(repeats)]
+
+    # One "worker" fills L2...
+    writer = SimpleCache(max_bytes = BENCHMARK_MAX_BYTES, backend = backend)
+    for key in keys:
+        writer.set(key, cached_response)
+
+    # ...and another, with nothing in its L1, reads it. Each key is only read once, so
+    # each lookup is an L1 miss and an L2 hit.
+    reader = SimpleCache(max_bytes = BENCHMARK_MAX_BYTES, backend = backend)
+    _time_hits(reader, keys[:1])
+
+    return _time_hits(reader, keys[1:])
+
+def _format(timings: list[float]) -> str:
+    p50 = statistics.median(timings)
+    p95 = statistics.quantiles(timings, n = 20)[-1]
+    return f"{p50:>10.1f}us{p95:>10.1f}us"
+
+def run_benchmark(body_sizes: list[int], repeats: int, redis_url: str | None) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_backend = SqliteCacheBackend(f"sqlite:///{Path(directory) / 'cache.db'}")
+        redis_backend = RedisCacheBackend(redis_url) if redis_url else None
+
+        try:
+            for body_bytes in body_sizes:
+                cached_response = build_cached_response(_build_body(body_bytes))
+                results = {
+                    "l1 (in-process dict)": _time_l1(cached_response, repeats),
+                    "sqlite (shared memory)": _time_l2(sqlite_backend, cached_response, repeats),
+                }
+
+                if redis_backend is not None:
+                    results["redis (network)"] = _time_l2(
+                        redis_backend, cached_response, repeats
+                    )
+
+                print(f"\n{len(cached_response['body']):,} byte body ({repeats} hits)")
+                print(f"{'tier':<26}{'p50':>12}{'p95':>12}")
+
+                for label, timings in results.items():
+                    print(f"{label:<26}{_format(timings)}")
+
+        finally:
+            sqlite_backend.close()
+
+            if redis_backend is not None:
+                redis_backend.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Times cache hits for each cache tier.")
+    parser.add_argument("--body-bytes", type = int, nargs = "+", default = DEFAULT_BODY_BYTES)
+    parser.add_argument("--repeats", type = int, default = DEFAULT_REPEATS)
+    parser.add_argument("--redis-url", default = None)
+    args = parser.parse_args()
+
+    run_benchmark(args.body_bytes, args.repeats, args.redis_url)
@@ -0,0 +1,170 @@
+# Benchmarks the tea profiles export (see src/export/export_stream.py): rows per second
+# and peak memory for each export format (see src/export/export_formats.py), uncompressed
+# and, for the formats the route compresses, gzipped on the fly.
+#
+# By default, each row count gets a scratch SQLite database filled with synthetic rows,
+# created in a temporary directory and deleted afterwards. Pass --database-url (an
+# async URL, ex: postgresql+asyncpg://...) to export an existing database's tea_profiles
+# instead, which exercises PostgreSQL's server-side cursors. Ex:
+#
+#     python -m src.app.benchmark_tea_profile_export
+#     python -m src.app.benchmark_tea_profile_export --rows 10000 1000000 --batch-sizes 100 1000
+#     python -m src.app.benchmark_tea_profile_export --formats csv parquet
+#     python -m src.app.benchmark_tea_profile_export --database-url postgresql+asyncpg://...
+#
+# Memory is measured in a separate run with tracemalloc, which slows everything down,
+# so it doesn't skew the timings. Peak memory should stay about the same as the row
+# count grows, since only one batch is held at a time.
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+
+from src.constants.tea_profiles_constants import EXPORT_BATCH_SIZE
+from src.core.compression import gzip_stream
+from src.db.base import Base
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.export.export_formats import get_export_formats, get_export_writer
+from src.export.export_stream import stream_export
+
+DEFAULT_ROW_COUNTS = [10_000, 100_000]
+DEFAULT_BATCH_SIZES = [EXPORT_BATCH_SIZE]
+
+# Rows inserted per statement while filling the scratch database.
+INSERT_BATCH_SIZE = 10_000
+
+COUNTRIES = ["China", "Japan", "Taiwan", "India", "Sri Lanka", "Kenya"]
+TEA_TYPES = ["green", "white", "yellow", "oolong", "black", "dark"]
+
+def _get_row(i: int) -> dict:
+    '''A synthetic tea profile with realistic amounts of text in it.'''
+
+    return {
+        "name": f"Benchmark Tea {i}",
+        "alternative_names": [f"Tea {i}", f"Benchmark {i}"],
+        "tea_type": TEA_TYPES[i % len(TEA_TYPES)],
+        "cultivars": [f"Cultivar {i % 500}"],
+        "processing": "pan-fired, rolled, and dried",
+        "oxidation_level": "low",
+        "cultural_significance": "A tea made up for benchmarking the export. " * 3,
+        "country_of_origin": COUNTRIES[i % len(COUNTRIES)],
+        "subregions": ["Somewhere"],
+        "liquor_appearance": ["golden", "clear"],
+        "liquor_aroma": ["floral", "honey"],
+        "liquor_taste": ["sweet", "creamy", "malty"],
+    }
+
+def _create_scratch_database(path: Path, row_count: int) -> str:
+    '''Fills a new SQLite database with row_count tea profiles and returns its async URL.'''
+
+    engine = create_engine(f"sqlite:///{path}")
+
+    try:
+        Base.metadata.create_all(engine)
+
+        with Session(engine) as session:
+            for start in range(0, row_count, INSERT_BATCH_SIZE):
+                stop = min(start + INSERT_BATCH_SIZE, row_count)
+                session.execute(insert(TeaProfileModel), [_get_row(i) for i in range(start, stop)])
+
+            session.commit()
+
+    finally:
+        engine.dispose()
+
+    return f"sqlite+aiosqlite:///{path}"
+
+async def _count_rows(engine: AsyncEngine) -> int:
+    async with engine.connect() as connection:
+        result = await connection.execute(select(func.count()).select_from(TeaProfileModel))
+        return result.scalar_one()
+
+async def _export(engine: AsyncEngine, format_name: str, batch_size: int, compress: bool) -> int:
+    '''Runs one export to completion and returns how many bytes it produced.'''
+
+    chunks = stream_export(engine, get_export_writer(format_name), batch_size)
+
+    if compress:
+        chunks = gzip_stream(chunks)
+
+    total_bytes = 0
+    async for chunk in chunks:
+        total_bytes += len(chunk)
+
+    return total_bytes
+
+def _get_runs(format_names: list[str]) -> list[tuple[str, bool]]:
+    '''Each format uncompressed, and gzipped too if the route would gzip it.'''
+
+    return [
+        (format_name, compress)
+        for format_name in format_names
+        for compress in ((False, True) if get_export_writer(format_name).compressible else (False,))
+    ]
+
+async def _benchmark_database(
+    database_url: str, format_names: list[str], batch_sizes: list[int]
+) -> None:
+    engine = create_async_engine(database_url)
+
+    try:
+        row_count = await _count_rows(engine)
+        print(f"\n{row_count:,} rows ({engine.dialect.name})")
+        print(
+            f"{'format':<10}{'batch':>8}{'encoding':>10}{'rows/s':>14}{'MB':>10}{'peak MB':>10}"
+        )
+
+        for batch_size in batch_sizes:
+            for format_name, compress in _get_runs(format_names):
+                start = time.perf_counter()
+                total_bytes = await _export(engine, format_name, batch_size, compress)
+                elapsed = time.perf_counter() - start
+
+                tracemalloc.start()
+                await _export(engine, format_name, batch_size, compress)
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"{format_name:<10}{batch_size:>8}{'gzip' if compress else 'identity':>10}"
+                    f"{row_count / elapsed:>14,.0f}{total_bytes / 1_000_000:>10.1f}"
+                    f"{peak_bytes / 1_000_000:>10.1f}"
+                )
+
+    finally:
+        await engine.dispose()
+
+def run_benchmark(
+    row_counts: list[int],
+    format_names: list[str],
+    batch_sizes: list[int],
+    database_url: str | None,
+) -> None:
+    if database_url is not None:
+        asyncio.run(_benchmark_database(database_url, format_names, batch_sizes))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        for row_count in row_counts:
+            path = Path(directory) / f"export_{row_count}.db"
+            database_url = _create_scratch_database(path, row_count)
+            asyncio.run(_benchmark_database(database_url, format_names, batch_sizes))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Times the tea profiles export.")
+    parser.add_argument("--rows", type = int, nargs = "+", default = DEFAULT_ROW_COUNTS)
+    parser.add_argument(
+        "--formats", nargs = "+", choices = get_export_formats(), default = get_export_formats()
+    )
+    parser.add_argument("--batch-sizes", type = int, nargs = "+", default = DEFAULT_BATCH_SIZES)
+    parser.add_argument("--database-url", default = None)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.formats, args.batch_sizes, args.database_url)
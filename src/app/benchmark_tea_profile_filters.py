@@ -0,0 +1,160 @@
+# Benchmarks the tea profiles list route's substring filters with and without the
+# pg_trgm trigram indexes (see src/db/trigram_indexes.py).
+#
+# For each row count, this fills a scratch copy of tea_profiles with synthetic rows,
+# times TeaProfilesRepository.list for a few filters, adds the trigram indexes, and
+# times the same filters again. Ex:
+#
+#     python -m src.app.benchmark_tea_profile_filters
+#     python -m src.app.benchmark_tea_profile_filters --rows 10000 100000 --repeats 50
+#
+# The scratch table lives in its own schema (tea_profiles_benchmark), which is put in
+# front of public on the search path, so the repository's queries run against it
+# unchanged. The schema is dropped when the benchmark finishes. Requires PostgreSQL
+# with the tea_profiles table already migrated.
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.constants.tea_profiles_constants import TeaProfileModelFields
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.repositories.tea_profiles_repository import TeaProfilesRepository
+from src.db.trigram_indexes import get_trigram_index_ddl
+
+BENCHMARK_SCHEMA = "tea_profiles_benchmark"
+DEFAULT_ROW_COUNTS = [10_000, 1_000_000]
+DEFAULT_REPEATS = 20
+
+# Filters that a client might send. They match progressively fewer rows, which is
+# where a sequential scan hurts the most: it has to read the whole table to fill a
+# page of results.
+BENCHMARK_FILTERS = {
+    "country (1 in 20 rows)": {TeaProfileModelFields.COUNTRY_OF_ORIGIN: "nepal"},
+    "processing (1 in 50 rows)": {TeaProfileModelFields.PROCESSING: "smoked"},
+    "name (a handful of rows)": {TeaProfileModelFields.NAME: "a1b2c"},
+}
+
+# Every generated row gets valid values for the required columns. Countries and
+# processing methods cycle so that each filter above matches a known share of rows,
+# and the md5 in the name gives us rare substrings to search for.
+INSERT_ROWS_SQL = """
+    INSERT INTO tea_profiles (
+        id, name, tea_type, cultivars, processing, oxidation_level, country_of_origin,
+        liquor_appearance, liquor_aroma, liquor_taste
+    )
+    SELECT
+        g,
+        'Benchmark Tea ' || g || ' ' || md5(g::text),
+        (ARRAY['green', 'white', 'yellow', 'oolong', 'black', 'dark'])[1 + g % 6],
+        ARRAY['Cultivar ' || (g % 500)],
+        CASE WHEN g % 50 = 0 THEN 'smoked' ELSE 'pan-fired' END,
+        (ARRAY['low', 'medium', 'high'])[1 + g % 3],
+        CASE WHEN g % 20 = 0 THEN 'Nepal' ELSE
+            (ARRAY['China', 'Japan', 'Taiwan', 'India', 'Sri Lanka', 'Kenya'])[1 + g % 6]
+        END,
+        ARRAY['golden'],
+        ARRAY['floral'],
+        ARRAY['sweet']
+    FROM generate_series(1, :row_count) AS g
+"""
+
+def _create_benchmark_table(connection: Connection, row_count: int) -> None:
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {BENCHMARK_SCHEMA}"))
+
+    # LIKE copies the columns but none of the indexes, so we start from a table with
+    # no trigram indexes.
+    connection.execute(text(
+        f"CREATE TABLE {BENCHMARK_SCHEMA}.tea_profiles "
+        f"(LIKE public.tea_profiles INCLUDING DEFAULTS)"
+    ))
+    connection.execute(text(
+        f"ALTER TABLE {BENCHMARK_SCHEMA}.tea_profiles ADD PRIMARY KEY (id)"
+    ))
+
+    # Unqualified table names now resolve to the scratch table first.
+    connection.execute(text(f"SET search_path TO {BENCHMARK_SCHEMA}, public"))
+
+    connection.execute(text(INSERT_ROWS_SQL), {"row_count": row_count})
+    connection.execute(text("ANALYZE tea_profiles"))
+    connection.commit()
+
+def _add_trigram_indexes(connection: Connection) -> None:
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    for statement in get_trigram_index_ddl(TeaProfileModel.__table__): # type: ignore
+        connection.execute(text(statement))
+
+    connection.execute(text("ANALYZE tea_profiles"))
+    connection.commit()
+
+def _time_filters(connection: Connection, repeats: int) -> dict[str, float]:
+    '''Returns the median latency in milliseconds of each filter in BENCHMARK_FILTERS.'''
+
+    latencies = {}
+
+    with Session(bind = connection) as session:
+        repo = TeaProfilesRepository(session)
+
+        for label, filters in BENCHMARK_FILTERS.items():
+            # Warm up the buffer cache so that we compare plans, not disk reads.
+            repo.list(filters)
+
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                repo.list(filters)
+                timings.append((time.perf_counter() - start) * 1000)
+
+                # Don't let the identity map skip work on later repeats.
+                session.expunge_all()
+
+            latencies[label] = statistics.median(timings)
+
+    return latencies
+
+def run_benchmark(row_counts: list[int], repeats: int) -> None:
+    engine = create_engine(settings.database_url)
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The trigram index benchmark requires PostgreSQL.")
+
+    try:
+        with engine.connect() as connection:
+            for row_count in row_counts:
+                _create_benchmark_table(connection, row_count)
+                before = _time_filters(connection, repeats)
+
+                _add_trigram_indexes(connection)
+                after = _time_filters(connection, repeats)
+
+                print(f"\n{row_count:,} rows (median of {repeats} runs)")
+                print(f"{'filter':<28}{'no index':>12}{'trigram':>12}{'speedup':>10}")
+
+                for label in BENCHMARK_FILTERS:
+                    print(
+                        f"{label:<28}{before[label]:>10.2f}ms{after[label]:>10.2f}ms"
+                        f"{before[label] / after[label]:>9.1f}x"
+                    )
+
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE"))
+            connection.commit()
+
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description = "Times tea profile filters with and without trigram indexes."
+    )
+    parser.add_argument("--rows", type = int, nargs = "+", default = DEFAULT_ROW_COUNTS)
+    parser.add_argument("--repeats", type = int, default = DEFAULT_REPEATS)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.repeats)
@@ -0,0 +1,55 @@
+# Exports every tea profile to a file, in any format the export route offers (see
+# src/export/export_formats.py), without going through the API. Ex:
+#
+#     python -m src.app.export_tea_profiles --format csv
+#     python -m src.app.export_tea_profiles --format parquet --output exports/teas.parquet
+#
+# Rows are read from the database and written to the file a batch at a time (see
+# iter_export), so memory stays flat however large the catalog gets. --output defaults
+# to tea_profiles.<extension> in the current directory.
+
+import argparse
+import logging
+from typing import BinaryIO
+
+from src.constants.tea_profiles_constants import EXPORT_BATCH_SIZE
+from src.export.export_formats import DEFAULT_EXPORT_FORMAT, get_export_formats, get_export_writer
+from src.export.export_stream import ExportWriter, iter_export
+from src.utils.session_utils import get_session_cm
+
+# use __name__ to get a logger named after the module we're in.
+logger = logging.getLogger(__name__)
+
+def export_tea_profiles(writer: ExportWriter, output: BinaryIO, batch_size: int) -> int:
+    '''Writes the export to output, and returns how many bytes were written.'''
+
+    written = 0
+
+    with get_session_cm() as session:
+        for chunk in iter_export(session, writer, batch_size):
+            output.write(chunk)
+            written += len(chunk)
+
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Exports every tea profile to a file.")
+    parser.add_argument(
+        "--format", choices = get_export_formats(), default = DEFAULT_EXPORT_FORMAT
+    )
+    parser.add_argument("--output", default = None)
+    parser.add_argument("--batch-size", type = int, default = EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    writer = get_export_writer(args.format)
+    output_path = args.output or f"tea_profiles.{writer.file_extension}"
+
+    try:
+        with open(output_path, "wb") as output:
+            written = export_tea_profiles(writer, output, args.batch_size)
+
+        logger.info(f"Exported {written:,} bytes of tea profiles to {output_path}.")
+
+    except Exception:
+        logger.exception("Export failed.")
+        raise
@@ -1,3 +1,4 @@
+import asyncio
 import os 
 # Use FastAPI framework to get decorators like @app.get, routing, validation,
 # and docs.
@@ -10,10 +11,19 @@ from src.core.logging import configure_logging
 from src.core.sentry import init_sentry
 from src.core.cors import configure_cors
 from src.core.compression import configure_gzip
+from src.core.request_metrics import configure_request_metrics
+from src.core.metrics import metrics_aggregator
 from src.core.rate_limit.handlers_rate_limit import register_rate_limit_handlers
 from src.core.rate_limit.config_rate_limit import HIGH_RATE_LIMIT
 from src.core.rate_limit.setup_rate_limit import rate_limiter
 from src.db.base import Base
+from src.core.config import settings
+from src.cache.simple_cache import cache
+from src.cache.cache_executor import cache_executor
+from src.cache.dataset_generation import dataset_generations
+from src.catalog.catalog_engine import catalog
+from src.db.db_executor import db_executor
+from src.ingest.ingest_events import register_ingest_listener
 from src.api.routers.debug_router import router as debug_router
 from src.api.routers.tea_profiles_router import router as tea_profiles_router
 from src.api.routers.health_router import router as health_router
@@ -47,9 +57,44 @@ async def lifespan(app: FastAPI):
     if not IS_TEST: 
         from src.db.engine import engine
         from src.db.models.tea_profiles_model import TeaProfileModel  # noqa: F401
+        from src.db.models.dataset_generations_model import DatasetGenerationModel  # noqa: F401
 
         Base.metadata.create_all(bind = engine)
 
+        # Optimization: Load the in-memory catalog so that list queries don't need the
+        # database, and rebuild it whenever tea_profiles moves to a new dataset
+        # generation, wherever the ingestion ran.
+        if settings.catalog_enabled:
+            from src.utils.session_utils import get_session_cm
+
+            # Catch up on the current generations first, so that learning about them
+            # below doesn't look like new data and rebuild the catalog straight away.
+            dataset_generations.configure(get_session_cm)
+            await db_executor.run(dataset_generations.reload)
+
+            catalog.configure(get_session_cm)
+            await db_executor.run(catalog.reload)
+            dataset_generations.add_listener(catalog.on_dataset_generation)
+
+    # Optimization: Keep track of the dataset generations that cache keys and ETags are
+    # built from (see src/cache/dataset_generation.py), so that cached responses are
+    # dropped as soon as new data is ingested, here or by another process or machine
+    # (LISTEN/NOTIFY on Postgres, polling on SQLite).
+    from src.utils.session_utils import get_session_cm
+    from src.db.engine import async_engine
+
+    dataset_generations.configure(get_session_cm)
+    register_ingest_listener(dataset_generations.on_ingest_complete)
+    generation_watcher = asyncio.create_task(dataset_generations.watch(async_engine.url))
+
+    # Optimization: Remove expired cache entries in the background, so that keys
+    # nobody asks for again don't hold on to memory until they're evicted.
+    cache_sweeper = asyncio.create_task(cache.sweep_periodically())
+
+    # Optimization: Send the cache and request metrics to Sentry in periodic batches
+    # (see src/core/metrics.py) rather than one event per lookup or request.
+    metrics_flusher = asyncio.create_task(metrics_aggregator.flush_periodically())
+
     # Tell FastAPI that startup is Continues startup
     yield
 
@@ -57,6 +102,27 @@ async def lifespan(app: FastAPI):
 
     # This code runs on shutdown, if needed:
 
+    cache_sweeper.cancel()
+    generation_watcher.cancel()
+
+    # Let the watcher close its LISTEN connection before the event loop goes away.
+    await asyncio.gather(generation_watcher, return_exceptions = True)
+
+    metrics_flusher.cancel()
+    metrics_aggregator.flush()
+
+    # Let queued writes to the shared cache finish, then close the connection to it, if
+    # any (see src/cache/cache_backend.py).
+    cache_executor.shutdown()
+
+    if cache.backend is not None:
+        cache.backend.close()
+
+    # Close the async engine's pooled connections (see src/db/engine.py).
+    if not IS_TEST:
+        await async_engine.dispose()
+        db_executor.shutdown()
+
 # Create instance of FastAPI. All routes, middleware, and configurations will
 # flow through this.
 app = FastAPI(lifespan = lifespan, redirect_slashes = False)
@@ -73,6 +139,12 @@ configure_cors(app)
 
 configure_gzip(app)
 
+###############################################################################
+###########################   Request Metrics   ###############################
+###############################################################################
+
+configure_request_metrics(app)
+
 ###############################################################################
 #################################   Exceptions   ##############################
 ###############################################################################
@@ -0,0 +1,564 @@
+# Shared cache backends that sit behind SimpleCache (see src/cache/simple_cache.py).
+#
+# Optimization: Each uvicorn worker (and each Fly machine) has its own SimpleCache, so
+# with N workers a popular key is missed and queried N times, and the hit rate drops
+# with every worker we add. With CACHE_URL set, SimpleCache becomes a two-level cache:
+#
+#     L1: the worker's own SimpleCache (no I/O, checked first)
+#     L2: a cache every worker shares, one or more of
+#         - sqlite:///path/to/cache.db: a SQLite file in WAL mode that every worker
+#           process on the same machine reads through shared memory (no network hop),
+#           and that outlives worker restarts
+#         - redis://host:port/db: a Redis-protocol server (Redis, Valkey, KeyDB,
+#           Dragonfly, etc.) shared by every machine
+#
+#     cache.get --> L1 hit --> return
+#               --> L1 miss --> L2 hit --> copy into L1 --> return
+#                           --> L2 miss --> miss (the route queries and calls cache.set)
+#     cache.set --> L1 and L2
+#
+# CACHE_URL can list several backends, separated by commas, to stack them (see
+# TieredCacheBackend). Ex: sqlite:////dev/shm/tea_cache.db,redis://cache:6379/0 checks
+# the machine's SQLite file first, and only goes over the network to Redis when it
+# misses.
+#
+# Every backend call is blocking I/O, so the async routes make them on the cache executor
+# (see SimpleCache.get_async and set_async and src/cache/cache_executor.py), never on the
+# event loop, and never queued behind database work on the DB executor.
+#
+# Entries are written to L2 in a compact binary format (see src/cache/serialization.py)
+# with the same expiry as in L1, so every worker agrees on when an entry goes stale.
+#
+# L2 is optional. If it's down or slow, calls fail fast (see CACHE_BACKEND_TIMEOUT_SECONDS),
+# the backend stops trying for CACHE_BACKEND_RETRY_SECONDS, and the cache carries on with
+# L1 only. A command the server rejects (ex: out of memory) only fails that command.
+#
+# RedisCacheBackend speaks the Redis protocol (RESP) directly over a socket. It only needs
+# GET, SET, and PING, so this avoids adding a client library.
+
+import logging
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from src.cache.serialization import SerializationError, get_entry_expires_at
+from src.core.metrics import metrics_aggregator
+
+logger = logging.getLogger(__name__)
+
+# Every key is namespaced, so the app can share a server with other things.
+KEY_PREFIX = "tea_tapestry:"
+
+# How long a connect, read, or write to L2 may take before we give up on it.
+CACHE_BACKEND_TIMEOUT_SECONDS = 0.25
+
+# How long to skip L2 after it fails before trying it again.
+CACHE_BACKEND_RETRY_SECONDS = 30
+
+DEFAULT_REDIS_PORT = 6379
+
+# How much of the SQLite file each connection memory-maps. Reads of mapped pages are
+# plain memory reads rather than read() calls, and every process maps the same pages.
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+class CacheBackendError(Exception):
+    """Raised when a shared cache backend can't be reached or replies with an error."""
+
+class CacheBackendReplyError(CacheBackendError):
+    """Raised when a backend that's up rejects a command (ex: Redis's -OOM replies)."""
+
+class CacheBackend(ABC):
+    '''
+        A cache shared between workers. Stores serialized entries as bytes. Methods
+        never raise: a backend that can't be reached behaves like an empty one.
+    '''
+
+    name = "unknown"
+
+    def __init__(self, retry_seconds: float = CACHE_BACKEND_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+
+        # time.monotonic() before which the backend is considered down.
+        self._retry_at = 0.0
+
+        # Observability
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _record_error(self) -> None:
+        self.errors += 1
+        metrics_aggregator.count("cache.l2.error", attributes = {"backend": self.name})
+
+    def _mark_unavailable(self, exc: Exception) -> None:
+        self._retry_at = time.monotonic() + self.retry_seconds
+        self._record_error()
+
+        logger.warning(
+            f"Cache backend {self.describe()} failed ({exc}). Using the local cache only "
+            f"for {self.retry_seconds} seconds."
+        )
+
+    def _record_lookup(self, data: bytes | None) -> bytes | None:
+        if data is None:
+            self.misses += 1
+            metrics_aggregator.count("cache.l2.miss", attributes = {"backend": self.name})
+        else:
+            self.hits += 1
+            metrics_aggregator.count("cache.l2.hit", attributes = {"backend": self.name})
+
+        return data
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        '''Returns the data stored for key, or None if there isn't any (or L2 is down).'''
+
+    @abstractmethod
+    def set(self, key: str, data: bytes, ttl_seconds: float) -> None:
+        '''Stores data for key, expiring it after ttl_seconds.'''
+
+    def sweep(self) -> int:
+        '''Removes expired entries, if the backend doesn't do so itself. Returns how many.'''
+        return 0
+
+    @abstractmethod
+    def describe(self) -> str:
+        '''Where the backend is, for logs and stats (ex: cache.internal:6379/0).'''
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": self.name,
+            "address": self.describe(),
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        pass
+
+class RedisCacheBackend(CacheBackend):
+
+    name = "redis"
+
+    # url is redis://[[username]:password@]host[:port][/db], or rediss:// for TLS.
+    def __init__(self, url: str, timeout_seconds: float = CACHE_BACKEND_TIMEOUT_SECONDS,
+        retry_seconds: float = CACHE_BACKEND_RETRY_SECONDS, key_prefix: str = KEY_PREFIX):
+
+        super().__init__(retry_seconds)
+        parsed = urlsplit(url)
+
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme {parsed.scheme}.")
+
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or DEFAULT_REDIS_PORT
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.use_tls = parsed.scheme == "rediss"
+
+        self.timeout_seconds = timeout_seconds
+        self.key_prefix = key_prefix
+
+        # One connection, used by one thread at a time. Commands are a single round
+        # trip each, so callers barely wait on each other.
+        self._socket: socket.socket | None = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout = self.timeout_seconds)
+
+        if self.use_tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname = self.host)
+
+        self._socket = sock
+        self._reader = sock.makefile("rb")
+
+        try:
+            if self.password is not None:
+                if self.username is not None:
+                    self._command("AUTH", self.username, self.password)
+                else:
+                    self._command("AUTH", self.password)
+
+            if self.db:
+                self._command("SELECT", self.db)
+
+        # Ex: a wrong password. Unlike a rejected GET or SET, that makes the connection
+        # unusable, so treat it like failing to connect.
+        except CacheBackendReplyError as exc:
+            raise CacheBackendError(f"Failed to set up the connection: {exc}") from exc
+
+    def _disconnect(self) -> None:
+        if self._socket is not None:
+            try:
+                self._reader.close()
+                self._socket.close()
+            except OSError:
+                pass
+
+        self._socket = None
+        self._reader = None
+
+    def _command(self, *args: str | bytes | int) -> Any:
+        '''Sends one command as a RESP array of bulk strings and reads its reply.'''
+
+        parts = [b"*%d\r\n" % len(args)]
+
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+
+            parts.append(b"$%d\r\n" % len(arg))
+            parts.append(arg)
+            parts.append(b"\r\n")
+
+        self._socket.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+
+        if not line.endswith(b"\r\n"):
+            raise CacheBackendError("Connection closed.")
+
+        kind, rest = line[:1], line[1:-2]
+
+        # Simple string, ex: +OK
+        if kind == b"+":
+            return rest.decode("utf-8")
+
+        # Error, ex: -ERR unknown command
+        if kind == b"-":
+            raise CacheBackendReplyError(rest.decode("utf-8", "replace"))
+
+        # Integer, ex: :1
+        if kind == b":":
+            return int(rest)
+
+        # Bulk string, ex: $5\r\nhello\r\n, or $-1 for nil
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise CacheBackendError("Connection closed.")
+
+            return data[:-2]
+
+        # Array, ex: *2\r\n..., or *-1 for nil
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+
+            return [self._read_reply() for _ in range(length)]
+
+        raise CacheBackendError(f"Unexpected reply {line!r}.")
+
+    def _execute(self, *args: str | bytes | int) -> Any:
+        '''
+            Runs a command, connecting first if needed. Raises CacheBackendError if the
+            server is down, marking it down for retry_seconds if it wasn't already, or
+            CacheBackendReplyError if the server rejected the command.
+        '''
+
+        if not self.available:
+            raise CacheBackendError("Cache backend is unavailable.")
+
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._connect()
+
+                return self._command(*args)
+
+            # The server answered, so it's up and the connection is still in step with
+            # it: only this command failed (ex: -OOM, or a key holding another type).
+            # Don't stop using L2 for it.
+            except CacheBackendReplyError as exc:
+                self._record_error()
+                logger.warning(f"Cache backend {self.describe()} rejected {args[0]}: {exc}")
+                raise
+
+            # Connection and timeout errors (socket.timeout is an OSError), or a reply we
+            # couldn't parse.
+            except (OSError, ValueError, CacheBackendError) as exc:
+                # The connection may be half way through a reply, so start over with a
+                # new one after the retry period.
+                self._disconnect()
+                self._mark_unavailable(exc)
+                raise CacheBackendError(str(exc)) from exc
+
+    def ping(self) -> bool:
+        try:
+            return self._execute("PING") == "PONG"
+        except CacheBackendError:
+            return False
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self._record_lookup(self._execute("GET", self.key_prefix + key))
+        except CacheBackendError:
+            return None
+
+    def set(self, key: str, data: bytes, ttl_seconds: float) -> None:
+        # PX takes whole milliseconds and must be positive.
+        ttl_milliseconds = max(1, int(ttl_seconds * 1000))
+
+        try:
+            self._execute("SET", self.key_prefix + key, data, "PX", ttl_milliseconds)
+        except CacheBackendError:
+            pass
+
+    def describe(self) -> str:
+        return f"{self.host}:{self.port}/{self.db}"
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+# Optimization: A cache shared by every worker process on one machine, with no server
+# and no network hop. Entries live in a SQLite file in WAL mode:
+#
+#   - Readers never block the writer or each other, so every worker can look entries
+#     up while another one fills them.
+#   - The file is memory-mapped (see SQLITE_MMAP_BYTES), so once its pages are in the
+#     OS page cache, a hit is a B-tree lookup in shared memory.
+#   - Bodies are stored pre-serialized (see src/cache/serialization.py), so one
+#     worker's database fetch warms every other worker.
+#   - Its reads, writes, and sweeps run on the cache executor (see
+#     src/cache/cache_executor.py), so they never queue behind database queries.
+#
+# The file is only a cache: deleting it (ex: on deploy) just empties it. Put it on a
+# local disk (or /dev/shm), not a network volume.
+class SqliteCacheBackend(CacheBackend):
+
+    name = "sqlite"
+
+    # url is sqlite:///relative/path.db or sqlite:////absolute/path.db, as in DATABASE_URL.
+    def __init__(self, url: str, timeout_seconds: float = CACHE_BACKEND_TIMEOUT_SECONDS,
+        retry_seconds: float = CACHE_BACKEND_RETRY_SECONDS):
+
+        super().__init__(retry_seconds)
+        parsed = urlsplit(url)
+
+        if parsed.scheme != "sqlite" or not parsed.path.lstrip("/"):
+            raise ValueError(f"Unsupported cache URL {url}.")
+
+        # Strip the / that separates the (empty) host from the path.
+        self.path = parsed.path[1:]
+        self.timeout_seconds = timeout_seconds
+
+        # sqlite3 connections belong to the thread that opened them, so each thread
+        # gets its own (one per cache executor thread, in practice). They're all kept so
+        # close can close them.
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            # isolation_level = None: every statement commits on its own.
+            connection = sqlite3.connect(
+                self.path, timeout = self.timeout_seconds, isolation_level = None,
+                check_same_thread = False
+            )
+
+            try:
+                connection.execute("PRAGMA journal_mode = WAL")
+
+                # WAL is still crash-safe for the database with this. We could lose the
+                # last few writes on power loss, which for a cache is fine.
+                connection.execute("PRAGMA synchronous = NORMAL")
+                connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    "key TEXT PRIMARY KEY, data BLOB NOT NULL, expires_at REAL NOT NULL"
+                    ") WITHOUT ROWID"
+                )
+
+            except sqlite3.Error:
+                connection.close()
+                raise
+
+            self._local.connection = connection
+
+            with self._connections_lock:
+                self._connections.append(connection)
+
+        return connection
+
+    def _execute(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        if not self.available:
+            raise CacheBackendError("Cache backend is unavailable.")
+
+        try:
+            return self._get_connection().execute(sql, params)
+
+        # Ex: the file can't be created, or another process held the write lock for
+        # longer than timeout_seconds.
+        except sqlite3.Error as exc:
+            self._mark_unavailable(exc)
+            raise CacheBackendError(str(exc)) from exc
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            row = self._execute(
+                "SELECT data FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+
+        except CacheBackendError:
+            return None
+
+        return self._record_lookup(row[0] if row is not None else None)
+
+    def set(self, key: str, data: bytes, ttl_seconds: float) -> None:
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO cache_entries (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, data, time.time() + ttl_seconds)
+            )
+
+        except CacheBackendError:
+            pass
+
+    def sweep(self) -> int:
+        try:
+            return self._execute(
+                "DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+        except CacheBackendError:
+            return 0
+
+    def describe(self) -> str:
+        return self.path
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+
+            self._connections.clear()
+
+        # Threads that used a closed connection open a new one next time.
+        self._local = threading.local()
+
+# Optimization: Stacked L2 tiers, checked in order, ex: a SQLite file on the machine in
+# front of Redis:
+#
+#     cache.get --> L1 miss --> SQLite hit --> return
+#                           --> SQLite miss --> Redis hit --> copy into SQLite --> return
+#     cache.set --> L1, SQLite, and Redis
+#
+# Entries one worker on a machine pulls from Redis are then answered from shared memory
+# for every other worker on that machine, and survive worker restarts, while Redis still
+# shares them between machines. A tier that's down is skipped without affecting the
+# others.
+class TieredCacheBackend(CacheBackend):
+
+    name = "tiered"
+
+    def __init__(self, tiers: list[CacheBackend]):
+        super().__init__()
+
+        if not tiers:
+            raise ValueError("TieredCacheBackend needs at least one tier.")
+
+        self.tiers = tiers
+
+    @property
+    def available(self) -> bool:
+        return any(tier.available for tier in self.tiers)
+
+    def get(self, key: str) -> bytes | None:
+        for index, tier in enumerate(self.tiers):
+            data = tier.get(key)
+
+            if data is not None:
+                self.hits += 1
+                self._backfill(key, data, self.tiers[:index])
+                return data
+
+        self.misses += 1
+        return None
+
+    def _backfill(self, key: str, data: bytes, tiers: list[CacheBackend]) -> None:
+        '''Copies an entry found in a lower tier into the tiers above it.'''
+
+        if not tiers:
+            return
+
+        # Keep the expiry it was given when it was set, so every tier agrees on it.
+        try:
+            ttl_seconds = get_entry_expires_at(data) - time.time()
+
+        # Ex: written by a worker running another version of the format. SimpleCache
+        # won't use it either.
+        except SerializationError:
+            return
+
+        if ttl_seconds > 0:
+            for tier in tiers:
+                tier.set(key, data, ttl_seconds)
+
+    def set(self, key: str, data: bytes, ttl_seconds: float) -> None:
+        for tier in self.tiers:
+            tier.set(key, data, ttl_seconds)
+
+    def sweep(self) -> int:
+        return sum(tier.sweep() for tier in self.tiers)
+
+    def describe(self) -> str:
+        return " -> ".join(tier.describe() for tier in self.tiers)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **super().stats(),
+            "errors": sum(tier.errors for tier in self.tiers),
+            "tiers": [tier.stats() for tier in self.tiers],
+        }
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
+
+def _get_single_cache_backend(cache_url: str) -> CacheBackend:
+    if urlsplit(cache_url).scheme == "sqlite":
+        return SqliteCacheBackend(cache_url)
+
+    return RedisCacheBackend(cache_url)
+
+def get_cache_backend(cache_url: str | None) -> CacheBackend | None:
+    '''
+        Returns the shared backend for CACHE_URL, or None (L1 only) if it isn't set.
+        Several comma-separated URLs are stacked in order (see TieredCacheBackend).
+    '''
+
+    if not cache_url:
+        return None
+
+    urls = [url.strip() for url in cache_url.split(",") if url.strip()]
+
+    if len(urls) == 1:
+        return _get_single_cache_backend(urls[0])
+
+    return TieredCacheBackend([_get_single_cache_backend(url) for url in urls])
@@ -0,0 +1,14 @@
+# Optimization: A small thread pool of its own for calls to the shared cache (L2, see
+# src/cache/cache_backend.py), which are blocking I/O. They're quick, and they're what
+# keeps requests off the database, so they shouldn't queue behind slow queries on the
+# DB executor (or crowd out the queries, and muddy its queue depth and wait times).
+#
+# Same executor as the database's (see src/db/db_executor.py), so stats() reports how
+# cache calls queue too.
+
+from src.core.config import settings
+from src.db.db_executor import DBExecutor
+
+cache_executor = DBExecutor(
+    max_workers = settings.cache_executor_workers, thread_name_prefix = "cache-executor"
+)
@@ -0,0 +1,30 @@
+# Optimization: Fixed-size cache keys. Keys used to embed the whole request, ex:
+#
+#     tea_profiles:list:[('country_of_origin', 'China'), ...]:100:0:None:None:g3
+#
+# so long filter strings made long keys (hashed on every lookup, and stored, sent to
+# L2, and written to disk with every entry). Now the request's parameters are hashed
+# into 32 hex characters:
+#
+#     tea_profiles:list:5f0c4e1b9a0d2c7e8f1a3b4c5d6e7f80:g3
+#
+# The namespace up front and the dataset generation at the end stay readable, so keys
+# can still be told apart (ex: in /debug/cache) and dropped by generation (see
+# src/cache/dataset_generation.py).
+#
+# Callers should pass canonical parameters (see canonicalize_filters), so that requests
+# for the same results hash to the same key.
+
+import hashlib
+import json
+from typing import Any, Mapping
+
+# 16 bytes: collisions are astronomically unlikely at any number of keys we'll ever hold.
+KEY_DIGEST_BYTES = 16
+
+def get_cache_key(namespace: str, parameters: Mapping[str, Any], generation: int) -> str:
+    # sort_keys and compact separators so the same parameters always give the same bytes.
+    serialized = json.dumps(parameters, sort_keys = True, separators = (",", ":"))
+    digest = hashlib.blake2b(serialized.encode("utf-8"), digest_size = KEY_DIGEST_BYTES)
+
+    return f"{namespace}:{digest.hexdigest()}:g{generation}"
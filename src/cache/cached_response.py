@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from typing import TypedDict, Optional
+
+from src.utils.etag import generate_etag_from_bytes
+from src.utils.date_utils import http_date
+from src.core.compression import compress_variants
+
+# Optimization: Instead of caching ORM objects (which FastAPI would have to validate 
+# through the response model and serialize to JSON on every cache hit, and which we 
+# would have to JSON dump again to compute an ETag), cache the final response. The 
+# body is rendered to JSON bytes once, when the cache entry is filled, and the ETag 
+# and Last-Modified are computed from it at the same time. A cache hit then just hands
+# the bytes back with no Pydantic or json work at all.
+#
+# Optimization: For the same reason, the body is also compressed with every encoding we
+# support when the entry is filled. variants maps an encoding (ex: "gzip", "br", "zstd") 
+# to the compressed body, so a hit picks one based on Accept-Encoding instead of 
+# recompressing the same bytes on every request.
+class CachedResponse(TypedDict):
+    body: bytes
+    variants: dict[str, bytes]
+    etag: str
+    last_modified: datetime
+
+    # Every header to send with the body (ETag, Last-Modified, Cache-Control, etc.),
+    # so hits don't need to format anything.
+    headers: dict[str, str]
+
+def build_cached_response(
+    body: bytes, 
+    headers: Optional[dict[str, str]] = None,
+    generation: Optional[int] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> CachedResponse:
+    '''
+        Builds a cache entry for a rendered JSON body plus any extra headers. If the body
+        was built from a dataset generation (see src/cache/dataset_generation.py), the
+        ETag starts with it, ex: 5-5d41402abc4b2a76b9719d911017c592.
+
+        Pass etag and last_modified when they're known from the rows the body was built
+        from (see src/db/row_versions.py). Otherwise, the ETag is a hash of the body and
+        Last-Modified is now.
+    '''
+    
+    if etag is None:
+        etag = generate_etag_from_bytes(body)
+
+    if generation is not None:
+        etag = f"{generation}-{etag}"
+
+    if last_modified is None:
+        last_modified = datetime.now(timezone.utc)
+    variants = compress_variants(body)
+
+    cached_headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        **(headers or {}),
+    }
+
+    # If there are compressed variants, the bytes we send depend on the request's
+    # Accept-Encoding, so tell browsers and CDNs to cache each encoding separately.
+    if variants:
+        cached_headers["Vary"] = "Accept-Encoding"
+
+    return {
+        "body": body,
+        "variants": variants,
+        "etag": etag,
+        "last_modified": last_modified,
+        "headers": cached_headers,
+    }
@@ -0,0 +1,194 @@
+# Optimization: Generation-based cache invalidation. Every ingestion that changes a table
+# bumps its dataset generation (see src/db/dataset_generations.py), and cache keys and
+# ETags built from that table include the generation they were built from:
+#
+#     before an ingestion:  tea_profile:1:g4   ETag 4-5d41402abc4b2a76...
+#     after an ingestion:   tea_profile:1:g5   ETag 5-5d41402abc4b2a76...
+#
+# So once a worker learns about the new generation, every lookup misses the entries built
+# from the old data, and every ETag a client holds stops matching. Cached responses
+# therefore don't need a short TTL to pick up new data, and can be kept for hours while
+# the data doesn't change. Listeners (see add_listener) can also drop the old entries
+# right away, rather than leaving them to LRU eviction and the sweeper.
+#
+# Each worker keeps the generations in memory, so reading one costs a dict lookup. It
+# learns about new generations:
+#
+#   - when an ingestion finishes in this process (see on_ingest_complete)
+#   - on Postgres, the moment an ingestion anywhere commits: the ingestion NOTIFYs a
+#     channel, and every app instance LISTENs on it (see listen)
+#   - on SQLite, which has no notifications, by polling every
+#     DATASET_GENERATION_POLL_SECONDS (see poll_periodically)
+
+import asyncio
+import logging
+import threading
+from typing import Callable, ContextManager
+
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from src.db.dataset_generations import (
+    DATASET_GENERATION_CHANNEL, get_dataset_generations, parse_notify_payload
+)
+from src.db.db_executor import db_executor
+
+# use __name__ to get a logger named after the module we're in.
+logger = logging.getLogger(__name__)
+
+DATASET_GENERATION_POLL_SECONDS = 5
+
+# How long to wait before reconnecting a LISTEN connection that dropped.
+LISTEN_RETRY_SECONDS = 5
+
+# Called with a table name and its new generation.
+GenerationListener = Callable[[str, int], None]
+
+class DatasetGenerationTracker:
+    '''Holds the current generation of each table and reloads them from the database.'''
+
+    def __init__(self):
+        self._generations: dict[str, int] = {}
+        self._session_factory: Callable[[], ContextManager[Session]] | None = None
+        self._listeners: list[GenerationListener] = []
+        self._lock = threading.Lock()
+
+    def configure(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        '''Sets how reload gets a database session, ex: get_session_cm.'''
+        self._session_factory = session_factory
+
+    def add_listener(self, listener: GenerationListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def current(self, table_name: str) -> int:
+        return self._generations.get(table_name, 0)
+
+    def advance(self, table_name: str, generation: int) -> None:
+        '''Moves table_name to generation, unless it's already there or past it.'''
+
+        with self._lock:
+            if generation <= self.current(table_name):
+                return
+
+            # Copy on write, so readers never see a dict being changed.
+            self._generations = {**self._generations, table_name: generation}
+
+        logger.info(f"{table_name} is now at dataset generation {generation}.")
+
+        for listener in list(self._listeners):
+            # The generation has already moved, so a failing listener only means some
+            # old entries stick around until they're evicted. Log it and carry on.
+            try:
+                listener(table_name, generation)
+
+            except Exception:
+                logger.exception(f"Dataset generation listener failed for {table_name}.")
+
+    def load(self, session: Session) -> None:
+        for table_name, generation in get_dataset_generations(session).items():
+            self.advance(table_name, generation)
+
+    def reload(self) -> None:
+        if self._session_factory is None:
+            raise RuntimeError("DatasetGenerationTracker.configure must be called before reload.")
+
+        with self._session_factory() as session:
+            self.load(session)
+
+    def on_ingest_complete(self, table_name: str) -> None:
+        '''Ingest listener (see src/ingest/ingest_events.py).'''
+
+        if self._session_factory is not None:
+            self.reload()
+
+    def on_notification(self, payload: str) -> None:
+        '''Handles a payload NOTIFYed by bump_dataset_generation.'''
+
+        try:
+            table_name, generation = parse_notify_payload(payload)
+
+        except ValueError:
+            logger.warning(f"Ignoring dataset generation notification {payload!r}.")
+            return
+
+        self.advance(table_name, generation)
+
+    async def poll_periodically(self, interval_seconds: float = DATASET_GENERATION_POLL_SECONDS):
+        '''
+            Runs reload right away, then every interval_seconds until cancelled (see the
+            app's lifespan).
+        '''
+
+        while True:
+            try:
+                await db_executor.run(self.reload)
+
+            # Keep the current generations and try again next time.
+            except Exception:
+                logger.exception("Failed to reload dataset generations.")
+
+            await asyncio.sleep(interval_seconds)
+
+    async def listen(self, database_url: URL, retry_seconds: float = LISTEN_RETRY_SECONDS):
+        '''
+            LISTENs for new generations on Postgres until cancelled (see the app's
+            lifespan), reconnecting whenever the connection drops.
+        '''
+
+        # A connection of its own, outside of the pool, since it's held for as long as the
+        # app runs.
+        engine = create_async_engine(database_url, poolclass = NullPool)
+
+        try:
+            while True:
+                try:
+                    await self._listen_until_disconnected(engine)
+
+                except Exception:
+                    logger.exception("Lost the dataset generation LISTEN connection.")
+
+                await asyncio.sleep(retry_seconds)
+
+        finally:
+            await engine.dispose()
+
+    async def _listen_until_disconnected(self, engine) -> None:
+        async with engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+
+            # The asyncpg connection underneath SQLAlchemy's.
+            driver_connection = raw_connection.driver_connection
+
+            disconnected = asyncio.Event()
+            driver_connection.add_termination_listener(lambda _: disconnected.set())
+
+            await driver_connection.add_listener(
+                DATASET_GENERATION_CHANNEL,
+                lambda _connection, _pid, _channel, payload: self.on_notification(payload)
+            )
+
+            # Catch up on anything committed while we weren't listening (ex: before
+            # startup, or while reconnecting).
+            await db_executor.run(self.reload)
+
+            await disconnected.wait()
+
+    async def watch(self, database_url: URL):
+        '''Keeps the generations current: LISTEN on Postgres, polling elsewhere.'''
+
+        if database_url.get_backend_name() == "postgresql":
+            await self.listen(database_url)
+        else:
+            await self.poll_periodically()
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(self._generations)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = {}
+
+dataset_generations = DatasetGenerationTracker()
@@ -0,0 +1,226 @@
+# Compact binary serialization of cache entries for the shared cache backend (see
+# src/cache/cache_backend.py).
+#
+# Optimization: Cached responses are mostly bytes (the rendered body and its compressed
+# variants, see CachedResponse). JSON would have to base64 them (a third bigger) and
+# pickle would let anyone who can write to the shared cache run code in every worker,
+# so values are written in a small tagged format instead:
+#
+#     <tag: 1 byte><payload>
+#
+#     N, T, F      None, True, False (no payload)
+#     i            int, 8 byte signed
+#     I            int too big for 8 bytes, as a length-prefixed decimal string
+#     f            float, 8 byte double
+#     s, b         str (utf-8) and bytes, 4 byte length + data
+#     l, d         list and dict, 4 byte item count + items (dicts as key, value pairs)
+#     t            datetime, as a length-prefixed ISO 8601 string (keeps the timezone)
+#
+# An entry is a fixed header (format version, stale_at, expires_at, timestamp) followed
+# by its region and value. Lengths and numbers are little-endian.
+
+from __future__ import annotations
+
+import struct
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from src.cache.simple_cache import CacheEntry
+
+# Bump when the format changes. Entries written in another version are treated as
+# misses, so workers running old and new code side by side (ex: during a deploy) just
+# refill them.
+FORMAT_VERSION = 1
+
+ENTRY_HEADER = struct.Struct("<Bddd")
+LENGTH = struct.Struct("<I")
+INT = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+
+INT_MIN = -(2 ** 63)
+INT_MAX = 2 ** 63 - 1
+
+class SerializationError(ValueError):
+    """Raised when a value can't be serialized or data can't be deserialized."""
+
+def _write(value: Any, out: bytearray) -> None:
+    # bool is a subclass of int, so check it first.
+    if value is None:
+        out += b"N"
+
+    elif value is True:
+        out += b"T"
+
+    elif value is False:
+        out += b"F"
+
+    elif isinstance(value, int):
+        if INT_MIN <= value <= INT_MAX:
+            out += b"i" + INT.pack(value)
+        else:
+            digits = str(value).encode("ascii")
+            out += b"I" + LENGTH.pack(len(digits)) + digits
+
+    elif isinstance(value, float):
+        out += b"f" + FLOAT.pack(value)
+
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        out += b"s" + LENGTH.pack(len(data)) + data
+
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        out += b"b" + LENGTH.pack(len(value)) + value
+
+    elif isinstance(value, datetime):
+        data = value.isoformat().encode("ascii")
+        out += b"t" + LENGTH.pack(len(data)) + data
+
+    elif isinstance(value, (list, tuple)):
+        out += b"l" + LENGTH.pack(len(value))
+
+        for item in value:
+            _write(item, out)
+
+    elif isinstance(value, dict):
+        out += b"d" + LENGTH.pack(len(value))
+
+        for key, item in value.items():
+            _write(key, out)
+            _write(item, out)
+
+    else:
+        raise SerializationError(f"Can't serialize a {type(value).__name__}.")
+
+def _read(data: memoryview, position: int) -> tuple[Any, int]:
+    tag = data[position:position + 1].tobytes()
+    position += 1
+
+    if tag == b"N":
+        return None, position
+
+    if tag == b"T":
+        return True, position
+
+    if tag == b"F":
+        return False, position
+
+    if tag == b"i":
+        return INT.unpack_from(data, position)[0], position + INT.size
+
+    if tag == b"f":
+        return FLOAT.unpack_from(data, position)[0], position + FLOAT.size
+
+    if tag in (b"l", b"d"):
+        count = LENGTH.unpack_from(data, position)[0]
+        position += LENGTH.size
+
+        if tag == b"l":
+            items = []
+            for _ in range(count):
+                item, position = _read(data, position)
+                items.append(item)
+
+            return items, position
+
+        mapping = {}
+        for _ in range(count):
+            key, position = _read(data, position)
+            mapping[key], position = _read(data, position)
+
+        return mapping, position
+
+    if tag in (b"I", b"s", b"b", b"t"):
+        length = LENGTH.unpack_from(data, position)[0]
+        position += LENGTH.size
+
+        if position + length > len(data):
+            raise SerializationError("Truncated data.")
+
+        payload = data[position:position + length].tobytes()
+        position += length
+
+        if tag == b"I":
+            return int(payload.decode("ascii")), position
+
+        if tag == b"s":
+            return payload.decode("utf-8"), position
+
+        if tag == b"t":
+            return datetime.fromisoformat(payload.decode("ascii")), position
+
+        return payload, position
+
+    raise SerializationError(f"Unknown tag {tag!r}.")
+
+def dumps(value: Any) -> bytes:
+    out = bytearray()
+    _write(value, out)
+    return bytes(out)
+
+def loads(data: bytes) -> Any:
+    return loads_many(data, 1)[0]
+
+def dump_entry(entry: CacheEntry) -> bytes:
+    out = bytearray(ENTRY_HEADER.pack(
+        FORMAT_VERSION, entry["stale_at"], entry["expires_at"], entry["timestamp"].timestamp()
+    ))
+    _write(entry["region"], out)
+    _write(entry["value"], out)
+    return bytes(out)
+
+def load_entry(data: bytes) -> CacheEntry:
+    '''
+        Rebuilds an entry written by dump_entry. Raises SerializationError if it can't.
+        Its size is left at 0 for the cache to fill in.
+    '''
+
+    if len(data) < ENTRY_HEADER.size or data[0] != FORMAT_VERSION:
+        raise SerializationError("Unsupported entry format.")
+
+    _, stale_at, expires_at, timestamp = ENTRY_HEADER.unpack_from(data)
+    region, value = loads_many(data[ENTRY_HEADER.size:], 2)
+
+    return {
+        "value": value,
+        "stale_at": stale_at,
+        "expires_at": expires_at,
+        "timestamp": datetime.fromtimestamp(timestamp, timezone.utc),
+        "region": region,
+        "size": 0,
+    }
+
+def get_entry_expires_at(data: bytes) -> float:
+    '''
+        Reads when an entry written by dump_entry expires, without loading the rest of
+        it. Raises SerializationError if it can't.
+    '''
+
+    if len(data) < ENTRY_HEADER.size or data[0] != FORMAT_VERSION:
+        raise SerializationError("Unsupported entry format.")
+
+    return ENTRY_HEADER.unpack_from(data)[2]
+
+def loads_many(data: bytes, count: int) -> list[Any]:
+    '''Reads count values written back to back.'''
+
+    view = memoryview(data)
+    values = []
+    position = 0
+
+    try:
+        for _ in range(count):
+            value, position = _read(view, position)
+            values.append(value)
+
+    except SerializationError:
+        raise
+
+    # Ex: a truncated number, invalid utf-8, or a bad timestamp.
+    except (struct.error, ValueError) as exc:
+        raise SerializationError("Malformed data.") from exc
+
+    if position != len(data):
+        raise SerializationError("Trailing data.")
+
+    return values
@@ -1,84 +1,425 @@
+import asyncio
+import sys
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import TypedDict, Optional, Any
-import sentry_sdk
-from sentry_sdk import metrics
+from typing import Callable, Mapping, TypedDict, Optional, Any
+
+from src.cache.cache_backend import CacheBackend, get_cache_backend
+from src.cache.serialization import SerializationError, dump_entry, load_entry
+from src.core.config import settings
+from src.core.metrics import metrics_aggregator
+from src.core.sentry import start_span
+from src.cache.cache_executor import cache_executor
 
 class CacheEntry(TypedDict):
     value: Any
+    stale_at: float
     expires_at: float
     timestamp: datetime
+    region: str
+
+    # Approximate number of bytes the entry holds (see get_approximate_size).
+    size: int
+
+# A named slice of the cache with its own expiry and memory budget. Each region evicts
+# its own least recently used entries, so a flood of one kind of key (ex: a crawler
+# walking every filter combination of the list route) can't push out another kind
+# (ex: tea profile details).
+class CacheRegion(TypedDict):
+    ttl_seconds: int
+    stale_seconds: int
+    max_bytes: int
+
+DEFAULT_REGION = "default"
+LIST_REGION = "list"
+DETAIL_REGION = "detail"
+
+# Defaults for the shared cache below. Entries are fresh for 5 minutes, then served
+# stale for up to 1 more minute while they're refreshed in the background.
+CACHE_TTL_SECONDS = 300
+CACHE_STALE_SECONDS = 60
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Lists, searches, and facet counts: many distinct keys (every filter, limit, offset,
+# and cursor combination), each holding a page of tea profiles.
+#
+# Optimization: Keys include the dataset generation (see src/cache/dataset_generation.py),
+# so an ingestion invalidates them right away and they don't need a short TTL. They
+# only expire to pick up changes made outside of ingestion (ex: by hand in the database).
+LIST_REGION_CONFIG: CacheRegion = {
+    "ttl_seconds": 6 * 60 * 60,
+    "stale_seconds": 10 * 60,
+    "max_bytes": 64 * 1024 * 1024,
+}
+
+# Single tea profiles: at most one key per tea, and they're cheap to keep around longer.
+DETAIL_REGION_CONFIG: CacheRegion = {
+    "ttl_seconds": 12 * 60 * 60,
+    "stale_seconds": 10 * 60,
+    "max_bytes": 32 * 1024 * 1024,
+}
+
+# How often the sweeper removes expired entries.
+SWEEP_INTERVAL_SECONDS = 60
+
+# Rough cost of an entry beyond its contents (the dicts that hold it, timestamps, etc.).
+ENTRY_OVERHEAD_BYTES = 256
+
+def get_approximate_size(value: Any) -> int:
+    '''Approximates how many bytes a cached value holds, counting what it contains.'''
+
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+
+    if isinstance(value, Mapping):
+        return sum(
+            get_approximate_size(key) + get_approximate_size(item)
+            for key, item in value.items()
+        )
+
+    if isinstance(value, (list, tuple, set)):
+        return sum(get_approximate_size(item) for item in value)
+
+    return sys.getsizeof(value)
 
 class SimpleCache:
-    # ttl = Time to Live. This is the length of time it takes for 
+    # ttl = Time to Live. This is the length of time it takes for
     # something cached to expire from the moment it's stored. After this
     # time, SimpleCache treats that something as missing. This prevents
     # stale data from living forever. 300 seconds gives 5 minutes by default.
     #
+    # Optimization: stale_seconds is a grace period after the ttl (the soft TTL) during
+    # which an entry is still returned, but marked stale (see is_stale). Callers serve
+    # it right away and refresh it in the background, so no request has to wait on
+    # the database just because an entry aged out. After ttl + stale_seconds (the hard
+    # TTL), the entry is gone. With the default of 0, entries expire at the ttl.
+    #
+    # Optimization: Memory is bounded. Every entry is counted against its region's
+    # max_bytes, and once a region is over budget its least recently used entries are
+    # evicted. ttl_seconds, stale_seconds, and max_bytes configure the default region;
+    # regions adds named ones (see CacheRegion).
+    #
+    # Optimization: backend is an optional cache shared by every worker (L2), checked
+    # when this one (L1) misses and written through on every set. See
+    # src/cache/cache_backend.py. L2 calls are blocking I/O, so code running on the
+    # event loop uses get_async and set_async, which make them on the cache executor.
+    #
     # store is a dict that holds the cached items. Each item's format is
-    #     "key": { "value": ..., "expires_at": ..., "timestamp": ... }
-    def __init__(self, ttl_seconds: int = 300):
+    #     "key": { "value": ..., "stale_at": ..., "expires_at": ..., "timestamp": ...,
+    #              "region": ..., "size": ... }
+    def __init__(self, ttl_seconds: int = 300, stale_seconds: int = 0,
+        max_bytes: int = CACHE_MAX_BYTES, regions: Mapping[str, CacheRegion] | None = None,
+        backend: CacheBackend | None = None):
+
         self.ttl = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.regions: dict[str, CacheRegion] = {
+            DEFAULT_REGION: {
+                "ttl_seconds": ttl_seconds,
+                "stale_seconds": stale_seconds,
+                "max_bytes": max_bytes,
+            },
+            **(regions or {}),
+        }
         self.store: dict[str, CacheEntry] = {}
+        self.backend = backend
+
+        # Keys of each region from least to most recently used.
+        self._lru: dict[str, OrderedDict[str, None]] = {
+            region: OrderedDict() for region in self.regions
+        }
+
+        # The cache is used from the event loop, the sweeper, and debug routes running
+        # in the threadpool.
+        self._lock = threading.RLock()
 
         # Observability
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self._reset_region_stats()
+
+    def _reset_region_stats(self):
+        self.region_bytes = {region: 0 for region in self.regions}
+        self.evictions = {region: 0 for region in self.regions}
+        self.expirations = {region: 0 for region in self.regions}
+
+    def _remove(self, key: str) -> CacheEntry:
+        entry = self.store.pop(key)
+        del self._lru[entry["region"]][key]
+        self.region_bytes[entry["region"]] -= entry["size"]
+        return entry
+
+    def _get_local(self, key) -> Optional[CacheEntry]:
+        '''Looks a key up in L1 (the caller holds the lock), dropping it if expired.'''
+
+        # Try to get the cached item via its key.
+        entry = self.store.get(key)
+
+        if entry is None:
+            return None
+
+        # Delete the cache item if it's expired.
+        if time.time() > entry["expires_at"]:
+            self._remove(key)
+            self.expirations[entry["region"]] += 1
+
+            # Capture expiration metrics.
+            metrics_aggregator.count("cache.expired")
+
+            return None
+
+        # Mark the key as the most recently used in its region.
+        self._lru[entry["region"]].move_to_end(key)
+
+        return entry
+
+    def _get_shared(self, key) -> Optional[CacheEntry]:
+        '''Looks a key up in L2 (see src/cache/cache_backend.py).'''
+
+        data = self.backend.get(key)
+        if data is None:
+            return None
+
+        try:
+            entry = load_entry(data)
+
+        # Ex: written by a worker running another version of the format.
+        except SerializationError:
+            metrics_aggregator.count("cache.l2.unreadable")
+            return None
+
+        if time.time() > entry["expires_at"] or entry["region"] not in self.regions:
+            return None
+
+        return entry
 
     def get(self, key) -> Optional[CacheEntry]:
-        with sentry_sdk.start_span(op = "cache.get", name = "cache lookup"):
+        with start_span(op = "cache.get", name = "cache lookup"):
+            with self._lock:
+                entry = self._get_local(key)
 
-            # Try to get the cached item via its key.
-            entry = self.store.get(key)
+                if entry is not None or self.backend is None:
+                    return self._record_lookup(entry)
 
-            # If nothing is there, increment misses before returning None.
-            if entry is None:
-                self.misses += 1
+            # Optimization: Only L1 misses go to L2, and outside the lock, so a slow L2
+            # never holds up lookups that L1 can answer.
+            return self._finish_shared_lookup(key, self._get_shared(key))
 
-                # Capture miss metrics for Sentry.
-                metrics.count("cache.miss", 1) 
-                sentry_sdk.capture_message("cache_miss", level = "info")
+    async def get_async(self, key) -> Optional[CacheEntry]:
+        '''
+            Same as get, for the event loop. L1 hits are answered right away, and L2
+            lookups run on the cache executor, so a slow L2 never blocks other requests.
+        '''
 
-                return None
+        with start_span(op = "cache.get", name = "cache lookup"):
+            with self._lock:
+                entry = self._get_local(key)
 
-            # Delete the cache item and increment misses if it's expired.
-            if time.time() > entry["expires_at"]:
-                self.misses += 1
-                del self.store[key]
+                if entry is not None or self.backend is None:
+                    return self._record_lookup(entry)
 
-                # Capture expiration metrics for Sentry.
-                metrics.count("cache.expired", 1) 
-                sentry_sdk.capture_message("cache_expired", level = "info")
+            return self._finish_shared_lookup(
+                key, await cache_executor.run(self._get_shared, key)
+            )
 
-                return None
+    def _finish_shared_lookup(self, key, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        with self._lock:
+            # Keep a copy in L1, with the expiry it was given in L2, so the next
+            # lookup of this key in this worker doesn't leave the process.
+            if entry is not None and not self._insert(key, entry):
+                entry = None
 
-            # If the cached item exists and is not expired, increment hits and
-            # return the cached item.
-            self.hits += 1
+            return self._record_lookup(entry)
 
-            # Capture hit metrics for Sentry.
-            metrics.count("cache.hit", 1) 
-            sentry_sdk.capture_message("cache_hit", level = "info")
+    def _record_lookup(self, entry: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        # If nothing is there, increment misses before returning None.
+        if entry is None:
+            self.misses += 1
 
-            return entry
+            # Capture miss metrics (flushed to Sentry in batches).
+            metrics_aggregator.count("cache.miss")
 
-    def set(self, key, value):
-        with sentry_sdk.start_span(op = "cache.set", name = "cache store"):
-            expires_at = time.time() + self.ttl
-            self.store[key] = {
-                "value": value,
-                "expires_at": expires_at,
-                "timestamp": datetime.now(timezone.utc)
-            }
+            return None
+
+        # If the cached item exists and is not expired, increment hits and
+        # return the cached item.
+        self.hits += 1
+
+        # Stale items are still hits, but count them so that we can see how often
+        # requests are answered while a refresh is due.
+        if self.is_stale(entry):
+            self.stale_hits += 1
+            metrics_aggregator.count("cache.stale")
+
+        # Capture hit metrics.
+        metrics_aggregator.count("cache.hit")
 
-            # Track cache size.
-            metrics.gauge("cache.size", len(self.store)) 
+        return entry
 
+    def is_stale(self, entry: CacheEntry) -> bool:
+        '''True once an entry is past its soft TTL and should be refreshed.'''
+        return time.time() > entry["stale_at"]
+
+    def set(self, key, value, region: str = DEFAULT_REGION):
+        with start_span(op = "cache.set", name = "cache store"):
+            entry = self._set_local(key, value, region)
+
+            if entry is not None and self.backend is not None:
+                self._set_shared(key, entry)
+
+    async def set_async(self, key, value, region: str = DEFAULT_REGION):
+        '''
+            Same as set, for the event loop. L1 is updated right away, and the write to
+            L2 is handed to the cache executor without waiting for it, so responses never
+            wait on L2.
+        '''
+
+        with start_span(op = "cache.set", name = "cache store"):
+            entry = self._set_local(key, value, region)
+
+            if entry is not None and self.backend is not None:
+                cache_executor.submit(self._set_shared, key, entry)
+
+    def _set_local(self, key, value, region: str) -> Optional[CacheEntry]:
+        '''Stores a value in L1. Returns its entry, or None if it's too big to cache.'''
+
+        if region not in self.regions:
+            raise ValueError(f"Unknown cache region {region}.")
+
+        config = self.regions[region]
+        stale_at = time.time() + config["ttl_seconds"]
+        entry: CacheEntry = {
+            "value": value,
+            "stale_at": stale_at,
+            "expires_at": stale_at + config["stale_seconds"],
+            "timestamp": datetime.now(timezone.utc),
+            "region": region,
+            "size": 0,
+        }
+
+        with self._lock:
+            return entry if self._insert(key, entry) else None
+
+    def _insert(self, key, entry: CacheEntry) -> bool:
+        '''Stores an entry in L1 (the caller holds the lock). False if it's too big.'''
+
+        region = entry["region"]
+        config = self.regions[region]
+        size = get_approximate_size(key) + get_approximate_size(entry["value"]) \
+            + ENTRY_OVERHEAD_BYTES
+
+        if key in self.store:
+            self._remove(key)
+
+        # Something bigger than the whole budget would just evict everything else
+        # and then itself, so don't cache it at all.
+        if size > config["max_bytes"]:
+            metrics_aggregator.count("cache.too_large")
+            return False
+
+        entry["size"] = size
+        self.store[key] = entry
+        self._lru[region][key] = None
+        self.region_bytes[region] += size
+
+        # Evict the least recently used entries until the region fits its budget.
+        lru = self._lru[region]
+        while self.region_bytes[region] > config["max_bytes"]:
+            self._remove(next(iter(lru)))
+            self.evictions[region] += 1
+            metrics_aggregator.count("cache.evicted", attributes = {"region": region})
+
+        # Track cache size.
+        metrics_aggregator.gauge("cache.size", len(self.store))
+        metrics_aggregator.gauge("cache.bytes", sum(self.region_bytes.values()))
+
+        return True
+
+    def _set_shared(self, key, entry: CacheEntry):
+        '''Writes an entry to L2, expiring it there when it expires here.'''
+
+        try:
+            data = dump_entry(entry)
+
+        # Only values made of plain data (see src/cache/serialization.py) are shared.
+        except SerializationError:
+            metrics_aggregator.count("cache.l2.unserializable")
+            return
+
+        self.backend.set(key, data, entry["expires_at"] - time.time())
+
+    def delete_matching(self, predicate: Callable[[str], bool]) -> int:
+        '''Removes every L1 entry whose key matches predicate. Returns how many.'''
+
+        with self._lock:
+            keys = [key for key in self.store if predicate(key)]
+
+            for key in keys:
+                self._remove(key)
+
+        return len(keys)
+
+    def sweep(self) -> int:
+        '''Removes every expired entry, even ones nobody looks up again. Returns how many.'''
+
+        with self._lock:
+            now = time.time()
+            expired = [key for key, entry in self.store.items() if now > entry["expires_at"]]
+
+            for key in expired:
+                entry = self._remove(key)
+                self.expirations[entry["region"]] += 1
+
+        # Backends that don't expire entries on their own (ex: SQLite) are swept too.
+        if self.backend is not None:
+            self.backend.sweep()
+
+        return len(expired)
+
+    async def sweep_periodically(self, interval_seconds: float = SWEEP_INTERVAL_SECONDS):
+        '''Runs sweep every interval_seconds until cancelled (see the app's lifespan).'''
+
+        while True:
+            await asyncio.sleep(interval_seconds)
+
+            # On the cache executor, since sweeping L2 (ex: SQLite) is blocking I/O.
+            await cache_executor.run(self.sweep)
+
+    def stats(self) -> dict[str, Any]:
+        '''Entries, bytes, evictions, and expirations of each region.'''
+
+        with self._lock:
+            return {
+                region: {
+                    "entries": len(self._lru[region]),
+                    "bytes": self.region_bytes[region],
+                    "max_bytes": config["max_bytes"],
+                    "evictions": self.evictions[region],
+                    "expirations": self.expirations[region],
+                }
+                for region, config in self.regions.items()
+            }
+
+    # Only clears L1. L2 is shared with other workers, and its entries expire on their own.
     def clear(self):
-        self.store.clear()
+        with self._lock:
+            self.store.clear()
 
-        # Reset counters
-        self.hits = 0
-        self.misses = 0
+            for lru in self._lru.values():
+                lru.clear()
+
+            # Reset counters
+            self.hits = 0
+            self.misses = 0
+            self.stale_hits = 0
+            self._reset_region_stats()
 
-cache = SimpleCache()
\ No newline at end of file
+cache = SimpleCache(
+    ttl_seconds = CACHE_TTL_SECONDS,
+    stale_seconds = CACHE_STALE_SECONDS,
+    regions = {LIST_REGION: LIST_REGION_CONFIG, DETAIL_REGION: DETAIL_REGION_CONFIG},
+    backend = get_cache_backend(settings.cache_url)
+)
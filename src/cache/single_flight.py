@@ -0,0 +1,95 @@
+# Optimization: Request coalescing for cache misses. When a popular key expires, every
+# request that arrives before it's cached again misses at the same moment. Without
+# coalescing, each one runs the same query (a thundering herd). With it, the first
+# miss (the leader) runs the fetch, and everyone else who misses on the same key while
+# it's running awaits the leader's result instead of running their own.
+#
+#     request 1 --> miss --> leader: query, render, cache.set --> response
+#     request 2 --> miss --> waiter: await request 1's result  --> response
+#     request 3 --> miss --> waiter: await request 1's result  --> response
+#
+# If the leader fails, its waiters get the same error. If the leader is cancelled (ex:
+# its client disconnected), its waiters aren't: they try again, and one of them becomes
+# the new leader.
+#
+# Keys are only coalesced within one worker process, where all requests share one
+# event loop.
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+from src.core.metrics import metrics_aggregator
+
+T = TypeVar("T")
+
+class SingleFlight:
+    def __init__(self):
+        # key --> the future the leader will resolve.
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+        # Observability
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        '''Returns await fetch(), sharing one call among concurrent callers for key.'''
+
+        while True:
+            future = self._in_flight.get(key)
+
+            if future is None:
+                return await self._lead(key, fetch)
+
+            self.coalesced += 1
+            metrics_aggregator.count("cache.coalesced")
+
+            try:
+                # shield, so that a waiter's own cancellation doesn't cancel the leader.
+                return await asyncio.shield(future)
+
+            except asyncio.CancelledError:
+                # Only swallow the leader's cancellation, never our own.
+                task = asyncio.current_task()
+                if not future.cancelled() or (task is not None and task.cancelling()):
+                    raise
+
+    async def _lead(self, key: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.leaders += 1
+
+        try:
+            result = await fetch()
+
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        except BaseException as exc:
+            future.set_exception(exc)
+
+            # Mark the exception as retrieved, so asyncio doesn't log it when nobody
+            # was waiting.
+            future.exception()
+            raise
+
+        else:
+            future.set_result(result)
+            return result
+
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+    def clear(self):
+        # Reset counters. In-flight calls are left to finish.
+        self.leaders = 0
+        self.coalesced = 0
+
+single_flight = SingleFlight()
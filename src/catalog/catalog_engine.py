@@ -0,0 +1,436 @@
+# Optimization: An in-memory copy of the whole tea catalog that can answer list
+# queries without touching the database. The catalog is small (every tea profile fits
+# in memory many times over), so on a cache miss it's much cheaper to filter it in
+# process than to check out a connection and run a query.
+#
+# The catalog is built once from the database (at startup when CATALOG_ENABLED is
+# set) and rebuilt whenever tea_profiles moves to a new dataset generation (see
+# on_dataset_generation), whichever process or machine the ingestion ran in. Each build
+# produces a new, read-only CatalogSnapshot that replaces the old one in a single
+# assignment, so requests always see either the old catalog or the new one, never a
+# half-built mix. Each snapshot records the generation it was built from, and only
+# answers requests for that generation (see CatalogEngine.list).
+#
+# Filters have the same semantics as TeaProfilesRepository.list:
+#
+#     Text fields:   case-insensitive substring match (LIKE '%value%')
+#     Array fields:  case-insensitive whole-element match (the normalized columns)
+#     Other fields:  exact match
+#
+# Comma-separated values must all match. Results are ordered by id.
+#
+# How it's fast: every row gets a position (its index when sorted by id), and every
+# indexed value maps to a bitmap, a Python int whose bit N is set when the row at
+# position N has that value. Combining filters is then a bitwise AND of a few ints,
+# which Python does in C. Ex, with 3 rows:
+#
+#     tea_type "green"   --> 0b011 (rows 0 and 1)
+#     country "japan"    --> 0b110 (rows 1 and 2)
+#     green AND japan    --> 0b010 (row 1)
+#
+# Substring filters use trigram bitmaps (every three-letter chunk of the text, like
+# pg_trgm) to narrow down the candidates, then check the candidates for the substring.
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Iterator, Mapping
+
+import sentry_sdk
+from sqlalchemy import String, Text
+from sqlalchemy.orm import Session
+
+from src.api.schemas.tea_profiles_schema import TeaProfileSchema
+from src.db.dataset_generations import get_dataset_generations
+from src.db.db_executor import db_executor
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray, normalize_array
+from src.utils.filter_utils import canonicalize_filters
+from src.utils.model_utils import is_derived_column, is_row_version_column
+from src.utils.facet_utils import FacetCounts, sort_facet_counts
+from src.constants.tea_profiles_constants import (
+    FACET_TEA_PROFILE_MODEL_FIELDS, DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS,
+    MAX_DESCRIPTOR_FACET_VALUES
+)
+
+# use __name__ to get a logger named after the module we're in.
+logger = logging.getLogger(__name__)
+
+TRIGRAM_LENGTH = 3
+
+def _get_trigrams(text: str) -> set[str]:
+    return {text[i:i + TRIGRAM_LENGTH] for i in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+def _iter_positions(bitmap: int) -> Iterator[int]:
+    '''Yields the positions of the set bits in bitmap, lowest first.'''
+
+    # Reversing the binary string puts bit 0 first. str.find skips over runs of zeros
+    # in C, which is much faster than testing one bit at a time.
+    bits = bin(bitmap)[:1:-1]
+    position = bits.find("1")
+
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+def _get_bitmap(positions: list[int], size: int) -> int:
+    '''Builds a bitmap with the given positions set.'''
+
+    # Setting bits in a bytearray and converting once is linear, while OR-ing each
+    # bit into an int would copy the whole int every time.
+    buffer = bytearray((size + 7) // 8)
+
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+
+    return int.from_bytes(buffer, "little")
+
+def _add_to_index(index: dict[str, list[int]], key: str, position: int) -> None:
+    index.setdefault(key, []).append(position)
+
+class CatalogTeaProfileSchema(TeaProfileSchema):
+    '''
+        A tea profile plus its row version (see src/db/row_versions.py), so that responses
+        built from the catalog get the same validators as responses built from the
+        database. Rendering through TeaProfileSchema leaves these fields out.
+    '''
+
+    updated_at: datetime | None = None
+    content_hash: str | None = None
+
+class CatalogSnapshot:
+    '''A read-only, fully indexed copy of every tea profile at one point in time.'''
+
+    def __init__(self, tea_profiles: list[TeaProfileSchema], generation: int = 0):
+        # The dataset generation of tea_profiles that tea_profiles was read at.
+        self.generation = generation
+
+        self.tea_profiles = sorted(tea_profiles, key = lambda tea_profile: tea_profile.id)
+        self.ids = [tea_profile.id for tea_profile in self.tea_profiles]
+        self.size = len(self.tea_profiles)
+        self.all_rows = (1 << self.size) - 1
+        self.built_at = time.time()
+
+        # Lowercased text of each text field by position (None when NULL), the rows
+        # where it isn't NULL, and its trigram bitmaps.
+        self.text_values: dict[str, list[str | None]] = {}
+        self.text_not_null: dict[str, int] = {}
+        self.trigram_indexes: dict[str, dict[str, int]] = {}
+
+        # Normalized element --> bitmap, for array fields.
+        self.element_indexes: dict[str, dict[str, int]] = {}
+
+        # Lowercased value --> bitmap, for everything else.
+        self.value_indexes: dict[str, dict[str, int]] = {}
+
+        # Value (as stored) --> bitmap, for the fields the facets endpoint counts.
+        self.facet_indexes: dict[str, dict[str, int]] = {}
+
+        for column in TeaProfileModel.__table__.columns:
+            if is_derived_column(column) or is_row_version_column(column):
+                continue
+
+            values = [getattr(tea_profile, column.name) for tea_profile in self.tea_profiles]
+
+            if isinstance(column.type, SQLiteCompatibleArray):
+                self._index_array_field(column.name, values)
+
+            elif isinstance(column.type, (String, Text)):
+                self._index_text_field(column.name, values)
+
+                if column.name in FACET_TEA_PROFILE_MODEL_FIELDS:
+                    self._index_facet_field(column.name, values)
+
+            else:
+                self._index_value_field(column.name, values)
+
+    def _index_array_field(self, field_name: str, values: list[Any]) -> None:
+        index: dict[str, list[int]] = {}
+
+        for position, value in enumerate(values):
+            for element in normalize_array(value) or []:
+                _add_to_index(index, element, position)
+
+        self.element_indexes[field_name] = self._to_bitmaps(index)
+
+    def _index_text_field(self, field_name: str, values: list[Any]) -> None:
+        lowered = [value.lower() if value is not None else None for value in values]
+        index: dict[str, list[int]] = {}
+
+        for position, value in enumerate(lowered):
+            if value is not None:
+                for trigram in _get_trigrams(value):
+                    _add_to_index(index, trigram, position)
+
+        self.text_values[field_name] = lowered
+        self.text_not_null[field_name] = _get_bitmap(
+            [position for position, value in enumerate(lowered) if value is not None],
+            self.size
+        )
+        self.trigram_indexes[field_name] = self._to_bitmaps(index)
+
+    def _index_value_field(self, field_name: str, values: list[Any]) -> None:
+        index: dict[str, list[int]] = {}
+
+        for position, value in enumerate(values):
+            if value is not None:
+                _add_to_index(index, str(value).lower(), position)
+
+        self.value_indexes[field_name] = self._to_bitmaps(index)
+
+    def _index_facet_field(self, field_name: str, values: list[Any]) -> None:
+        index: dict[str, list[int]] = {}
+
+        for position, value in enumerate(values):
+            if value is not None:
+                _add_to_index(index, value, position)
+
+        self.facet_indexes[field_name] = self._to_bitmaps(index)
+
+    def _to_bitmaps(self, index: dict[str, list[int]]) -> dict[str, int]:
+        return {key: _get_bitmap(positions, self.size) for key, positions in index.items()}
+
+    def _match_substring(self, field_name: str, value: str) -> int:
+        # Only rows containing every trigram of the value can contain the value. Values
+        # shorter than a trigram can't be narrowed down, so every non-NULL row is a
+        # candidate.
+        candidates = self.text_not_null[field_name]
+        trigram_index = self.trigram_indexes[field_name]
+
+        for trigram in _get_trigrams(value):
+            candidates &= trigram_index.get(trigram, 0)
+
+            if not candidates:
+                return 0
+
+        # Trigrams can match out of order, so confirm the candidates.
+        text_values = self.text_values[field_name]
+        return _get_bitmap(
+            [
+                position for position in _iter_positions(candidates)
+                if value in text_values[position] # type: ignore
+            ],
+            self.size
+        )
+
+    def match(self, filters: Mapping[str, Any]) -> int:
+        '''Returns the bitmap of rows that match every filter.'''
+
+        matches = self.all_rows
+
+        # Same canonical form as the repositories (see canonicalize_filters).
+        for field_name, values in canonicalize_filters(filters).items():
+
+            if field_name in self.element_indexes:
+                index = self.element_indexes[field_name]
+
+                for v in normalize_array(values) or []:
+                    matches &= index.get(v, 0)
+
+            elif field_name in self.text_values:
+                for v in values:
+                    matches &= self._match_substring(field_name, v)
+
+            else:
+                index = self.value_indexes[field_name]
+
+                for v in values:
+                    matches &= index.get(v, 0)
+
+            # Nothing left to narrow down.
+            if not matches:
+                return 0
+
+        return matches
+
+    def list(self, filters: Mapping[str, Any], limit: int = 100, offset: int = 0,
+        after_id: int | None = None) -> list[TeaProfileSchema]:
+
+        matches = self.match(filters)
+
+        # Keyset pagination: clear the bits of every row at or before after_id. Rows are
+        # sorted by id, so that's everything below one position.
+        if after_id is not None:
+            start = bisect_right(self.ids, after_id)
+            matches = matches >> start << start
+
+        tea_profiles = []
+        for index, position in enumerate(_iter_positions(matches)):
+            if index < offset:
+                continue
+
+            if len(tea_profiles) >= limit:
+                break
+
+            tea_profiles.append(self.tea_profiles[position])
+
+        return tea_profiles
+
+    def facets(self, filters: Mapping[str, Any]) -> FacetCounts:
+        '''Same as TeaProfilesRepository.facets, with the default fields.'''
+
+        # Each count is the number of set bits in (matching rows AND rows with the value).
+        matches = self.match(filters)
+
+        facets = {
+            field_name: sort_facet_counts({
+                value: (matches & bitmap).bit_count()
+                for value, bitmap in self.facet_indexes[field_name].items()
+            })
+            for field_name in FACET_TEA_PROFILE_MODEL_FIELDS
+        }
+
+        for field_name in DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS:
+            facets[field_name] = sort_facet_counts(
+                {
+                    element: (matches & bitmap).bit_count()
+                    for element, bitmap in self.element_indexes[field_name].items()
+                },
+                MAX_DESCRIPTOR_FACET_VALUES
+            )
+
+        return {"total": matches.bit_count(), "facets": facets}
+
+class CatalogEngine:
+    '''Holds the current CatalogSnapshot and rebuilds it from the database.'''
+
+    def __init__(self):
+        self._snapshot: CatalogSnapshot | None = None
+        self._session_factory: Callable[[], ContextManager[Session]] | None = None
+
+        # Only one rebuild at a time. Readers never take this lock.
+        self._reload_lock = threading.Lock()
+
+        # The newest dataset generation of tea_profiles we've heard of, and a lock for
+        # swapping snapshots in and out along with it. Held only briefly, never while
+        # building.
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot | None:
+        return self._snapshot
+
+    def configure(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        '''Sets how reload gets a database session, ex: get_session_cm.'''
+        self._session_factory = session_factory
+
+    def load(self, session: Session) -> CatalogSnapshot:
+        '''Builds a new snapshot from the database and swaps it in.'''
+
+        with self._reload_lock:
+            # Read the generation before the rows, so that an ingestion committed in
+            # between can only make the data newer than its generation, never older.
+            generation = get_dataset_generations(session).get(TeaProfileModel.__tablename__, 0)
+
+            with sentry_sdk.start_span(op = "catalog", name = "build catalog"):
+                tea_profiles: list[TeaProfileSchema] = [
+                    CatalogTeaProfileSchema.model_validate(tea_profile, from_attributes = True)
+                    for tea_profile in session.query(TeaProfileModel).order_by(TeaProfileModel.id)
+                ]
+                snapshot = CatalogSnapshot(tea_profiles, generation)
+
+            # The swap. Assigning an attribute is atomic, so readers that already
+            # grabbed the old snapshot finish with it and new readers get this one.
+            with self._generation_lock:
+                # A newer generation arrived while we were building, so this snapshot
+                # is already out of date. Leave the catalog unloaded: the reload queued
+                # for the newer generation will swap in its own snapshot.
+                if generation < self._generation:
+                    logger.info("Discarded a catalog built before a newer generation.")
+                    return snapshot
+
+                self._generation = generation
+                self._snapshot = snapshot
+
+        logger.info(f"Catalog loaded with {snapshot.size} tea profiles.")
+        return snapshot
+
+    def reload(self) -> None:
+        if self._session_factory is None:
+            raise RuntimeError("CatalogEngine.configure must be called before reload.")
+
+        with self._session_factory() as session:
+            self.load(session)
+
+    def on_dataset_generation(self, table_name: str, generation: int) -> None:
+        '''
+            Dataset generation listener (see src/cache/dataset_generation.py). Called
+            whenever tea_profiles changes, including when it was ingested by another
+            process (ex: src.app.ingest_tea_profiles) or on another machine.
+        '''
+
+        if table_name != TeaProfileModel.__tablename__ or self._session_factory is None:
+            return
+
+        with self._generation_lock:
+            if generation <= self._generation:
+                return
+
+            self._generation = generation
+
+            # Until the rebuild finishes, the snapshot holds older data, and answering
+            # from it would serve that data under the new generation's cache keys and
+            # ETags. Unload it, so list and facets fall through to the database.
+            self._snapshot = None
+
+        # Listeners may be called on the event loop, so rebuild on the DB executor
+        # rather than blocking it.
+        db_executor.submit(self._reload_in_background)
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.reload()
+
+        # Stay unloaded (queries go to the database) until the next generation retries.
+        except Exception:
+            logger.exception("Failed to rebuild the catalog.")
+
+    def _get_snapshot(self, generation: int | None) -> CatalogSnapshot | None:
+        # Grab the snapshot once so that a concurrent swap can't change it mid-query.
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+
+        # The caller's generation is the one its response will be cached and tagged
+        # under. A request can see a new generation before its listeners have unloaded
+        # the old snapshot (or before the new one is built), and answering it from a
+        # snapshot of another generation would store that data under the wrong key.
+        if generation is not None and generation != snapshot.generation:
+            return None
+
+        return snapshot
+
+    def list(self, filters: Mapping[str, Any], limit: int = 100, offset: int = 0,
+        after_id: int | None = None,
+        generation: int | None = None) -> list[TeaProfileSchema] | None:
+        '''
+            Answers a list query from memory, or returns None if the catalog isn't loaded
+            or was built from a generation other than generation.
+        '''
+
+        snapshot = self._get_snapshot(generation)
+        if snapshot is None:
+            return None
+
+        return snapshot.list(filters, limit, offset, after_id)
+
+    def facets(self, filters: Mapping[str, Any],
+        generation: int | None = None) -> FacetCounts | None:
+        '''
+            Counts facets from memory, or returns None if the catalog isn't loaded or was
+            built from a generation other than generation.
+        '''
+
+        snapshot = self._get_snapshot(generation)
+        if snapshot is None:
+            return None
+
+        return snapshot.facets(filters)
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+catalog = CatalogEngine()
@@ -8,4 +8,12 @@ IS_PRICE_KEY = "is_price"
 DELIMITER_INFO_DICT = {DELIMITER_KEY: DELIMITER_VALUE}
 
 # Tells us if numeric field is a price.
-IS_PRICE_INFO_DICT = {IS_PRICE_KEY: True}
\ No newline at end of file
+IS_PRICE_INFO_DICT = {IS_PRICE_KEY: True}
+# Marks a column as derived from another column, rather than loaded from CSVs or 
+# returned by the API. The value is the name of the source column.
+NORMALIZED_FROM_KEY = "normalized_from"
+
+# Marks a column as bookkeeping about when and how a row last changed (see
+# src/db/row_versions.py), rather than data loaded from CSVs or returned by the API.
+ROW_VERSION_KEY = "row_version"
+ROW_VERSION_INFO_DICT = {ROW_VERSION_KEY: True}
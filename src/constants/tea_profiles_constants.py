@@ -36,4 +36,34 @@ REQUIRED_TEA_PROFILE_MODEL_FIELDS = [
     TeaProfileModelFields.LIQUOR_APPEARANCE,
     TeaProfileModelFields.LIQUOR_AROMA,
     TeaProfileModelFields.LIQUOR_TASTE,
-]
\ No newline at end of file
+]
+
+# Compact representation for list views, which only render a few fields. Leaves out
+# the long cultural_significance text and the descriptor arrays.
+SUMMARY_TEA_PROFILE_MODEL_FIELDS = [
+    TeaProfileModelFields.ID,
+    TeaProfileModelFields.NAME,
+    TeaProfileModelFields.ALTERNATIVE_NAMES,
+    TeaProfileModelFields.TEA_TYPE,
+    TeaProfileModelFields.OXIDATION_LEVEL,
+    TeaProfileModelFields.COUNTRY_OF_ORIGIN,
+]
+
+# Fields the facets endpoint counts every value of, for filter sidebars.
+FACET_TEA_PROFILE_MODEL_FIELDS = [
+    TeaProfileModelFields.TEA_TYPE,
+    TeaProfileModelFields.COUNTRY_OF_ORIGIN,
+    TeaProfileModelFields.OXIDATION_LEVEL,
+]
+
+# Descriptor (array) fields the facets endpoint counts the most common values of.
+DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS = [
+    TeaProfileModelFields.LIQUOR_TASTE,
+    TeaProfileModelFields.LIQUOR_AROMA,
+]
+
+# How many of the most common descriptors to return per descriptor field.
+MAX_DESCRIPTOR_FACET_VALUES = 20
+
+# Rows fetched per round trip (and rendered per chunk) when exporting every tea profile.
+EXPORT_BATCH_SIZE = 500
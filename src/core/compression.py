@@ -1,6 +1,39 @@
+import gzip
+import zlib
+from typing import AsyncIterator
+
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi import FastAPI
 
+# brotli and zstandard are optional. If either isn't installed, we simply don't offer
+# that encoding and clients fall back to gzip.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Small responses don't benefit from compression and waste CPU, so start
+# compressing if the payload is 500 B or larger.
+MINIMUM_COMPRESSION_SIZE = 500
+
+# Compression levels for pre-compressed cached bodies. These are higher than what we'd
+# use for per-request compression because the work is only done once per cache fill.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 8
+ZSTD_LEVEL = 12
+
+# Compression level for bodies compressed as they're streamed (see gzip_stream). Every
+# byte is compressed on every request, so trade some size for speed.
+STREAMING_GZIP_LEVEL = 6
+
+# Tells zlib to write a gzip header and trailer rather than a raw zlib stream.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
 # Optimization: Compress HTTP responses before sending them to the browser.
 # This will increase load times because our JSON has a lot of repetitive fields.
 # Reduces bandwidth usage, which will help with free hosting tiers, bandwidth
@@ -8,7 +41,114 @@ from fastapi import FastAPI
 #
 # These needs to go after CORS but before routes
 #
-# Small responses don't benefit from compression and waste CPU, so start 
-# compressing if the payload is 500 B or larger.
+# Cached routes pre-compress their bodies (see compress_variants below) and set
+# Content-Encoding themselves. GZipMiddleware leaves responses that already have a
+# Content-Encoding alone, so it only does work for responses that weren't cached.
 def configure_gzip(app: FastAPI):
-    app.add_middleware(GZipMiddleware, minimum_size = 500)
\ No newline at end of file
+    app.add_middleware(GZipMiddleware, minimum_size = MINIMUM_COMPRESSION_SIZE)
+
+def get_supported_encodings() -> list[str]:
+    '''Returns the encodings we can produce, from most to least preferred.'''
+
+    # zstd decompresses fastest and brotli usually gives the smallest JSON, so prefer
+    # them over gzip when the client accepts them.
+    encodings = []
+
+    if zstandard is not None:
+        encodings.append("zstd")
+
+    if brotli is not None:
+        encodings.append("br")
+
+    encodings.append("gzip")
+
+    return encodings
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    '''
+        Optimization: Compresses a body with every supported encoding. Meant to be run
+        once when a cache entry is filled so that cache hits never pay for compression.
+    '''
+
+    if len(body) < MINIMUM_COMPRESSION_SIZE:
+        return {}
+
+    variants = {}
+
+    for encoding in get_supported_encodings():
+        if encoding == "zstd":
+            variants[encoding] = zstandard.ZstdCompressor(level = ZSTD_LEVEL).compress(body)
+
+        elif encoding == "br":
+            variants[encoding] = brotli.compress(body, quality = BROTLI_QUALITY)
+
+        else:
+            # mtime = 0 keeps the output deterministic.
+            variants[encoding] = gzip.compress(body, compresslevel = GZIP_LEVEL, mtime = 0)
+
+    return variants
+
+def choose_encoding(accept_encoding: str | None, available: list[str]) -> str | None:
+    '''
+        Picks the best of the available encodings for an Accept-Encoding header, or
+        None if the client should get the uncompressed body. Ex:
+
+            "gzip, br;q=0.8"  -->  gzip (highest q value wins)
+            "gzip, br"        -->  br   (ties go to our preference order)
+            "br;q=0"          -->  None (q=0 means "not acceptable")
+    '''
+
+    if not accept_encoding or not available:
+        return None
+
+    # Map each encoding the client listed to its q value (defaulting to 1).
+    q_values: dict[str, float] = {}
+
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+
+        if coding:
+            q_values[coding] = q
+
+    # Anything the client didn't list explicitly falls back to the wildcard, if given.
+    wildcard_q = q_values.get("*", 0.0)
+
+    best_encoding = None
+    best_q = 0.0
+
+    # available is in our preference order, so strictly greater keeps the earlier
+    # encoding on ties.
+    for encoding in available:
+        q = q_values.get(encoding, wildcard_q)
+        if q > best_q:
+            best_encoding = encoding
+            best_q = q
+
+    return best_encoding
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    '''
+        Optimization: Gzips a streamed body chunk by chunk, so a large export is 
+        compressed as it's sent rather than built and compressed in memory first. Each 
+        chunk is flushed (Z_SYNC_FLUSH) so the client can decompress everything it's 
+        received so far.
+    '''
+
+    compressor = zlib.compressobj(STREAMING_GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
@@ -10,6 +10,11 @@ class BaseConfig(BaseSettings):
     # Database
     database_url: str = Field(..., alias="DATABASE_URL")
 
+    # Connections each engine keeps open, and how many more it may open under load.
+    # The DB executor gets one thread per connection (see src/db/db_executor.py).
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+
     # Auth
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     jwt_expires_in: int = Field(3600, alias="JWT_EXPIRES_IN")
@@ -23,9 +28,19 @@ class BaseConfig(BaseSettings):
     # Rate limiting
     rate_limit: str = Field("100/minute", alias="RATE_LIMIT")
 
-    # Cache
+    # Cache. Set to share cached responses between workers (see
+    # src/cache/cache_backend.py): sqlite:///path.db for the workers on one machine, or
+    # redis:// (rediss://) for every machine. Separate several with commas to stack them,
+    # checked in order (ex: sqlite:////dev/shm/tea_cache.db,redis://cache:6379/0), and
+    # percent-encode any commas in a password. Unset, each worker only caches locally.
     cache_url: Optional[str] = Field(None, alias="CACHE_URL")
 
+    # Threads for calls to the shared cache (see src/cache/cache_executor.py).
+    cache_executor_workers: int = Field(4, alias="CACHE_EXECUTOR_WORKERS")
+
+    # Serve tea profile lists from an in-memory catalog instead of the database
+    catalog_enabled: bool = Field(False, alias="CATALOG_ENABLED")
+
     # Logging
     log_level: str = Field("INFO", alias="LOG_LEVEL")
 
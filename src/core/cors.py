@@ -10,5 +10,7 @@ def configure_cors(app: FastAPI):
         allow_credentials = True,
         allow_methods = ["*"],
         allow_headers = ["*"],
-        expose_headers=["ETag", "Last-Modified"],  # important for caching
+        # ETag and Last-Modified are important for caching. X-Next-Cursor carries the
+        # cursor for the next page of tea profiles.
+        expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
     )
\ No newline at end of file
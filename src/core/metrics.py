@@ -0,0 +1,235 @@
+# Optimization: In-process metrics that are flushed to Sentry in batches. Recording a
+# metric on a hot path (every cache lookup, every request) only bumps a number in a
+# dict owned by the current thread, under that thread's own lock (which only a flush
+# ever contends for): no event construction, no transport. Every flush_interval
+# seconds, flush merges every thread's numbers and sends one summarized value per
+# metric to Sentry:
+#
+#     count:    the total since the last flush
+#     gauge:    the latest value
+#     observe:  a histogram, sent as its count, mean, p50, p95, and max
+#
+# Histograms use fixed buckets (see HISTOGRAM_BUCKETS), so they take the same memory no
+# matter how many values are observed. Their percentiles are the upper bound of the
+# bucket the percentile falls in.
+#
+# Metrics can carry attributes (ex: {"route": "/api/v1/tea_profiles"}), which become
+# Sentry metric attributes. Keep them low cardinality, since each distinct set of
+# attributes is its own metric.
+
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Mapping
+
+from sentry_sdk import metrics
+
+# Upper bounds of the histogram buckets. Suited to latencies in milliseconds.
+HISTOGRAM_BUCKETS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf")
+)
+
+# How often the app's lifespan flushes metrics to Sentry.
+FLUSH_INTERVAL_SECONDS = 10
+
+logger = logging.getLogger(__name__)
+
+MetricKey = tuple[str, tuple[tuple[str, Any], ...]]
+
+def _get_key(name: str, attributes: Mapping[str, Any] | None) -> MetricKey:
+    return name, tuple(sorted(attributes.items())) if attributes else ()
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction: float) -> float:
+        target = fraction * self.count
+        seen = 0
+
+        for bound, bucket_count in zip(HISTOGRAM_BUCKETS, self.buckets):
+            seen += bucket_count
+
+            if seen >= target and bucket_count:
+                # The last bucket has no upper bound, so use the largest value seen.
+                return min(bound, self.max)
+
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": self.max,
+        }
+
+class _ThreadBuffer:
+    '''The metrics recorded by one thread since the last flush.'''
+
+    def __init__(self):
+        # Held while recording and while a flush swaps the dicts out, so that nothing is
+        # written to a dict after it has been flushed.
+        self.lock = threading.Lock()
+        self.counters: dict[MetricKey, float] = {}
+        self.gauges: dict[MetricKey, float] = {}
+        self.histograms: dict[MetricKey, Histogram] = {}
+
+class MetricsAggregator:
+    def __init__(self):
+        self._local = threading.local()
+
+        # Every thread's buffer. The lock is only taken when a thread records its first
+        # metric and when flushing, never on the hot path.
+        self._buffers: list[_ThreadBuffer] = []
+        self._buffers_lock = threading.Lock()
+
+        # Running totals since startup and the last flushed window, for /debug/metrics.
+        self.totals: dict[MetricKey, float] = {}
+        self.last_flush: dict[str, Any] = {"counters": {}, "gauges": {}, "histograms": {}}
+
+    def _get_buffer(self) -> _ThreadBuffer:
+        buffer = getattr(self._local, "buffer", None)
+
+        if buffer is None:
+            buffer = self._local.buffer = _ThreadBuffer()
+
+            with self._buffers_lock:
+                self._buffers.append(buffer)
+
+        return buffer
+
+    def count(self, name: str, value: float = 1,
+        attributes: Mapping[str, Any] | None = None) -> None:
+
+        buffer = self._get_buffer()
+        key = _get_key(name, attributes)
+
+        with buffer.lock:
+            buffer.counters[key] = buffer.counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float,
+        attributes: Mapping[str, Any] | None = None) -> None:
+
+        buffer = self._get_buffer()
+        key = _get_key(name, attributes)
+
+        with buffer.lock:
+            buffer.gauges[key] = value
+
+    def observe(self, name: str, value: float,
+        attributes: Mapping[str, Any] | None = None) -> None:
+
+        buffer = self._get_buffer()
+        key = _get_key(name, attributes)
+
+        with buffer.lock:
+            histogram = buffer.histograms.get(key)
+            if histogram is None:
+                histogram = buffer.histograms[key] = Histogram()
+
+            histogram.observe(value)
+
+    def flush(self) -> dict[str, Any]:
+        '''Merges every thread's metrics, sends them to Sentry, and returns the summary.'''
+
+        counters: dict[MetricKey, float] = {}
+        gauges: dict[MetricKey, float] = {}
+        histograms: dict[MetricKey, Histogram] = {}
+
+        with self._buffers_lock:
+            buffers = list(self._buffers)
+
+        for buffer in buffers:
+            # Swap in empty dicts and merge the old ones under the buffer's lock, so that
+            # a worker thread (ex: one of db_executor's) recording at the same time
+            # neither loses its update nor changes a dict we're iterating over.
+            with buffer.lock:
+                buffer_counters, buffer.counters = buffer.counters, {}
+                buffer_gauges, buffer.gauges = buffer.gauges, {}
+                buffer_histograms, buffer.histograms = buffer.histograms, {}
+
+                for key, value in buffer_counters.items():
+                    counters[key] = counters.get(key, 0) + value
+
+                gauges.update(buffer_gauges)
+
+                for key, histogram in buffer_histograms.items():
+                    histograms.setdefault(key, Histogram()).merge(histogram)
+
+        for (name, attributes), value in counters.items():
+            metrics.count(name, value, attributes = dict(attributes) or None)
+            self.totals[(name, attributes)] = self.totals.get((name, attributes), 0) + value
+
+        for (name, attributes), value in gauges.items():
+            metrics.gauge(name, value, attributes = dict(attributes) or None)
+
+        summaries = {key: histogram.summary() for key, histogram in histograms.items()}
+
+        for (name, attributes), summary in summaries.items():
+            for statistic, value in summary.items():
+                metrics.gauge(f"{name}.{statistic}", value, attributes = dict(attributes) or None)
+
+        self.last_flush = {
+            "counters": {_format_key(key): value for key, value in counters.items()},
+            "gauges": {_format_key(key): value for key, value in gauges.items()},
+            "histograms": {_format_key(key): value for key, value in summaries.items()},
+        }
+        return self.last_flush
+
+    async def flush_periodically(self, interval_seconds: float = FLUSH_INTERVAL_SECONDS):
+        '''Runs flush every interval_seconds until cancelled (see the app's lifespan).'''
+
+        while True:
+            await asyncio.sleep(interval_seconds)
+
+            # One failed flush (ex: Sentry's transport raising) shouldn't stop every
+            # flush after it.
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush metrics.")
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "totals": {_format_key(key): value for key, value in self.totals.items()},
+            "last_flush": self.last_flush,
+        }
+
+    def clear(self) -> None:
+        with self._buffers_lock:
+            for buffer in self._buffers:
+                with buffer.lock:
+                    buffer.counters, buffer.gauges, buffer.histograms = {}, {}, {}
+
+        self.totals = {}
+        self.last_flush = {"counters": {}, "gauges": {}, "histograms": {}}
+
+# Ex: ("http.request.duration_ms", (("route", "/health"),)) -->
+#     "http.request.duration_ms{route=/health}"
+def _format_key(key: MetricKey) -> str:
+    name, attributes = key
+
+    if not attributes:
+        return name
+
+    return f"{name}{{{','.join(f'{k}={v}' for k, v in attributes)}}}"
+
+metrics_aggregator = MetricsAggregator()
@@ -0,0 +1,51 @@
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.metrics import metrics_aggregator
+
+# Records how long every HTTP request takes and how many of each status class
+# (2xx, 3xx, ...) each route returns, in the in-process metrics aggregator (see
+# src/core/metrics.py). Requests are grouped by route template, ex: 
+# /api/v1/tea_profiles/{tea_profile_id}, so the number of metrics stays small.
+#
+# This is a plain ASGI middleware rather than a BaseHTTPMiddleware, which would wrap
+# every request and response in extra tasks and streams.
+class RequestMetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+
+        finally:
+            # The router fills in the matched route while handling the request.
+            route = scope.get("route")
+            attributes = {"route": getattr(route, "path", "unmatched")}
+
+            metrics_aggregator.observe(
+                "http.request.duration_ms", (time.perf_counter() - start) * 1000, attributes
+            )
+            metrics_aggregator.count(
+                "http.requests", attributes = {**attributes, "status": f"{status_code // 100}xx"}
+            )
+
+def configure_request_metrics(app: FastAPI):
+    app.add_middleware(RequestMetricsMiddleware)
@@ -1,5 +1,9 @@
+from contextlib import nullcontext
+from typing import ContextManager
+
 import sentry_sdk
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+from sentry_sdk.tracing_utils import has_tracing_enabled
 
 from src.core.config import settings
 
@@ -14,6 +18,8 @@ from src.core.config import settings
 # traces_sample_rate: Control performance tracing where 0.0 = disabled and 
 #     1.0 = capture all traces.
 def init_sentry():
+    global _tracing_enabled
+
     sentry_sdk.init(
         dsn = settings.sentry_dsn, # where to send events
         integrations = [
@@ -23,3 +29,17 @@ def init_sentry():
         traces_sample_rate = 0.0,  # will adjust  later
         enable_metrics = True,      # Lets us do metric.incr, .set
     )
+
+    _tracing_enabled = has_tracing_enabled(sentry_sdk.get_client().options)
+
+# Whether init_sentry turned on performance tracing.
+_tracing_enabled = False
+
+# Optimization: Spans on hot paths (like every cache lookup) cost time to build even when
+# nothing will ever be sent. This returns a real span only when tracing is on, and a
+# no-op context manager otherwise.
+def start_span(op: str, name: str) -> ContextManager:
+    if not _tracing_enabled:
+        return nullcontext()
+
+    return sentry_sdk.start_span(op = op, name = name)
@@ -0,0 +1,69 @@
+# Reads and bumps the dataset generations (see src/db/models/dataset_generations_model.py).
+
+import json
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from src.db.models.dataset_generations_model import DatasetGenerationModel
+
+# Insert the table's first generation, or add one to it. Postgres and SQLite (3.35+)
+# share this syntax.
+BUMP_GENERATION_SQL = text("""
+    INSERT INTO dataset_generations (table_name, generation, updated_at)
+    VALUES (:table_name, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (table_name) DO UPDATE SET
+        generation = dataset_generations.generation + 1,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING generation
+""")
+
+# The Postgres channel that new generations are announced on (see
+# DatasetGenerationTracker.listen in src/cache/dataset_generation.py).
+DATASET_GENERATION_CHANNEL = "dataset_generations"
+
+NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+def get_notify_payload(table_name: str, generation: int) -> str:
+    return json.dumps({"table": table_name, "generation": generation})
+
+def parse_notify_payload(payload: str) -> tuple[str, int]:
+    '''Reads a payload from get_notify_payload. Raises ValueError if it's malformed.'''
+
+    try:
+        data = json.loads(payload)
+        return str(data["table"]), int(data["generation"])
+
+    except (TypeError, KeyError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Invalid dataset generation payload {payload!r}.") from exc
+
+def bump_dataset_generation(session: Session, table_name: str) -> int:
+    '''
+        Adds one to table_name's generation in the session's transaction and returns
+        the new generation. Call it in the same transaction as the change to the table,
+        so that the new generation is committed (and seen) exactly when the data is.
+    '''
+
+    generation = session.execute(BUMP_GENERATION_SQL, {"table_name": table_name}).scalar_one()
+
+    # Optimization: On Postgres, also announce the new generation to every app instance
+    # listening on the channel, so they drop their cached responses right away instead
+    # of at their next poll. Postgres holds notifications until the transaction commits
+    # (and drops them if it rolls back), so listeners never hear about data they can't
+    # see yet.
+    if session.bind.dialect.name == "postgresql":
+        session.execute(NOTIFY_SQL, {
+            "channel": DATASET_GENERATION_CHANNEL,
+            "payload": get_notify_payload(table_name, generation),
+        })
+
+    return generation
+
+def get_dataset_generations(session: Session) -> dict[str, int]:
+    '''Returns the generation of every table that has one.'''
+
+    rows = session.execute(
+        select(DatasetGenerationModel.table_name, DatasetGenerationModel.generation)
+    )
+
+    return {table_name: generation for table_name, generation in rows}
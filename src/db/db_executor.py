@@ -0,0 +1,121 @@
+# Optimization: A dedicated, bounded thread pool for blocking database work (the sync
+# engine's health checks, catalog rebuilds, and anything else that still goes through a
+# sync Session). Running that work inline in an async route blocks the event loop, so
+# one slow query would freeze every other request on the worker, including /health
+# and cache hits. Starlette's default threadpool isn't a good home either: it's shared
+# with every sync route and dependency, so a burst of slow queries could starve them.
+#
+# The pool has one thread per connection the sync engine can hand out (pool_size +
+# max_overflow). Any more threads would just block inside the connection pool waiting
+# for a connection. Work that can't start right away waits in the executor's queue
+# instead, where we can see it: stats() reports the queue depth and how long work
+# waited for a thread.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from src.core.config import settings
+
+T = TypeVar("T")
+
+class DBExecutor:
+    '''Runs blocking database calls on a bounded thread pool and tracks how they queue.'''
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "db-executor"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+
+        # Created on first use, so that the executor can start again after shutdown
+        # (ex: when the app's lifespan runs more than once in a process).
+        self._executor: ThreadPoolExecutor | None = None
+
+        # Counters are updated from both the event loop and the worker threads.
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers = self.max_workers,
+                    thread_name_prefix = self.thread_name_prefix
+                )
+
+            return self._executor
+
+    def _run_timed(self, submitted_at: float, func: Callable[..., T], *args, **kwargs) -> T:
+        wait = time.perf_counter() - submitted_at
+
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def submit(self, func: Callable[..., T], *args, **kwargs) -> Future[T]:
+        '''
+            Starts func(*args, **kwargs) on the pool without waiting for it, ex: from a
+            callback that may not be running on the event loop.
+        '''
+
+        executor = self._get_executor()
+
+        with self._lock:
+            self._queued += 1
+
+        return executor.submit(
+            partial(self._run_timed, time.perf_counter(), func, *args, **kwargs)
+        )
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        '''Awaits func(*args, **kwargs) on the pool, leaving the event loop free meanwhile.'''
+
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            # Every finished call started, so it's counted in _total_wait. So are the
+            # running ones.
+            started = self._completed + self._running
+
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "average_wait_ms": self._total_wait / started * 1000 if started else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._completed = 0
+            self._total_wait = 0.0
+            self._max_wait = 0.0
+
+    def shutdown(self) -> None:
+        '''Waits for running calls to finish and stops the threads.'''
+
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait = True)
+
+db_executor = DBExecutor(max_workers = settings.db_pool_size + settings.db_max_overflow)
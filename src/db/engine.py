@@ -1,7 +1,20 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.core.config import settings
+from src.utils.sql_dialect_utils import get_async_database_url
+
+# How many connections each engine's pool may hand out at once. SQLite's in-memory
+# pools don't take these options, so they only apply to server databases.
+if make_url(settings.database_url).get_backend_name() == "sqlite":
+    POOL_OPTIONS: dict[str, int] = {}
+else:
+    POOL_OPTIONS = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+    }
 
 # Create a connection to the PostgreSQL database. engine is an
 # instance of the SQLAlchemy engine. SQLAlchemy will use this
@@ -11,7 +24,8 @@ engine = create_engine(
     settings.database_url, 
     echo = True,
     pool_pre_ping = True, # test connections before using them
-    pool_recycle = 300 # force SQLAlchemy to drop stale connections
+    pool_recycle = 300, # force SQLAlchemy to drop stale connections
+    **POOL_OPTIONS
 )
 
 # Create session factory so sessions can talk to the database.
@@ -20,3 +34,21 @@ engine = create_engine(
 # when we want to add new data, query existing data, or commit changes
 # to the database.
 SessionLocal = sessionmaker(bind = engine)
+
+# Optimization: The same database through an async driver (asyncpg for PostgreSQL, 
+# aiosqlite for SQLite). The routes await their queries on this engine, so while one 
+# request waits on the database the event loop serves other requests instead of
+# blocking the whole worker. The sync engine above is still used by ingestion, 
+# migrations, scripts, and health checks.
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    echo = True,
+    pool_pre_ping = True,
+    pool_recycle = 300,
+    **POOL_OPTIONS
+)
+
+# expire_on_commit = False keeps loaded attributes readable after a commit. With an 
+# AsyncSession, reading an expired attribute would need an implicit (and disallowed)
+# round trip to the database.
+AsyncSessionLocal = async_sessionmaker(bind = async_engine, expire_on_commit = False)
@@ -0,0 +1,99 @@
+# Full-text search over tea profiles. This lives outside of the mapped columns in
+# TeaProfileModel because each dialect stores the search index differently:
+#
+#     PostgreSQL: A generated tsvector column, search_vector, kept up to date by
+#                 PostgreSQL itself and served by a GIN index. Matches are ranked
+#                 with ts_rank.
+#
+#     SQLite:     An FTS5 virtual table, tea_profiles_fts, that indexes the same
+#                 columns and is kept up to date by triggers. Matches are ranked
+#                 with bm25. This is what the unit tests run against.
+#
+# Both weight matches by column: name > alternative_names > processing >
+# cultural_significance.
+#
+# The DDL below runs when tea_profiles is first created with Base.metadata.create_all.
+# Existing PostgreSQL databases get the same objects from the Alembic migration that
+# added full-text search.
+
+from sqlalchemy import DDL, Table, event
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+FTS_TABLE_NAME = "tea_profiles_fts"
+
+# The columns that are searched, from most to least important.
+SEARCH_COLUMNS = ["name", "alternative_names", "processing", "cultural_significance"]
+
+# Relative bm25 weights for SEARCH_COLUMNS in SQLite (roughly PostgreSQL's A, B, C, D).
+FTS_COLUMN_WEIGHTS = [10.0, 5.0, 2.0, 1.0]
+
+# Generated columns can only use immutable functions and array_to_string isn't marked
+# immutable, so wrap it in a function that is.
+POSTGRES_FULL_TEXT_SEARCH_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION tea_profiles_array_to_text(text[]) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT array_to_string($1, ' ') $$
+    """,
+    f"""
+    ALTER TABLE tea_profiles ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig,
+            coalesce(tea_profiles_array_to_text(alternative_names::text[]), '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(processing, '')), 'C') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(cultural_significance, '')), 'D')
+    ) STORED
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS ix_tea_profiles_{SEARCH_VECTOR_COLUMN}
+    ON tea_profiles USING GIN ({SEARCH_VECTOR_COLUMN})
+    """,
+]
+
+_fts_columns = ", ".join(SEARCH_COLUMNS)
+_new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+_old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+
+# content='tea_profiles' makes this an external content table: FTS5 only stores the
+# index and reads the text itself from tea_profiles. The porter tokenizer stems words
+# similarly to PostgreSQL's english configuration. Deleting from an external content
+# table is done by inserting the special 'delete' command with the old values.
+SQLITE_FULL_TEXT_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE_NAME} USING fts5(
+        {_fts_columns},
+        content = 'tea_profiles', content_rowid = 'id', tokenize = 'porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_after_insert
+    AFTER INSERT ON tea_profiles BEGIN
+        INSERT INTO {FTS_TABLE_NAME} (rowid, {_fts_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_after_delete
+    AFTER DELETE ON tea_profiles BEGIN
+        INSERT INTO {FTS_TABLE_NAME} ({FTS_TABLE_NAME}, rowid, {_fts_columns})
+        VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE_NAME}_after_update
+    AFTER UPDATE ON tea_profiles BEGIN
+        INSERT INTO {FTS_TABLE_NAME} ({FTS_TABLE_NAME}, rowid, {_fts_columns})
+        VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE_NAME} (rowid, {_fts_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+]
+
+def register_full_text_search_ddl(table: Table) -> None:
+    '''Creates the dialect's full-text search objects whenever table is created.'''
+
+    for statement in POSTGRES_FULL_TEXT_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect = "postgresql"))
+
+    for statement in SQLITE_FULL_TEXT_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect = "sqlite"))
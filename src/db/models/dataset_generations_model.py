@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.base import Base
+
+
+# One row per ingested table, counting how many times its data has changed. Cache keys
+# and ETags include the generation (see src/cache/dataset_generation.py), so bumping it
+# makes every cached response built from the old data unreachable at once.
+class DatasetGenerationModel(Base):
+    __tablename__ = "dataset_generations"
+
+    # ex: tea_profiles
+    table_name: Mapped[str] = mapped_column(String, primary_key = True)
+
+    # Starts at 1 with the first ingestion. Tables without a row are at generation 0.
+    generation: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+
+    # When the generation was last bumped.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone = True), nullable = False, server_default = func.now()
+    )
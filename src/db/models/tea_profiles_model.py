@@ -1,13 +1,22 @@
-from sqlalchemy import Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.db.base import Base
 from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
+from src.db.full_text_search import register_full_text_search_ddl
+from src.db.trigram_indexes import register_trigram_index_ddl
+from src.db.normalized_arrays import (
+    get_normalized_column_name, register_normalized_array_index_ddl,
+    register_normalized_array_listeners
+)
 from src.constants.tea_profiles_constants import (
     TeaProfileModelFields, REQUIRED_TEA_PROFILE_MODEL_FIELDS
 )
+from src.db.row_versions import register_row_version_listeners
 from src.constants.model_metadata_constants import (
-    DELIMITER_INFO_DICT
+    DELIMITER_INFO_DICT, NORMALIZED_FROM_KEY, ROW_VERSION_INFO_DICT
 )
 
 
@@ -15,6 +24,21 @@ def is_nullable(field: str) -> bool:
     return field not in REQUIRED_TEA_PROFILE_MODEL_FIELDS   
 
 
+def normalized_array_column(source_field: str):
+    '''
+        A lowercased, trimmed, de-duplicated copy of an array column, used for filtering
+        (see src/db/normalized_arrays.py). It's deferred so that it's never loaded 
+        unless asked for by name, since the API doesn't return it.
+    '''
+    return mapped_column(
+        SQLiteCompatibleArray(normalize = True),
+        name = get_normalized_column_name(source_field),
+        nullable = True,
+        deferred = True,
+        info = {NORMALIZED_FROM_KEY: source_field}
+    )
+
+
 # SQLAlchemy blueprint for database table. This schema defines how data is stored in the database.
 class TeaProfileModel(Base):
     # SQLAlchemy needs this dunder to be called tablename to do its mapping.
@@ -149,6 +173,60 @@ class TeaProfileModel(Base):
         info = DELIMITER_INFO_DICT
     )
 
+    # Normalized copies of the array columns above for index-backed filtering. These
+    # are derived data: they're filled in automatically and never returned by the API.
+    alternative_names_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.ALTERNATIVE_NAMES
+    )
+    cultivars_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.CULTIVARS
+    )
+    subregions_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.SUBREGIONS
+    )
+    liquor_appearance_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.LIQUOR_APPEARANCE
+    )
+    liquor_aroma_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.LIQUOR_AROMA
+    )
+    liquor_taste_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.LIQUOR_TASTE
+    )
+    liquor_body_mouthfeel_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.LIQUOR_BODY_MOUTHFEEL
+    )
+    body_effect_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.BODY_EFFECT
+    )
+    dry_leaf_appearance_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.DRY_LEAF_APPEARANCE
+    )
+    dry_leaf_aroma_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.DRY_LEAF_AROMA
+    )
+    wet_leaf_appearance_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.WET_LEAF_APPEARANCE
+    )
+    wet_leaf_aroma_normalized: Mapped[list[str] | None] = normalized_array_column(
+        TeaProfileModelFields.WET_LEAF_AROMA
+    )
+
+    # Row versions (see src/db/row_versions.py): when the row's content last changed and
+    # a hash of it, which ETags and Last-Modified are built from. Like the normalized
+    # columns, they're filled in automatically and never returned by the API.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone = True),
+        nullable = False,
+        server_default = func.now(),
+        info = ROW_VERSION_INFO_DICT
+    )
+    content_hash: Mapped[str | None] = mapped_column(
+        String(32),
+        nullable = True,
+        info = ROW_VERSION_INFO_DICT
+    )
+
     # SQL:
     #
     # CREATE TABLE tea_profiles (
@@ -177,8 +255,23 @@ class TeaProfileModel(Base):
     #     dry_leaf_aroma TEXT[],
 
     #     wet_leaf_appearance TEXT[],
-    #     wet_leaf_aroma TEXT[]
+    #     wet_leaf_aroma TEXT[],
+    #
+    #     updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    #     content_hash VARCHAR(32)
     # );
     #
     #
     # Note that SERIAL is an auto-incrementing INTEGER
+
+
+# Full-text search objects (see src/db/full_text_search.py), trigram indexes (see 
+# src/db/trigram_indexes.py), and normalized array indexes (see 
+# src/db/normalized_arrays.py) are created alongside the table.
+register_full_text_search_ddl(TeaProfileModel.__table__)
+register_trigram_index_ddl(TeaProfileModel.__table__)
+register_normalized_array_index_ddl(TeaProfileModel.__table__)
+register_normalized_array_listeners(TeaProfileModel)
+
+# updated_at and content_hash follow every ORM write (see src/db/row_versions.py).
+register_row_version_listeners(TeaProfileModel)
@@ -0,0 +1,67 @@
+# Normalized shadow columns for the array columns of a model. Each array column that
+# clients filter on, ex: liquor_taste, has a liquor_taste_normalized twin holding the
+# same values lowercased, trimmed, and de-duplicated (see normalize_array). Filters
+# compare against the twin, so a filter for "Malt" finds a tea whose liquor_taste is
+# [" malt"], without lowercasing the whole array on every query.
+#
+# The twins are kept up to date in three places:
+#
+#     ORM:       Assigning to the source attribute (including through the model's
+#                constructor) also assigns the twin. See register_normalized_array_listeners.
+#
+#     Ingest:    load_and_clean_csv fills in the twins before rows reach the staging
+#                table, since the upsert is raw SQL that skips the ORM.
+#
+#     Storage:   SQLiteCompatibleArray(normalize = True) normalizes again when values are
+#                written, so a twin can never hold un-normalized values.
+#
+# In PostgreSQL each twin has a GIN index, and filters use array containment (@>),
+# which the GIN index answers directly. Filtering on several notes at once, ex:
+# liquor_taste=malt,honey, is a single containment check, and filters on different
+# columns are combined by PostgreSQL as an intersection of index lookups.
+
+from sqlalchemy import DDL, Table, event
+
+from src.constants.model_metadata_constants import NORMALIZED_FROM_KEY
+from src.db.types.sqlite_compatible_array import normalize_array
+
+NORMALIZED_COLUMN_SUFFIX = "_normalized"
+
+def get_normalized_column_name(source_column_name: str) -> str:
+    return f"{source_column_name}{NORMALIZED_COLUMN_SUFFIX}"
+
+def get_normalized_array_columns(table: Table) -> dict[str, str]:
+    '''Maps each source column name to the name of its normalized twin.'''
+
+    return {
+        column.info[NORMALIZED_FROM_KEY]: column.name
+        for column in table.columns
+        if NORMALIZED_FROM_KEY in column.info
+    }
+
+def get_normalized_array_index_name(normalized_column_name: str) -> str:
+    return f"ix_tea_profiles_{normalized_column_name}_gin"
+
+def register_normalized_array_index_ddl(table: Table) -> None:
+    '''Creates a GIN index on each normalized column whenever table is created in PostgreSQL.'''
+
+    for normalized_column_name in get_normalized_array_columns(table).values():
+        statement = f"""
+            CREATE INDEX IF NOT EXISTS {get_normalized_array_index_name(normalized_column_name)}
+            ON {table.name} USING GIN ({normalized_column_name})
+        """
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect = "postgresql"))
+
+def register_normalized_array_listeners(model) -> None:
+    '''Keeps each normalized column in sync when its source attribute is assigned.'''
+
+    for source_column_name, normalized_column_name in get_normalized_array_columns(
+        model.__table__
+    ).items():
+
+        # Bind normalized_column_name now, since the listener runs after the loop ends.
+        def sync_normalized_column(target, value, oldvalue, initiator,
+            normalized_column_name = normalized_column_name):
+            setattr(target, normalized_column_name, normalize_array(value))
+
+        event.listen(getattr(model, source_column_name), "set", sync_normalized_column)
@@ -0,0 +1,158 @@
+# Layer 3 (Database/SQLAlchemy/bottomost layer): This is where error handling starts. We
+# catch raw SQLAlchemy errors and convert them into the domain errors that layer 2 deals
+# with. This layer ensures raw SQL errors don't reach layer 1.
+
+from __future__ import annotations
+
+from typing import AsyncIterator, List, Mapping, Any, Sequence
+from sqlalchemy import Row
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.errors import (
+    TeaProfileNotFoundError,
+    TeaProfileQueryError,
+)
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.repositories.tea_profiles_statements import (
+    get_by_ids_statement, get_list_statement, get_facets_statement, count_facets,
+    get_search_statement, get_export_statement
+)
+from src.utils.sql_dialect_utils import get_sql_from_dialect
+from src.utils.facet_utils import FacetCounts
+from src.constants.tea_profiles_constants import (
+    FACET_TEA_PROFILE_MODEL_FIELDS, DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS,
+    MAX_DESCRIPTOR_FACET_VALUES, EXPORT_BATCH_SIZE
+)
+
+# The async twin of TeaProfilesRepository, with the same methods, statements (see
+# src/db/repositories/tea_profiles_statements.py), and errors.
+#
+# Optimization: Every query is awaited on an AsyncSession, so the event loop is free to
+# serve other requests while this one waits on the database. With the sync repository,
+# each query blocked the whole worker until it came back.
+#
+# Only attributes that were loaded by the query can be read from the returned models.
+# Lazy loading (ex: reading a column left out by columns) would need an implicit
+# round trip, which an AsyncSession doesn't allow.
+class AsyncTeaProfilesRepository:
+
+    # Store database session.
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    @property
+    def _dialect(self) -> str:
+        return get_sql_from_dialect(self._session, "postgresql", "sqlite")
+
+    # Get a tea profile with a particular id.
+    async def get_by_id(self, tea_profile_id: int) -> TeaProfileModel:
+
+        try:
+            tea_profile = await self._session.get(TeaProfileModel, tea_profile_id)
+
+            if tea_profile is None:
+                raise TeaProfileNotFoundError(
+                    f"A tea profile with id {tea_profile_id} was not found.",
+                    details={"id": tea_profile_id}
+                )
+
+            return tea_profile
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to fetch tea profile",
+                details={"id": tea_profile_id},
+            ) from exc
+
+    # Get the tea profiles with any of the given ids in a single round trip.
+    async def get_by_ids(self, tea_profile_ids: Sequence[int]) -> List[TeaProfileModel]:
+
+        if not tea_profile_ids:
+            return []
+
+        try:
+            return list(await self._session.scalars(get_by_ids_statement(tea_profile_ids)))
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to fetch tea profiles",
+                details={"ids": list(tea_profile_ids)},
+            ) from exc
+
+    # Get multiple tea profiles (see TeaProfilesRepository.list).
+    async def list(self, filters: Mapping[str, Any],
+        limit: int = 100, offset: int = 0, after_id: int | None = None,
+        columns: Sequence[str] | None = None) -> List[TeaProfileModel]:
+
+        try:
+            statement = get_list_statement(
+                filters, self._dialect, limit, offset, after_id, columns
+            )
+
+            return list(await self._session.scalars(statement))
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to list tea profiles",
+                details={
+                    "filters": filters, "limit": limit, "offset": offset, "after_id": after_id,
+                    "columns": columns,
+                },
+            ) from exc
+
+    # Count facets of the tea profiles matching filters (see TeaProfilesRepository.facets).
+    async def facets(self, filters: Mapping[str, Any],
+        fields: Sequence[str] = FACET_TEA_PROFILE_MODEL_FIELDS,
+        descriptor_fields: Sequence[str] = DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS,
+        max_descriptor_values: int = MAX_DESCRIPTOR_FACET_VALUES) -> FacetCounts:
+
+        try:
+            statement = get_facets_statement(filters, self._dialect, fields, descriptor_fields)
+            rows = (await self._session.execute(statement)).all()
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to count tea profile facets",
+                details={"filters": filters},
+            ) from exc
+
+        return count_facets(rows, fields, descriptor_fields, max_descriptor_values)
+
+    # Full-text search, best matches first (see TeaProfilesRepository.search).
+    async def search(self, query: str, limit: int = 100) -> List[TeaProfileModel]:
+
+        try:
+            search_statement = get_search_statement(query, self._dialect, limit)
+            if search_statement is None:
+                return []
+
+            statement, params = search_statement
+            return list(await self._session.scalars(statement, params))
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to search tea profiles",
+                details={"query": query, "limit": limit},
+            ) from exc
+
+    # Every tea profile in batches (see TeaProfilesRepository.stream).
+    #
+    # Optimization: The next batch is only fetched when the caller asks for it. An
+    # export that streams to a slow client therefore waits on the client between
+    # batches, instead of reading ahead and buffering the table in memory.
+    async def stream(self, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[Sequence[Row]]:
+
+        try:
+            result = await self._session.stream(
+                get_export_statement().execution_options(yield_per = batch_size)
+            )
+
+            async for partition in result.partitions():
+                yield partition
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to export tea profiles",
+                details={"batch_size": batch_size},
+            ) from exc
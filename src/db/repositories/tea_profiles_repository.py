@@ -4,21 +4,28 @@
 
 from __future__ import annotations
 
-from typing import List, Mapping, Any
+from typing import Iterator, List, Mapping, Any, Sequence
 # later, once the user can add their own tea profiles: from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Row
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy import String, Text, func
 
-from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
 # later, once the user can add their own tea profiles: TeaProfileConflictError
 from src.app.errors import (
     TeaProfileNotFoundError,
     TeaProfileQueryError,
 )
 from src.db.models.tea_profiles_model import TeaProfileModel 
+from src.db.repositories.tea_profiles_statements import (
+    get_by_ids_statement, get_list_statement, get_facets_statement, count_facets,
+    get_search_statement, get_export_statement
+)
 from src.utils.sql_dialect_utils import get_sql_from_dialect
+from src.utils.facet_utils import FacetCounts
+from src.constants.tea_profiles_constants import (
+    FACET_TEA_PROFILE_MODEL_FIELDS, DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS,
+    MAX_DESCRIPTOR_FACET_VALUES, EXPORT_BATCH_SIZE
+)
 
 # A repository is a class tasked with talking to a database and returning domain objects. It
 # should be the only place on the backend that knows how to query the DB, insert/update/delete,
@@ -32,6 +39,12 @@ class TeaProfilesRepository:
     def __init__(self, session: Session) -> None:
         self._session = session
 
+    # "postgresql" or "sqlite", which picks between the dialect-specific filters 
+    # (see src/db/repositories/tea_profiles_statements.py).
+    @property
+    def _dialect(self) -> str:
+        return get_sql_from_dialect(self._session, "postgresql", "sqlite")
+
     # Get a tea profile with a particular id.
     def get_by_id(self, tea_profile_id: int) -> TeaProfileModel:
 
@@ -52,73 +65,80 @@ class TeaProfilesRepository:
                 details={"id": tea_profile_id},
             ) from exc
 
-    # Get multiple tea profiles.
+    # Get the tea profiles with any of the given ids in a single round trip. Ids that
+    # don't exist are simply left out of the result, in no particular order.
+    def get_by_ids(self, tea_profile_ids: Sequence[int]) -> List[TeaProfileModel]:
+
+        if not tea_profile_ids:
+            return []
+
+        try:
+            return list(self._session.scalars(get_by_ids_statement(tea_profile_ids)))
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to fetch tea profiles",
+                details={"ids": list(tea_profile_ids)},
+            ) from exc
+
+    # Get multiple tea profiles. after_id is the keyset (cursor) position: when it's
+    # set, only rows with an id greater than it are returned. columns limits which 
+    # columns are selected (all of them by default).
     def list(self, filters: Mapping[str, Any], 
-        limit: int = 100, offset: int = 0) -> List[TeaProfileModel]:
+        limit: int = 100, offset: int = 0, after_id: int | None = None,
+        columns: Sequence[str] | None = None) -> List[TeaProfileModel]:
 
         try:        
-            # Get a query object that will allow us to ask the database for data,
-            # extracting it as ORM objects of type TeaProfileModel.
-            query = self._session.query(TeaProfileModel)
-
-            # field_name will be something like "country_of_origin" and value 
-            # will be something like "China". Each loop will further refine the query. 
-            for field_name, value in filters.items():
-                column = getattr(TeaProfileModel, field_name)
-
-                # Normalize to lowercase for case-insensitive matching
-                # and split comma-separated filters into multiple values
-                if isinstance(value, str):
-                    value = [v.strip().lower() for v in value.split(",")]
-                else:
-                    value = [str(v).lower() for v in value]
-
-                # ---------------------------------------------------------
-                # 1. ARRAY fields (PostgreSQL or SQLiteCompatibleArray)
-                # ---------------------------------------------------------
-
-                if isinstance(column.type, ARRAY) or isinstance(column.type, SQLiteCompatibleArray):
-                    # PostgreSQL: use ANY() with ILIKE
-                    if get_sql_from_dialect(self._session, "postgresql", "sqlite") == "postgresql":
-                        for v in value:
-                            query = query.filter(
-                                func.lower(column).any(v, operator="ilike")
-                            )
-                    else:
-                        # SQLite fallback: stored as JSON-like text --> substring match
-                        for v in value:
-                            query = query.filter(func.lower(column).like(f"%{v}%"))
-
-                # ---------------------------------------------------------
-                # 2. String fields: Do a case-insensitive substring match.
-                # ---------------------------------------------------------
-
-                elif isinstance(column.type, String) or isinstance(column.type, Text):
-                    for v in value:
-                        query = query.filter(func.lower(column).like(f"%{v}%"))
-
-                # ---------------------------------------------------------
-                # 3. Everything else: Look for an exact match.
-                # ---------------------------------------------------------
-
-                else:
-                    query = query.filter(column == value)
-
-            # Return "limit" number of rows starting on row "offset" that satisfy the query.
-            teas_profiles = query.offset(offset).limit(limit).all()
-
-            # In raw SQL, our queries would look something like this:
-            #
-            #     SELECT * FROM tea_profiles
-            #     WHERE oxidation_level = 'green' AND country_of_origin = 'China'
-            #     LIMIT 10 OFFSET 0;
-
-            return teas_profiles
+            statement = get_list_statement(
+                filters, self._dialect, limit, offset, after_id, columns
+            )
+
+            return list(self._session.scalars(statement))
         
         except SQLAlchemyError as exc:
             raise TeaProfileQueryError(
                 "Failed to list tea profiles",
-                details={"filters": filters, "limit": limit, "offset": offset},
+                details={
+                    "filters": filters, "limit": limit, "offset": offset, "after_id": after_id,
+                    "columns": columns,
+                },
+            ) from exc
+
+    # Count how many of the tea profiles matching filters have each value of fields
+    # and the most common values of descriptor_fields (see FacetCounts).
+    def facets(self, filters: Mapping[str, Any],
+        fields: Sequence[str] = FACET_TEA_PROFILE_MODEL_FIELDS,
+        descriptor_fields: Sequence[str] = DESCRIPTOR_FACET_TEA_PROFILE_MODEL_FIELDS,
+        max_descriptor_values: int = MAX_DESCRIPTOR_FACET_VALUES) -> FacetCounts:
+
+        try:
+            statement = get_facets_statement(filters, self._dialect, fields, descriptor_fields)
+            rows = self._session.execute(statement).all()
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to count tea profile facets",
+                details={"filters": filters},
+            ) from exc
+
+        return count_facets(rows, fields, descriptor_fields, max_descriptor_values)
+
+    # Full-text search over name, alternative names, processing, and cultural 
+    # significance, best matches first (see src/db/full_text_search.py).
+    def search(self, query: str, limit: int = 100) -> List[TeaProfileModel]:
+
+        try:
+            search_statement = get_search_statement(query, self._dialect, limit)
+            if search_statement is None:
+                return []
+
+            statement, params = search_statement
+            return list(self._session.scalars(statement, params))
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to search tea profiles",
+                details={"query": query, "limit": limit},
             ) from exc
 
     # later, once the user can add their own tea profiles: 
@@ -144,3 +164,25 @@ class TeaProfilesRepository:
     #             "Failed to create tea profile",
     #             details={"name": getattr(obj_in, "name", None)},
     #         ) from exc
+
+    # Get every tea profile, ordered by id, batch_size rows at a time. Each batch is a
+    # list of rows with the columns in EXPORT_COLUMNS.
+    #
+    # Optimization: yield_per streams the result through a server-side cursor in 
+    # PostgreSQL (SQLite steps through its results anyway), so only one batch is in 
+    # memory at a time, however many rows there are. Fetching everything at once 
+    # would hold the whole table in memory (twice, counting the driver's buffer).
+    def stream(self, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence[Row]]:
+
+        try:
+            result = self._session.execute(
+                get_export_statement().execution_options(yield_per = batch_size)
+            )
+
+            yield from result.partitions()
+
+        except SQLAlchemyError as exc:
+            raise TeaProfileQueryError(
+                "Failed to export tea profiles",
+                details={"batch_size": batch_size},
+            ) from exc
@@ -0,0 +1,375 @@
+# The SQL behind the tea profiles repositories. TeaProfilesRepository runs these
+# statements on a sync Session and AsyncTeaProfilesRepository awaits them on an
+# AsyncSession, so the two can never drift apart: a filter, index-friendly predicate,
+# or ordering changed here changes both.
+#
+# Everything here only builds statements and never touches a session. The dialect
+# ("postgresql" or "sqlite") is passed in, since a few filters differ between the two.
+
+from __future__ import annotations
+
+import re
+from typing import Any, Mapping, Sequence
+
+from sqlalchemy import (
+    CompoundSelect, Executable, Select, String, Text, func, literal, null, select, text,
+    type_coerce, union_all
+)
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from sqlalchemy.orm import load_only
+
+from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray, normalize_array
+from src.db.normalized_arrays import get_normalized_array_columns
+from src.constants.model_metadata_constants import DELIMITER_VALUE
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.utils.filter_utils import canonicalize_filters
+from src.utils.facet_utils import FacetCounts, sort_facet_counts
+from src.utils.model_utils import get_model_column_names, is_row_version_column
+from src.db.full_text_search import (
+    SEARCH_VECTOR_COLUMN, FTS_TABLE_NAME, FTS_COLUMN_WEIGHTS
+)
+
+# Maps each array column to its normalized twin, ex: liquor_taste --> liquor_taste_normalized
+NORMALIZED_ARRAY_COLUMNS = get_normalized_array_columns(TeaProfileModel.__table__) # type: ignore
+
+# updated_at and content_hash.
+ROW_VERSION_COLUMNS = [
+    column.name for column in TeaProfileModel.__table__.columns # type: ignore
+    if is_row_version_column(column)
+]
+
+# Character used to escape LIKE wildcards in user input (see _get_contains_pattern).
+LIKE_ESCAPE_CHARACTER = "\\"
+
+def _escape_like(value: str) -> str:
+    '''Escapes % and _ so that they match themselves rather than acting as wildcards.'''
+
+    return (
+        value.replace(LIKE_ESCAPE_CHARACTER, LIKE_ESCAPE_CHARACTER * 2)
+        .replace("%", f"{LIKE_ESCAPE_CHARACTER}%")
+        .replace("_", f"{LIKE_ESCAPE_CHARACTER}_")
+    )
+
+def _get_contains_pattern(value: str) -> str:
+    '''
+        Turns a filter value into a LIKE pattern that matches it anywhere in a string.
+        Ex: "100%" --> "%100\\%%"
+    '''
+
+    return f"%{_escape_like(value)}%"
+
+def _get_element_pattern(value: str) -> str:
+    '''
+        Turns a filter value into a LIKE pattern that matches it as a whole element of a
+        delimited list wrapped in delimiters. Ex: "malt" --> "%;malt;%", which matches
+        ";malt;honey;" but not ";malty;".
+    '''
+
+    return f"%{DELIMITER_VALUE}{_escape_like(value)}{DELIMITER_VALUE}%"
+
+# Narrow a statement down to the rows that match every filter. Shared by list and facets.
+def apply_filters(statement: Select, filters: Mapping[str, Any], dialect: str) -> Select:
+
+    # field_name will be something like "country_of_origin" and value
+    # will be something like ["china"]. Each loop will further refine the statement.
+    #
+    # Filter by the canonical form (lowercase, split on commas, de-duplicated, and
+    # sorted), the same one that cache keys are built from.
+    for field_name, value in canonicalize_filters(filters).items():
+        column = getattr(TeaProfileModel, field_name)
+
+        # ---------------------------------------------------------
+        # 1. ARRAY fields (PostgreSQL or SQLiteCompatibleArray)
+        # ---------------------------------------------------------
+
+        # Each value must match one of the array's elements exactly (ignoring
+        # case and surrounding whitespace). The comparison is against the
+        # column's normalized twin (see src/db/normalized_arrays.py), so the
+        # values are normalized the same way.
+        if isinstance(column.type, ARRAY) or isinstance(column.type, SQLiteCompatibleArray):
+            normalized_column = getattr(TeaProfileModel, NORMALIZED_ARRAY_COLUMNS[field_name])
+            value = normalize_array(value)
+
+            if not value:
+                continue
+
+            # Optimization: PostgreSQL: One array containment check for all of
+            # the values, ex: liquor_taste_normalized @> ARRAY['malt', 'honey'].
+            # The GIN index on the normalized column answers it without reading
+            # any rows that don't match.
+            if dialect == "postgresql":
+                statement = statement.where(
+                    normalized_column.op("@>")(array(value, type_ = String))
+                )
+
+            else:
+                # SQLite fallback: the array is stored as delimited text, ex:
+                # "malt;honey". Wrap it in delimiters, ";malt;honey;", so that each
+                # value can be matched as a whole element.
+                wrapped_column = (
+                    literal(DELIMITER_VALUE) + type_coerce(normalized_column, Text) +
+                    literal(DELIMITER_VALUE)
+                )
+                for v in value:
+                    statement = statement.where(wrapped_column.like(
+                        _get_element_pattern(v), escape = LIKE_ESCAPE_CHARACTER
+                    ))
+
+        # ---------------------------------------------------------
+        # 2. String fields: Do a case-insensitive substring match.
+        # ---------------------------------------------------------
+
+        # Optimization: In PostgreSQL, lower(column) LIKE '%value%' is served by
+        # the GIN trigram index on lower(column) (see src/db/trigram_indexes.py)
+        # instead of a sequential scan. Keep the predicate in exactly this shape:
+        # ILIKE, or LIKE on the column without lower(), won't match the index
+        # expression. The value is already lowercase.
+        elif isinstance(column.type, String) or isinstance(column.type, Text):
+            for v in value:
+                statement = statement.where(func.lower(column).like(
+                    _get_contains_pattern(v), escape = LIKE_ESCAPE_CHARACTER
+                ))
+
+        # ---------------------------------------------------------
+        # 3. Everything else: Look for an exact match.
+        # ---------------------------------------------------------
+
+        else:
+            for v in value:
+                statement = statement.where(column == v)
+
+    return statement
+
+# SQL: SELECT * FROM tea_profiles WHERE id IN (1, 2, 3);
+def get_by_ids_statement(tea_profile_ids: Sequence[int]) -> Select:
+    return select(TeaProfileModel).where(TeaProfileModel.id.in_(tea_profile_ids))
+
+def get_list_statement(filters: Mapping[str, Any], dialect: str,
+    limit: int = 100, offset: int = 0, after_id: int | None = None,
+    columns: Sequence[str] | None = None) -> Select:
+
+    statement = select(TeaProfileModel)
+
+    # Optimization: Only SELECT the columns the caller needs. load_only tells
+    # SQLAlchemy to leave every other column out of the SELECT (the primary key
+    # is always included), which cuts database I/O and ORM hydration for wide
+    # columns like cultural_significance that list views never show. The row
+    # version columns always come along, since validators are built from them
+    # (see src/db/row_versions.py).
+    if columns is not None:
+        statement = statement.options(load_only(*[
+            getattr(TeaProfileModel, column) for column in [*columns, *ROW_VERSION_COLUMNS]
+        ]))
+
+    statement = apply_filters(statement, filters, dialect)
+
+    # Optimization: Keyset (cursor) pagination. Rather than making the database
+    # walk past and throw away "offset" rows, seek straight to the first row after
+    # the last id the client saw. The primary key index serves both the seek and
+    # the ORDER BY, so page N costs the same as page 1.
+    if after_id is not None:
+        statement = statement.where(TeaProfileModel.id > after_id)
+
+    # Always order by id so that page boundaries are stable between calls. Return
+    # "limit" number of rows starting on row "offset" that satisfy the query.
+    #
+    # In raw SQL, our queries would look something like this:
+    #
+    #     SELECT * FROM tea_profiles
+    #     WHERE oxidation_level = 'green' AND country_of_origin = 'China'
+    #       AND id > 42
+    #     ORDER BY id
+    #     LIMIT 10 OFFSET 0;
+    return statement.order_by(TeaProfileModel.id).offset(offset).limit(limit)
+
+# The columns an export includes: the ones clients can see, in the model's order (id
+# first). Derived and row version columns stay internal.
+EXPORT_COLUMNS = get_model_column_names(
+    TeaProfileModel, include_derived = False, include_row_version = False
+)
+
+# SQL: SELECT id, name, ... FROM tea_profiles ORDER BY id;
+def get_export_statement() -> Select:
+    # Optimization: Plain columns rather than TeaProfileModel, so the rows skip ORM
+    # hydration and the identity map, which would otherwise hold on to every row
+    # exported so far.
+    statement = select(*[getattr(TeaProfileModel, column) for column in EXPORT_COLUMNS])
+
+    return statement.order_by(TeaProfileModel.id)
+
+def get_facets_statement(filters: Mapping[str, Any], dialect: str,
+    fields: Sequence[str], descriptor_fields: Sequence[str]) -> CompoundSelect:
+
+    # Optimization: The database does the counting, so only one row per distinct
+    # value comes back rather than one per matching tea profile. The matching rows
+    # are found once (the filters use the same indexes as list), and each facet is
+    # a GROUP BY over them, all in one query. Descriptors are counted by their
+    # normalized copies, so that "Sweet" and "sweet" are counted together. Ex:
+    #
+    #     WITH matching AS (
+    #         SELECT tea_type, ..., liquor_taste_normalized FROM tea_profiles
+    #         WHERE liquor_taste_normalized @> ARRAY['sweet']
+    #     )
+    #     SELECT NULL AS facet, NULL AS value, count(*) AS count FROM matching
+    #     UNION ALL
+    #     SELECT 'tea_type', tea_type, count(*) FROM matching
+    #     WHERE tea_type IS NOT NULL GROUP BY tea_type
+    #     UNION ALL
+    #     SELECT 'liquor_taste', element, count(*)
+    #     FROM matching, unnest(liquor_taste_normalized) AS element GROUP BY element
+    #     ...
+    descriptor_columns = {
+        field_name: NORMALIZED_ARRAY_COLUMNS[field_name] for field_name in descriptor_fields
+    }
+    matching = apply_filters(
+        select(*[
+            getattr(TeaProfileModel, column)
+            for column in [*fields, *descriptor_columns.values()]
+        ]),
+        filters,
+        dialect
+    ).cte("matching")
+
+    # The total has no facet.
+    statements = [
+        select(
+            null().label("facet"), null().label("value"), func.count().label("count")
+        ).select_from(matching)
+    ]
+
+    for field_name in fields:
+        column = matching.c[field_name]
+        statements.append(
+            select(literal(field_name, String), column, func.count())
+            .select_from(matching)
+            .where(column.is_not(None))
+            .group_by(column)
+        )
+
+    for field_name, column_name in descriptor_columns.items():
+        statements.append(_get_descriptor_counts_statement(
+            matching, field_name, matching.c[column_name], dialect
+        ))
+
+    return union_all(*statements)
+
+def _get_descriptor_counts_statement(matching, field_name: str, column,
+    dialect: str) -> Select:
+    '''Counts each element of column's arrays in the matching rows.'''
+
+    if dialect == "postgresql":
+        # FROM matching, unnest(matching.liquor_taste_normalized) AS element
+        element = func.unnest(column).column_valued("element")
+        statement = select(literal(field_name, String), element, func.count()).select_from(matching)
+
+    else:
+        # SQLite fallback: the array is stored as delimited text, ex: "malt;honey", so
+        # split it with a recursive CTE, peeling one element off the front at a time:
+        #
+        #     element   rest
+        #     ""        "malt;honey;"
+        #     "malt"    "honey;"
+        #     "honey"   ""
+        #
+        # The first row, and the element of an empty array, are blank (and skipped
+        # below). A NULL array never gets past the first row.
+        elements = select(
+            literal("", String).label("element"),
+            (type_coerce(column, Text) + literal(DELIMITER_VALUE)).label("rest")
+        ).cte(f"{field_name}_elements", recursive = True)
+
+        rest = elements.c.rest
+        delimiter_position = func.instr(rest, DELIMITER_VALUE)
+        elements = elements.union_all(
+            select(
+                func.substr(rest, 1, delimiter_position - 1),
+                func.substr(rest, delimiter_position + 1)
+            ).where(rest != "")
+        )
+
+        element = elements.c.element
+        statement = select(literal(field_name, String), element, func.count())
+
+    return statement.where(element != "").group_by(element)
+
+def count_facets(rows: Sequence[Sequence[Any]], fields: Sequence[str],
+    descriptor_fields: Sequence[str], max_descriptor_values: int) -> FacetCounts:
+    '''Collects the (facet, value, count) rows returned by a get_facets_statement.'''
+
+    total = 0
+    counts: dict[str, dict[str, int]] = {
+        field_name: {} for field_name in [*fields, *descriptor_fields]
+    }
+
+    for facet, value, count in rows:
+        if facet is None:
+            total = count
+        else:
+            counts[facet][value] = count
+
+    return {
+        "total": total,
+        "facets": {
+            field_name: sort_facet_counts(
+                counts[field_name],
+                max_descriptor_values if field_name in descriptor_fields else None
+            )
+            for field_name in counts
+        },
+    }
+
+def get_search_statement(query: str, dialect: str,
+    limit: int = 100) -> tuple[Executable, dict[str, Any]] | None:
+    '''
+        Returns a full-text search statement and its parameters, or None when the query
+        can't match anything (see src/db/full_text_search.py).
+    '''
+
+    # Optimization: Both dialects answer this from an inverted index (a GIN index
+    # on a tsvector in PostgreSQL, FTS5 in SQLite) instead of scanning every row
+    # with LIKE '%...%'.
+    if dialect == "postgresql":
+        # websearch_to_tsquery accepts free-form user input (quotes, "or", -word)
+        # and never raises a syntax error, so the query can be passed as is.
+        query_param = query
+    else:
+        # FTS5 has its own query syntax, so quote each word to search for it
+        # literally. Quoted words next to each other are ANDed together.
+        words = re.findall(r"\w+", query)
+        if not words:
+            return None
+
+        query_param = " ".join(f'"{word}"' for word in words)
+
+    # List the model's columns explicitly, since SELECT * would also pick up the
+    # search_vector column, which isn't mapped. The derived columns are deferred,
+    # so leave them out too.
+    columns = ", ".join(
+        f"tea_profiles.{column}"
+        for column in get_model_column_names(TeaProfileModel, include_derived = False)
+    )
+    weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+
+    if dialect == "postgresql":
+        sql = f"""
+            SELECT {columns}
+            FROM tea_profiles, websearch_to_tsquery('english', :query) AS query
+            WHERE tea_profiles.{SEARCH_VECTOR_COLUMN} @@ query
+            ORDER BY ts_rank(tea_profiles.{SEARCH_VECTOR_COLUMN}, query) DESC,
+                tea_profiles.id
+            LIMIT :limit;
+        """
+    else:
+        sql = f"""
+            SELECT {columns}
+            FROM tea_profiles
+            JOIN {FTS_TABLE_NAME} ON {FTS_TABLE_NAME}.rowid = tea_profiles.id
+            WHERE {FTS_TABLE_NAME} MATCH :query
+            ORDER BY bm25({FTS_TABLE_NAME}, {weights}), tea_profiles.id
+            LIMIT :limit;
+        """
+
+    # from_statement maps the rows of our raw SQL back onto TeaProfileModel.
+    statement = select(TeaProfileModel).from_statement(text(sql))
+
+    return statement, {"query": query_param, "limit": limit}
@@ -0,0 +1,85 @@
+# Row versions: every tea profile carries two bookkeeping columns about its content,
+#
+#     updated_at:    when the row's content last changed
+#     content_hash:  a hash of the row's content (every column clients can see, minus
+#                    the id), see get_content_hash
+#
+# Optimization: Cheap, stable validators. ETags and Last-Modified used to come from
+# hashing the rendered response and the time the cache entry was filled, so they
+# changed whenever a worker restarted or a different machine answered, and cost a hash
+# of the whole body. Now a tea profile's ETag is its content_hash and its Last-Modified
+# is its updated_at, and a list's are built from the max updated_at and the ids it
+# contains (see generate_etag_from_row_versions). All of those are read with the rows,
+# so they cost nothing extra and every worker on every machine agrees on them.
+#
+# The columns are kept up to date in two places, like the normalized array columns
+# (see src/db/normalized_arrays.py):
+#
+#     ORM:     Inserting or changing a row through the ORM sets both. See
+#              register_row_version_listeners.
+#
+#     Ingest:  load_and_clean_csv fills both in before rows reach the staging table,
+#              since the upsert is raw SQL that skips the ORM.
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+from sqlalchemy import event
+
+from src.utils.model_utils import get_model_column_names
+
+def get_content_hash(values: Mapping[str, Any]) -> str:
+    '''
+        Hashes a row's content columns, ex: {"name": "Long Jing", "tea_type": "green",
+        ...}. The same content always gives the same hash, wherever it's computed.
+    '''
+
+    content = {
+        # SQLite reads an empty array back as [""], so drop blanks to hash it the same
+        # as the [] that was written.
+        column_name: [v for v in value if v != ""] if isinstance(value, list) else value
+        for column_name, value in values.items()
+    }
+
+    # sort_keys and compact separators so the same content always gives the same bytes.
+    serialized = json.dumps(content, sort_keys = True, separators = (",", ":"), default = str)
+
+    # Hash the data with MD5, as it's fast (same as ETags, see src/utils/etag.py).
+    return hashlib.md5(serialized.encode("utf-8")).hexdigest()
+
+def get_content_column_names(model) -> list[str]:
+    '''The columns a content hash covers: everything but the id and bookkeeping columns.'''
+
+    return get_model_column_names(
+        model, include_primary_key = False, include_derived = False, include_row_version = False
+    )
+
+def register_row_version_listeners(model) -> None:
+    '''Keeps updated_at and content_hash current when rows are written through the ORM.'''
+
+    content_column_names = get_content_column_names(model)
+
+    def get_target_content_hash(target) -> str:
+        return get_content_hash({
+            column_name: getattr(target, column_name) for column_name in content_column_names
+        })
+
+    def set_row_version_on_insert(mapper, connection, target):
+        target.content_hash = get_target_content_hash(target)
+
+        if target.updated_at is None:
+            target.updated_at = datetime.now(timezone.utc)
+
+    def set_row_version_on_update(mapper, connection, target):
+        content_hash = get_target_content_hash(target)
+
+        # A flush can include rows that were touched without their content changing (ex:
+        # set to the same value), so only move updated_at when the content did.
+        if content_hash != target.content_hash:
+            target.content_hash = content_hash
+            target.updated_at = datetime.now(timezone.utc)
+
+    event.listen(model, "before_insert", set_row_version_on_insert)
+    event.listen(model, "before_update", set_row_version_on_update)
@@ -0,0 +1,58 @@
+# Trigram indexes for the substring filters on the tea profiles list route. Filters
+# like ?country_of_origin=chin turn into
+#
+#     WHERE lower(country_of_origin) LIKE '%chin%'
+#
+# A leading wildcard means a B-tree index can't help, so PostgreSQL used to read every
+# row. pg_trgm splits text into three-letter chunks ("chi", "hin", ...) and a GIN index
+# over those chunks can find the rows containing all of a pattern's trigrams, wildcards
+# and all.
+#
+# The indexes are built on lower(column) rather than the column itself. PostgreSQL only
+# uses an expression index when the query contains the exact same expression, so the
+# repositories must keep filtering with func.lower(column).like(...) (see apply_filters
+# in src/db/repositories/tea_profiles_statements.py). Patterns shorter than three
+# characters have no trigrams and still fall back to a scan.
+#
+# SQLite doesn't have trigram indexes and the tests don't need them, so this is
+# PostgreSQL only. Existing databases get the indexes from the Alembic migration that
+# added them.
+
+from sqlalchemy import DDL, String, Table, Text, event
+
+from src.utils.model_utils import is_derived_column, is_row_version_column
+
+def get_trigram_indexed_columns(table: Table) -> list[str]:
+    '''Returns the names of the plain text columns, which are the ones we filter with LIKE.'''
+
+    # Derived and row version columns (ex: content_hash) are never filtered on, so an
+    # index on them would only slow down every write.
+    return [
+        column.name for column in table.columns
+        if isinstance(column.type, (String, Text))
+            and not is_derived_column(column)
+            and not is_row_version_column(column)
+    ]
+
+def get_trigram_index_name(column_name: str) -> str:
+    return f"ix_tea_profiles_{column_name}_trgm"
+
+def get_trigram_index_ddl(table: Table) -> list[str]:
+    return [
+        f"""
+        CREATE INDEX IF NOT EXISTS {get_trigram_index_name(column_name)}
+        ON {table.name} USING GIN (lower({column_name}) gin_trgm_ops)
+        """
+        for column_name in get_trigram_indexed_columns(table)
+    ]
+
+def register_trigram_index_ddl(table: Table) -> None:
+    '''Creates pg_trgm and the trigram indexes whenever table is created in PostgreSQL.'''
+
+    event.listen(
+        table, "before_create",
+        DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect = "postgresql")
+    )
+
+    for statement in get_trigram_index_ddl(table):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect = "postgresql"))
@@ -4,10 +4,27 @@ from sqlalchemy import String
 
 from src.constants.model_metadata_constants import DELIMITER_VALUE
 
+def normalize_array(values: list[str] | None) -> list[str] | None:
+    '''
+        Lowercases and trims each value, dropping blanks and duplicates while keeping
+        the original order. Ex: ["Malt", " honey", "malt", ""] --> ["malt", "honey"]
+    '''
+
+    if values is None:
+        return None
+
+    # dict.fromkeys de-duplicates while preserving insertion order.
+    return list(dict.fromkeys(
+        value.strip().lower() for value in values if value and value.strip()
+    ))
+
 class SQLiteCompatibleArray(TypeDecorator):
     """
         Use ARRAY for PostgreSQL in production and integration tests.
         Use Text for SQLite for unit tests.
+
+        Pass normalize = True to run every value through normalize_array before it's
+        stored, which is what the normalized shadow columns used for filtering need.
     """
 
     # By default, treat the value as Text. TypeDecorator requires a
@@ -15,6 +32,10 @@ class SQLiteCompatibleArray(TypeDecorator):
     impl = Text
     cache_ok = True # tell SQLAlchemy this type can be used in query cache keys
 
+    def __init__(self, normalize: bool = False):
+        super().__init__()
+        self.normalize = normalize
+
     def load_dialect_impl(self, dialect):
         # Use Text for SQLite and ARRAY for PostgreSQL
         if dialect.name == "sqlite":
@@ -30,6 +51,9 @@ class SQLiteCompatibleArray(TypeDecorator):
     # Ex: ["nutty", "sweet"] --> "nutty;sweet"
     #
     def process_bind_param(self, value, dialect):
+        if self.normalize:
+            value = normalize_array(value)
+
         # For SQLite, serialize the list into a semicolon-delimited string.
         if (dialect.name == "sqlite") and (value is not None):
             return DELIMITER_VALUE.join(value)
@@ -0,0 +1,171 @@
+# Columnar exports for analytics tools (ex: pandas, Polars, DuckDB, Spark):
+#
+#     Arrow IPC stream:  record batches, one after another, that readers can work through
+#                        as they arrive (ex: pyarrow.ipc.open_stream)
+#     Parquet:           a compressed, columnar file, with one row group per batch
+#
+# Both keep the columns' types, so array columns come through as lists of strings
+# rather than "; "-joined text that every reader has to split again.
+#
+# Optimization: Each batch of rows from the database cursor is turned straight into an
+# Arrow record batch, column by column, and written out. Nothing builds a DataFrame or
+# a table of the whole catalog, so memory stays flat however large it gets.
+#
+# IMPORTANT: Both need pyarrow. It's in requirements.txt, but imported like an optional
+# dependency so that the rest of the app still runs without it: these formats simply
+# aren't offered then (see is_arrow_available).
+
+import io
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+from sqlalchemy import Boolean, Integer, Numeric, Row
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.repositories.tea_profiles_statements import EXPORT_COLUMNS
+from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# zstd compresses about as well as gzip and decompresses several times faster.
+PARQUET_COMPRESSION = "zstd"
+
+def is_arrow_available() -> bool:
+    return pyarrow is not None
+
+def _get_arrow_type(column):
+    if isinstance(column.type, (ARRAY, SQLiteCompatibleArray)):
+        return pyarrow.list_(pyarrow.string())
+
+    if isinstance(column.type, Integer):
+        return pyarrow.int64()
+
+    if isinstance(column.type, Numeric):
+        return pyarrow.float64()
+
+    if isinstance(column.type, Boolean):
+        return pyarrow.bool_()
+
+    return pyarrow.string()
+
+def get_arrow_schema():
+    '''The exported columns (see EXPORT_COLUMNS) as an Arrow schema.'''
+
+    columns = TeaProfileModel.__table__.columns
+
+    return pyarrow.schema([
+        pyarrow.field(
+            column_name,
+            _get_arrow_type(columns[column_name]),
+            nullable = columns[column_name].nullable
+        )
+        for column_name in EXPORT_COLUMNS
+    ])
+
+def _normalize_value(value):
+    # SQLite reads an empty array back as [""], so drop blanks to export the [] that was
+    # written (same as get_content_hash).
+    if isinstance(value, list):
+        return [v for v in value if v != ""]
+
+    return value
+
+class _ChunkSink(io.RawIOBase):
+    '''
+        A write-only file that hands back whatever has been written to it since the last
+        drain. Parquet records where each row group starts in its footer, so tell keeps
+        counting from the start of the file, even though the bytes are long gone.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk = b"".join(self._chunks)
+        self._chunks = []
+
+        return chunk
+
+class _ArrowExportWriter(ABC):
+    '''Turns batches of exported rows into record batches for a pyarrow writer.'''
+
+    # Already compact (Parquet is compressed, and Arrow is binary), so compressing it
+    # again on the way out would cost CPU for little gain.
+    compressible = False
+
+    def __init__(self):
+        if pyarrow is None:
+            raise RuntimeError(f"The {self.format_name} export format requires pyarrow.")
+
+        self._schema = get_arrow_schema()
+        self._sink = _ChunkSink()
+        self._writer = self._open_writer(self._sink, self._schema)
+
+    @abstractmethod
+    def _open_writer(self, sink: _ChunkSink, schema):
+        '''Returns a pyarrow writer (with write_batch and close) that writes to sink.'''
+
+    def _to_record_batch(self, rows: Sequence[Row]):
+        # Rows come out of the cursor in EXPORT_COLUMNS order, so transposing them gives
+        # each column's values in turn.
+        columns = zip(*rows) if rows else [()] * len(self._schema)
+
+        return pyarrow.record_batch(
+            [
+                pyarrow.array([_normalize_value(value) for value in values], type = field.type)
+                for field, values in zip(self._schema, columns)
+            ],
+            schema = self._schema
+        )
+
+    def write_batch(self, rows: Sequence[Row]) -> bytes:
+        self._writer.write_batch(self._to_record_batch(rows))
+
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        # Closing writes the end of the stream (Arrow) or the footer (Parquet).
+        self._writer.close()
+
+        return self._sink.drain()
+
+class ArrowIpcExportWriter(_ArrowExportWriter):
+    '''Renders batches of exported rows as an Arrow IPC stream.'''
+
+    format_name = "arrow"
+    media_type = "application/vnd.apache.arrow.stream"
+    file_extension = "arrows"
+
+    def _open_writer(self, sink: _ChunkSink, schema):
+        return pyarrow.ipc.new_stream(sink, schema)
+
+class ParquetExportWriter(_ArrowExportWriter):
+    '''Renders batches of exported rows as a Parquet file, one row group per batch.'''
+
+    format_name = "parquet"
+    media_type = "application/vnd.apache.parquet"
+    file_extension = "parquet"
+
+    def _open_writer(self, sink: _ChunkSink, schema):
+        return pyarrow.parquet.ParquetWriter(sink, schema, compression = PARQUET_COMPRESSION)
@@ -0,0 +1,92 @@
+# CSV, in the layout the ingestion CSVs use (see data/ingestion/batch): the content
+# columns in model order, without the id or any derived or bookkeeping columns, and array
+# columns joined with "; ". Ex:
+#
+#     name,alternative_names,tea_type,...
+#     Long Jing,Dragonwell; Dragon Well,green,...
+#
+# So an export can be fed straight back into load_and_clean_csv (ex: to seed another
+# database), and opens as-is in a spreadsheet.
+
+import csv
+import io
+from typing import Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.constants.model_metadata_constants import DELIMITER_KEY, DELIMITER_VALUE
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.row_versions import get_content_column_names
+from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
+
+CSV_COLUMNS = get_content_column_names(TeaProfileModel)
+
+def _get_array_delimiters() -> dict[str, str]:
+    '''Maps each array column to what its values are joined with, ex: "; ".'''
+
+    delimiters = {}
+
+    for column_name in CSV_COLUMNS:
+        column = TeaProfileModel.__table__.columns[column_name]
+
+        if isinstance(column.type, (ARRAY, SQLiteCompatibleArray)):
+            # load_and_clean_csv strips every value it splits out, so the space after
+            # the delimiter is only there to match the hand-written files.
+            delimiters[column_name] = f"{column.info.get(DELIMITER_KEY, DELIMITER_VALUE)} "
+
+    return delimiters
+
+_array_delimiters = _get_array_delimiters()
+
+def _format_value(column_name: str, value) -> str:
+    # Blank cells are read back as None.
+    if value is None:
+        return ""
+
+    delimiter = _array_delimiters.get(column_name)
+
+    if delimiter is not None:
+        # SQLite reads an empty array back as [""], which is blank either way.
+        return delimiter.join(v for v in value if v != "")
+
+    return str(value)
+
+class CsvExportWriter:
+    '''Renders batches of exported rows (see TeaProfilesRepository.stream) as CSV.'''
+
+    format_name = "csv"
+    media_type = "text/csv; charset=utf-8"
+    file_extension = "csv"
+
+    # Text, so compressing it on the way out is worth it.
+    compressible = True
+
+    def __init__(self):
+        self._wrote_header = False
+
+    def _write_rows(self, rows: list[list[str]]) -> bytes:
+        buffer = io.StringIO()
+
+        # lineterminator = "\n" rather than csv's default "\r\n", like the files we ingest.
+        csv.writer(buffer, lineterminator = "\n").writerows(rows)
+
+        return buffer.getvalue().encode("utf-8")
+
+    def _get_header(self) -> list[list[str]]:
+        if self._wrote_header:
+            return []
+
+        self._wrote_header = True
+
+        return [CSV_COLUMNS]
+
+    def write_batch(self, rows: Sequence[Row]) -> bytes:
+        return self._write_rows(self._get_header() + [
+            [_format_value(column_name, getattr(row, column_name)) for column_name in CSV_COLUMNS]
+            for row in rows
+        ])
+
+    def finish(self) -> bytes:
+        # An empty table still gets its header, so the file can be ingested.
+        return self._write_rows(self._get_header())
@@ -0,0 +1,43 @@
+# Every format tea profiles can be exported in, by name (ex: ?format=parquet on
+# GET /api/v1/tea_profiles/export, or --format parquet for src/app/export_tea_profiles.py):
+#
+#     ndjson:   one JSON tea profile per line, exactly as the API renders it
+#     csv:      the layout load_and_clean_csv reads
+#     parquet:  a columnar file for analytics tools (needs pyarrow)
+#     arrow:    an Arrow IPC stream of record batches (needs pyarrow)
+
+from typing import Callable
+
+from src.export.arrow_export import ArrowIpcExportWriter, ParquetExportWriter, is_arrow_available
+from src.export.csv_export import CsvExportWriter
+from src.export.export_stream import ExportWriter
+from src.export.ndjson_export import NdjsonExportWriter
+
+DEFAULT_EXPORT_FORMAT = "ndjson"
+
+# Writers keep state between batches (ex: whether the CSV header has been written), so
+# each export gets a new one.
+_EXPORT_WRITERS: dict[str, Callable[[], ExportWriter]] = {
+    NdjsonExportWriter.format_name: NdjsonExportWriter,
+    CsvExportWriter.format_name: CsvExportWriter,
+    ParquetExportWriter.format_name: ParquetExportWriter,
+    ArrowIpcExportWriter.format_name: ArrowIpcExportWriter,
+}
+
+_ARROW_FORMATS = {ParquetExportWriter.format_name, ArrowIpcExportWriter.format_name}
+
+def get_export_formats() -> list[str]:
+    '''Returns the formats this server can export in, ex: ["ndjson", "csv"].'''
+
+    return [
+        format_name for format_name in _EXPORT_WRITERS
+        if format_name not in _ARROW_FORMATS or is_arrow_available()
+    ]
+
+def get_export_writer(format_name: str) -> ExportWriter:
+    '''Returns a new writer for format_name, or raises ValueError if it isn't offered.'''
+
+    if format_name not in get_export_formats():
+        raise ValueError(f"Unsupported export format: {format_name}")
+
+    return _EXPORT_WRITERS[format_name]()
@@ -0,0 +1,84 @@
+# Streams every tea profile through an export writer (ex: NdjsonExportWriter), one batch
+# at a time. A writer turns each batch of rows into bytes with write_batch, and returns
+# whatever it still needs to write once the rows run out from finish.
+#
+# Optimization: Memory stays flat however large the catalog gets. Rows come from the
+# database batch_size at a time (see TeaProfilesRepository.stream), each batch is
+# rendered and handed on, and nothing holds on to it afterwards.
+
+from typing import AsyncIterator, Iterator, Protocol, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from src.constants.tea_profiles_constants import EXPORT_BATCH_SIZE
+from src.core.metrics import metrics_aggregator
+from src.db.repositories.async_tea_profiles_repository import AsyncTeaProfilesRepository
+from src.db.repositories.tea_profiles_repository import TeaProfilesRepository
+
+class ExportWriter(Protocol):
+    format_name: str
+    media_type: str
+    file_extension: str
+
+    # Whether it's worth compressing on the way out (ex: False for Parquet, which is
+    # already compressed).
+    compressible: bool
+
+    def write_batch(self, rows: Sequence[Row]) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+def _count_rows(writer: ExportWriter, rows: Sequence[Row]) -> None:
+    metrics_aggregator.count(
+        "export.rows", len(rows), attributes = {"format": writer.format_name}
+    )
+
+async def stream_export(
+    bind: AsyncEngine,
+    writer: ExportWriter,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[bytes]:
+    '''
+        Yields an export chunk by chunk. The export gets a session of its own on bind,
+        since it outlives the request's session.
+    '''
+
+    # Optimization: Backpressure. An async generator only runs when the next chunk is
+    # asked for, and the server only asks once the previous chunk has been sent. A slow
+    # client therefore pauses the export (and its database cursor), rather than the
+    # export reading ahead and piling chunks up in memory.
+    async with AsyncSession(bind = bind, expire_on_commit = False) as session:
+        async for rows in AsyncTeaProfilesRepository(session).stream(batch_size):
+            _count_rows(writer, rows)
+
+            chunk = writer.write_batch(rows)
+
+            if chunk:
+                yield chunk
+
+    chunk = writer.finish()
+
+    if chunk:
+        yield chunk
+
+def iter_export(
+    session: Session,
+    writer: ExportWriter,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    '''Same as stream_export, on a sync session (ex: for src/app/export_tea_profiles.py).'''
+
+    for rows in TeaProfilesRepository(session).stream(batch_size):
+        _count_rows(writer, rows)
+
+        chunk = writer.write_batch(rows)
+
+        if chunk:
+            yield chunk
+
+    chunk = writer.finish()
+
+    if chunk:
+        yield chunk
@@ -0,0 +1,39 @@
+# NDJSON (newline-delimited JSON): one tea profile per line, each rendered exactly as
+# GET /api/v1/tea_profiles/{id} renders it. Ex:
+#
+#     {"id":1,"name":"Long Jing","tea_type":"green",...}
+#     {"id":2,"name":"Bi Luo Chun","tea_type":"green",...}
+#
+# Unlike a JSON array, every line stands on its own, so both ends can work through an
+# export of any size one line at a time.
+
+from typing import Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import Row
+
+from src.api.schemas.tea_profiles_schema import TeaProfileSchema
+
+_tea_profile_adapter = TypeAdapter(TeaProfileSchema)
+
+class NdjsonExportWriter:
+    '''Renders batches of exported rows (see TeaProfilesRepository.stream) as NDJSON.'''
+
+    format_name = "ndjson"
+    media_type = "application/x-ndjson"
+    file_extension = "ndjson"
+
+    # Text, so compressing it on the way out is worth it.
+    compressible = True
+
+    def write_batch(self, rows: Sequence[Row]) -> bytes:
+        return b"".join(
+            _tea_profile_adapter.dump_json(
+                _tea_profile_adapter.validate_python(row, from_attributes = True)
+            ) + b"\n"
+            for row in rows
+        )
+
+    def finish(self) -> bytes:
+        # Every line is complete on its own, so there's nothing to close.
+        return b""
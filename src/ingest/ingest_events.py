@@ -0,0 +1,34 @@
+# Lets other parts of the app react when new data has been ingested, without the 
+# ingestion pipeline needing to know about them. Ex: the in-memory catalog (see 
+# src/catalog/catalog_engine.py) rebuilds itself when tea_profiles changes.
+
+import logging
+from typing import Callable
+
+# use __name__ to get a logger named after the module we're in.
+logger = logging.getLogger(__name__)
+
+# A listener receives the name of the table that was ingested into.
+IngestListener = Callable[[str], None]
+
+_listeners: list[IngestListener] = []
+
+def register_ingest_listener(listener: IngestListener) -> None:
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def unregister_ingest_listener(listener: IngestListener) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def notify_ingest_complete(table_name: str) -> None:
+    '''Called once ingested rows have been committed.'''
+
+    for listener in list(_listeners):
+        # The data is already committed, so a failing listener shouldn't fail the 
+        # ingestion. Log it and keep notifying the rest.
+        try:
+            listener(table_name)
+
+        except Exception:
+            logger.exception(f"Ingest listener failed for {table_name}.")
@@ -3,6 +3,7 @@ import logging
 from src.ingest.staging_table_manager import create_staging_table, insert_into_staging
 from src.ingest.validate_records import remove_duplicates
 from src.ingest.upsert_records import upsert_from_staging
+from src.ingest.ingest_events import notify_ingest_complete
 from src.utils.csv_utils import load_and_clean_csv
 
 # use __name__ to get a logger named after the module we're in.
@@ -30,6 +31,9 @@ def ingest_data(session, csv_path: str, model, required_fields, conflict_cols: l
     except Exception:
         session.rollback()
         logger.exception("Ingestion failed.")
+        return
+
+    notify_ingest_complete(base_table_name)
 
 if __name__ == "__main__":
     raise RuntimeError(
@@ -5,8 +5,9 @@ from sqlalchemy import text
 from src.utils.staging_utils import get_staging_table_name
 from src.utils.model_utils import get_model_column_names_as_str
 from src.utils.sql_dialect_utils import get_sql_from_dialect
+from src.db.dataset_generations import bump_dataset_generation
 
-def upsert_from_staging(session, base_table: str, model, conflict_cols: list[str]):
+def upsert_from_staging(session, base_table: str, model, conflict_cols: list[str]) -> int:
     staging_table = get_staging_table_name(session, base_table)
 
     columns = get_model_column_names_as_str(model, False)
@@ -38,4 +39,14 @@ def upsert_from_staging(session, base_table: str, model, conflict_cols: list[str
             FROM {staging_table};
         """
     )
-    session.execute(text(sql))
\ No newline at end of file
+    inserted = session.execute(text(sql)).rowcount
+
+    # Optimization: If any rows were added, bump the table's dataset generation in the
+    # same transaction, so that the caller's commit publishes the new rows and the new
+    # generation together. Cached responses built from the old rows then stop being
+    # served (see src/cache/dataset_generation.py). Ingesting nothing new leaves the
+    # cache alone.
+    if inserted > 0:
+        bump_dataset_generation(session, base_table)
+
+    return inserted
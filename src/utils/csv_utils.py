@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Type, Optional
 import pandas as pd
 from sqlalchemy import ARRAY, Numeric, Text, String, Boolean
@@ -6,9 +7,11 @@ import logging
 from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
 from src.db.base import Base
 from src.constants.model_metadata_constants import (
-    DELIMITER_KEY, DELIMITER_VALUE, IS_PRICE_KEY
+    DELIMITER_KEY, DELIMITER_VALUE, IS_PRICE_KEY, NORMALIZED_FROM_KEY
 )
-from src.utils.model_utils import get_model_column_names
+from src.utils.model_utils import get_model_column_names, is_derived_column
+from src.db.types.sqlite_compatible_array import normalize_array
+from src.db.row_versions import get_content_column_names, get_content_hash
 
 # use __name__ to get a logger named after the module we're in.
 logger = logging.getLogger(__name__)
@@ -107,8 +110,9 @@ def load_and_clean_csv(
 
     # Drop any columns that do not exist in the model. Note that passing
     # False here will leave out the primary key. That's preferable here, because
-    # PostgreSQL should be handling autogenerated fields, not us.
-    df = df[get_model_column_names(model, False)]
+    # PostgreSQL should be handling autogenerated fields, not us. Derived and row 
+    # version columns are left out too, since we compute them below rather than read them.
+    df = df[get_model_column_names(model, False, False, False)]
 
     # Strip whitespace from all non-numeric values. col.dtype == "object"
     # checks that the col Series (which represents one column) is a
@@ -180,4 +184,31 @@ def load_and_clean_csv(
         elif isinstance(col.type, String) or isinstance(col.type, Text):
             df[col.name] = df[col.name].apply(parse_string)
 
+    # Fill in derived columns from their (now cleaned) source columns. The upsert from 
+    # the staging table is raw SQL, so the model's listeners won't do this for us.
+    for col in model.__table__.columns:
+        if is_derived_column(col):
+            source_column_name = col.info[NORMALIZED_FROM_KEY]
+
+            df[col.name] = df[source_column_name].apply(
+                lambda cell_contents: (
+                    normalize_array(cell_contents) if isinstance(cell_contents, list)
+                    else None
+                )
+            )
+
+    # Same for the row versions (see src/db/row_versions.py): every row was just loaded,
+    # and its content hash is computed from the cleaned values, exactly as the ORM 
+    # would compute it.
+    if "content_hash" in df.columns:
+        content_column_names = get_content_column_names(model)
+
+        df["content_hash"] = [
+            get_content_hash(dict(zip(content_column_names, values)))
+            for values in df[content_column_names].itertuples(index = False, name = None)
+        ]
+
+    if "updated_at" in df.columns:
+        df["updated_at"] = datetime.now(timezone.utc)
+
     return df
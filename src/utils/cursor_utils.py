@@ -0,0 +1,43 @@
+import base64
+import json
+
+# Cursors are opaque to clients. Under the hood, a cursor is the URL-safe base64 of a
+# small JSON document holding the id of the last row on the previous page, ex:
+#
+#     {"id": 42} --> eyJpZCI6IDQyfQ
+#
+# Wrapping the id this way keeps clients from doing arithmetic on it and lets us add
+# more sort keys later (such as name) without breaking old cursors.
+
+# Ids are BIGINTs at most, so anything outside [0, 2**63) can't be a real row's id, and
+# would overflow the database's comparison (a 500) rather than being rejected (a 400).
+MAX_CURSOR_ID = 2**63
+
+def encode_cursor(last_id: int) -> str:
+    JSON_string = json.dumps({"id": last_id}).encode("utf-8")
+
+    # Padding (=) isn't URL friendly and can be recomputed when decoding, so strip it.
+    return base64.urlsafe_b64encode(JSON_string).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    '''Returns the last id encoded in the cursor. Raises ValueError if it's malformed.'''
+
+    # Add back the padding we stripped in encode_cursor.
+    padded_cursor = cursor + "=" * (-len(cursor) % 4)
+
+    try:
+        data = json.loads(base64.urlsafe_b64decode(padded_cursor.encode("ascii")))
+        last_id = data["id"]
+
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
+
+    # bool is a subclass of int, so rule it out explicitly.
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    if not 0 <= last_id < MAX_CURSOR_ID:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return last_id
@@ -1,5 +1,16 @@
 from email.utils import format_datetime
-from datetime import datetime
+from datetime import datetime, timezone
 
 def http_date(dt: datetime) -> str:
     return format_datetime(dt, usegmt = True)
+
+def as_utc(dt: datetime) -> datetime:
+    '''
+        Returns dt in UTC. SQLite doesn't store time zones, so timestamps it reads back
+        are naive; they were written in UTC.
+    '''
+
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo = timezone.utc)
+
+    return dt.astimezone(timezone.utc)
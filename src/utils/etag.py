@@ -1,6 +1,9 @@
 import hashlib
 import json
 import logging
+from datetime import datetime
+from typing import Iterable
+
 from .serialization import to_serializable
 
 # use __name__ to get a logger named after the module we're in.
@@ -15,3 +18,50 @@ def generate_etag(data) -> str:
 
     # Hash the data with MD5, as it's fast.
     return hashlib.md5(JSON_string).hexdigest()
+
+def generate_etag_from_bytes(body: bytes) -> str:
+    # The body is already the exact bytes we send, so there's nothing to serialize.
+    return hashlib.md5(body).hexdigest()
+
+def generate_etag_from_row_versions(ids: Iterable[int], last_modified: datetime | None) -> str:
+    '''
+        Builds an ETag for a list of rows from its ids and the newest updated_at among
+        them (see src/db/row_versions.py). Any row changing moves the max updated_at, and
+        rows entering or leaving the list change the ids, so either changes the ETag.
+    '''
+
+    last_modified_str = last_modified.isoformat() if last_modified is not None else ""
+    ids_str = ",".join(str(id_) for id_ in ids)
+
+    return hashlib.md5(f"{last_modified_str}|{ids_str}".encode("utf-8")).hexdigest()
+
+def parse_if_none_match(header: str | None) -> list[str]:
+    '''
+        Splits an If-None-Match header into its ETags, without quotes or weak prefixes.
+        Ex: 'W/"1-abc", 2-def' --> ["1-abc", "2-def"]
+    '''
+
+    if not header:
+        return []
+
+    etags = []
+    for etag in header.split(","):
+        etag = etag.strip().removeprefix("W/").strip('"')
+
+        if etag:
+            etags.append(etag)
+
+    return etags
+
+def get_etag_generation(etag: str) -> int | None:
+    '''
+        Returns the dataset generation an ETag was built from (see build_cached_response),
+        ex: "5-5d41402abc4b2a76" --> 5, or None if it doesn't start with one.
+    '''
+
+    generation, separator, _ = etag.partition("-")
+
+    if not separator or not generation.isdigit():
+        return None
+
+    return int(generation)
@@ -0,0 +1,24 @@
+from typing import Mapping, TypedDict
+
+class FacetCounts(TypedDict):
+    # How many tea profiles match the filters.
+    total: int
+
+    # field name --> value --> how many of the matching tea profiles have that value
+    facets: dict[str, dict[str, int]]
+
+def sort_facet_counts(counts: Mapping[str, int], limit: int | None = None) -> dict[str, int]:
+    '''
+        Orders facet counts from most to least common (ties broken alphabetically so the
+        output is stable), keeping the top limit values if given. Zero counts are dropped.
+    '''
+
+    ordered = sorted(
+        ((value, count) for value, count in counts.items() if count > 0),
+        key = lambda item: (-item[1], item[0])
+    )
+
+    if limit is not None:
+        ordered = ordered[:limit]
+
+    return dict(ordered)
@@ -0,0 +1,43 @@
+from typing import Any, Mapping
+
+def split_filter_values(value: Any) -> list[str]:
+    '''
+        Normalizes a filter value from TeaProfileFilters into a list of lowercase
+        strings, splitting comma-separated strings into multiple values. Ex:
+
+            "China, Japan"     -->  ["china", "japan"]
+            ["Malt", "Honey"]  -->  ["malt", "honey"]
+            3                  -->  ["3"]
+    '''
+
+    if isinstance(value, str):
+        return [v.strip().lower() for v in value.split(",")]
+
+    if isinstance(value, (list, tuple, set)):
+        return [str(v).lower() for v in value]
+
+    return [str(value).lower()]
+
+# The canonical form of a filter selection: the fields in sorted order, each with its
+# values lowercased, trimmed, de-duplicated, and sorted.
+CanonicalFilters = dict[str, list[str]]
+
+def canonicalize_filters(filters: Mapping[str, Any]) -> CanonicalFilters:
+    '''
+        Optimization: Rewrites filters into their canonical form. Every value of a filter
+        must match (see TeaProfilesRepository.list) and matching ignores case, so neither
+        the order of the values nor repeats change the results. Ex:
+
+            {"tea_type": "Green", "country_of_origin": "Japan,china, CHINA"}  -->
+            {"country_of_origin": ["china", "japan"], "tea_type": ["green"]}
+
+        Every selection that returns the same rows therefore gets the same canonical
+        form, and with it the same cache key (see src/cache/cache_keys.py). The
+        repositories and the catalog filter by the canonical form too, so the cache key
+        and the query can't disagree about what a selection means.
+    '''
+
+    return {
+        field_name: sorted(set(split_filter_values(filters[field_name])))
+        for field_name in sorted(filters)
+    }
@@ -1,12 +1,30 @@
 from sqlalchemy import Numeric, Text, String
 from sqlalchemy.types import TypeEngine
 
-def get_model_column_names(model, include_primary_key: bool = True) -> list[str]:
+from src.constants.model_metadata_constants import NORMALIZED_FROM_KEY, ROW_VERSION_KEY
+
+# Derived columns (ex: liquor_taste_normalized) are computed from other columns, so they
+# never appear in CSVs or API responses.
+def is_derived_column(col) -> bool:
+    return NORMALIZED_FROM_KEY in col.info
+
+# Row version columns (ex: updated_at) are maintained by writes (see 
+# src/db/row_versions.py), so they never appear in CSVs or API responses either.
+def is_row_version_column(col) -> bool:
+    return ROW_VERSION_KEY in col.info
+
+def get_model_column_names(model, include_primary_key: bool = True, 
+    include_derived: bool = True, include_row_version: bool = True) -> list[str]:
     return [col.name for col in model.__table__.columns if 
-        (not col.primary_key) or include_primary_key]
+        ((not col.primary_key) or include_primary_key) and
+        ((not is_derived_column(col)) or include_derived) and
+        ((not is_row_version_column(col)) or include_row_version)]
 
-def get_model_column_names_as_str(model, include_primary_key: bool = True) -> str:
-    return ", ".join(get_model_column_names(model, include_primary_key))
+def get_model_column_names_as_str(model, include_primary_key: bool = True, 
+    include_derived: bool = True, include_row_version: bool = True) -> str:
+    return ", ".join(get_model_column_names(
+        model, include_primary_key, include_derived, include_row_version
+    ))
 
 # TypeEngine is the abstract base class from which all concrete types like
 # String and Integer inherit from.
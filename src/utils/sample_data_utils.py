@@ -2,6 +2,7 @@ from sqlalchemy import String, Numeric, Text, ARRAY
 
 from src.db.models.tea_profiles_model import TeaProfileModel, TeaProfileModelFields
 from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
+from src.utils.model_utils import is_derived_column, is_row_version_column
 
 def init_sample_tea_profiles_row(overrides: dict[str, str | list[str]]) -> dict[str, 
     str | list[str] | None]:
@@ -13,6 +14,10 @@ def init_sample_tea_profiles_row(overrides: dict[str, str | list[str]]) -> dict[
         if col.name == TeaProfileModelFields.ID:
             continue  
 
+        # skip derived and row version columns, which the model fills in itself
+        if is_derived_column(col) or is_row_version_column(col):
+            continue
+
         # This allows us to pass in a dict with any key-value pairs
         # we want to provide defaults for
         if col.name in overrides:
@@ -1,17 +1,32 @@
-from typing import Optional
+from typing import Optional, Iterable
 from pydantic import BaseModel, create_model
 from sqlalchemy.types import Numeric
 
 from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
+from src.utils.model_utils import is_derived_column, is_row_version_column
 
-def get_schema_from_model(model, name: str | None = None) -> type[BaseModel]:
-    """Dynamically create a Pydantic schema from a SQLAlchemy model."""
+def get_schema_from_model(
+    model, 
+    name: str | None = None, 
+    include: Iterable[str] | None = None
+) -> type[BaseModel]:
+    """
+        Dynamically create a Pydantic schema from a SQLAlchemy model. Pass include to
+        build a projected schema with only some of the model's columns.
+    """
 
     fields = {}
+    include = set(include) if include is not None else None
 
     # Create a dict that maps tuples containing JSON-serializable Python types 
     # to the model's field names.
     for column in model.__table__.columns:
+        if include is not None and column.name not in include:
+            continue
+
+        # Derived and row version columns are internal, so they're never part of a schema.
+        if is_derived_column(column) or is_row_version_column(column):
+            continue
         
         # Cover our custom type that uses ARRAY for PostgreSQL and Text for
         # SQLite so our testing suites don't break.
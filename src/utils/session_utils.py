@@ -1,6 +1,6 @@
 from contextlib import contextmanager
 
-from src.db.engine import SessionLocal
+from src.db.engine import SessionLocal, AsyncSessionLocal
 
 # Generators are functions that yield control back to their calling function at
 # some point in the code. So when this is called, it opens a new SQLAlchemy
@@ -33,4 +33,12 @@ def get_session_cm():
 # the "with" statement and returns a generator rather than a session!
 def get_session():
     """Standard version usable with FastAPI's Depends."""
-    yield from _get_session_generator()
\ No newline at end of file
+    yield from _get_session_generator()
+
+# Async version of get_session for routes that await their queries. The session is
+# opened on the async engine (see src/db/engine.py) and closed once the response has
+# been sent.
+async def get_async_session():
+    """Async version usable with FastAPI's Depends."""
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -14,6 +14,11 @@ def test_debug_cache_endpoint(client):
     assert "hits" in data
     assert "misses" in data
     assert "keys" in data
+    assert data["single_flight"]["in_flight"] == 0
+    assert data["resident_bytes"] > 0
+    assert data["evictions"] == 0
+    assert data["regions"]["default"]["entries"] == 1
+    assert data["executor"]["max_workers"] > 0
 
     # Should contain our test key
     keys = data["keys"]
@@ -24,4 +29,36 @@ def test_debug_cache_endpoint(client):
     entry = next(e for e in keys if e["key"] == "test_key")
 
     assert entry["ttl_remaining"] >= 0
+    assert entry["region"] == "default"
+    assert entry["size"] > 0
     assert "timestamp" in entry
+
+def test_debug_db_executor_endpoint(client):
+    # Health checks run on the DB executor.
+    client.get("/health/connections")
+
+    response = client.get("/debug/db_executor")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["max_workers"] > 0
+    assert data["queue_depth"] == 0
+    assert data["completed"] >= 1
+    assert "average_wait_ms" in data
+    assert "max_wait_ms" in data
+
+def test_debug_metrics_endpoint(client):
+    cache.get("missing_key")
+    client.get("/health")
+
+    from src.core.metrics import metrics_aggregator
+    metrics_aggregator.flush()
+
+    response = client.get("/debug/metrics")
+    assert response.status_code == 200
+
+    data = response.json()
+
+    assert data["totals"]["cache.miss"] >= 1
+    assert data["totals"]["http.requests{route=/health,status=2xx}"] == 1
+    assert data["last_flush"]["histograms"]["http.request.duration_ms{route=/health}"]["count"] == 1
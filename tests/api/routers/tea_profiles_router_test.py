@@ -1,8 +1,27 @@
+import asyncio
+import json
+import time
+
+import httpx
 import pytest
+from sqlalchemy import inspect
 from starlette import status
 
 from src.api.schemas.tea_profiles_schema import TeaProfileSchema
-from src.constants.tea_profiles_constants import TeaProfileModelFields
+from src.constants.tea_profiles_constants import (
+    TeaProfileModelFields, SUMMARY_TEA_PROFILE_MODEL_FIELDS
+)
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.repositories.tea_profiles_repository import TeaProfilesRepository
+from src.db.repositories.async_tea_profiles_repository import AsyncTeaProfilesRepository
+from src.cache.simple_cache import cache
+from src.cache.single_flight import single_flight
+from src.cache.dataset_generation import dataset_generations
+from src.catalog.catalog_engine import catalog
+from src.export import arrow_export
+from src.export.csv_export import CsvExportWriter
+from src.utils.sample_data_utils import get_sample_tea_profiles_data
+from src.utils.date_utils import as_utc, http_date
 
 def test_get_tea_profiles(client, seed_tea_profiles):
     filters = {
@@ -168,4 +187,647 @@ def test_get_tea_profile_cache_hit(client, long_jing_tea_profile_id):
     lm_2 = second.headers.get("Last-Modified")
 
     assert etag_1 == etag_2
-    assert lm_1 == lm_2
\ No newline at end of file
+    assert lm_1 == lm_2
+
+######################################################################################################
+
+def test_get_tea_profiles_cursor_pagination(client, seed_sample_tea_profile):
+    # First page: no cursor.
+    first = client.get("/api/v1/tea_profiles", params = {"limit": 1})
+    assert first.status_code == status.HTTP_200_OK
+
+    first_data = first.json()
+    assert len(first_data) == 1
+
+    next_cursor = first.headers.get("X-Next-Cursor")
+    assert next_cursor is not None
+
+    # Second page: pass back the cursor.
+    second = client.get("/api/v1/tea_profiles", params = {"limit": 1, "cursor": next_cursor})
+    assert second.status_code == status.HTTP_200_OK
+
+    second_data = second.json()
+    assert len(second_data) == 1
+
+    # Pages are ordered by id and never overlap.
+    assert second_data[0]["id"] > first_data[0]["id"]
+
+    # Third page: the catalog is exhausted.
+    third = client.get(
+        "/api/v1/tea_profiles", 
+        params = {"limit": 1, "cursor": second.headers["X-Next-Cursor"]}
+    )
+    assert third.status_code == status.HTTP_200_OK
+    assert third.json() == []
+    assert "X-Next-Cursor" not in third.headers
+
+def test_get_tea_profiles_short_page_has_no_cursor(client, seed_sample_tea_profile):
+    response = client.get("/api/v1/tea_profiles", params = {"limit": 10})
+    assert response.status_code == status.HTTP_200_OK
+
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
+
+def test_get_tea_profiles_offset_is_ordered(client, seed_sample_tea_profile):
+    first = client.get("/api/v1/tea_profiles", params = {"limit": 1, "offset": 0}).json()
+    second = client.get("/api/v1/tea_profiles", params = {"limit": 1, "offset": 1}).json()
+
+    assert first[0]["id"] < second[0]["id"]
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "eyJpZCI6IDkyMjMzNzIwMzY4NTQ3NzU4MDh9",     # {"id": 2**63}, too big for the database
+])
+def test_get_tea_profiles_invalid_cursor(client, seed_tea_profiles, cursor):
+    response = client.get("/api/v1/tea_profiles", params = {"cursor": cursor})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    data = response.json()
+    assert data["error"]["type"] == "TeaProfileValidationError"
+
+def test_get_tea_profiles_caches_rendered_bytes(client, seed_tea_profiles):
+    first = client.get("/api/v1/tea_profiles")
+    assert first.status_code == status.HTTP_200_OK
+
+    # The cache holds the exact bytes we sent, not ORM objects.
+    cache_key = next(key for key in cache.store if key.startswith("tea_profiles:list:"))
+    cached_response = cache.store[cache_key]["value"]
+
+    assert cached_response["body"] == first.content
+    assert cached_response["etag"] == first.headers["ETag"]
+
+    # A hit serves the same bytes and headers.
+    second = client.get("/api/v1/tea_profiles")
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+def test_head_tea_profile_content_length_matches_get(client, long_jing_tea_profile_id):
+    get_response = client.get(f"/api/v1/tea_profiles/{long_jing_tea_profile_id}")
+    head_response = client.head(f"/api/v1/tea_profiles/{long_jing_tea_profile_id}")
+
+    assert head_response.text == ""
+    assert head_response.headers["Content-Length"] == get_response.headers["Content-Length"]
+
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+def test_get_tea_profiles_serves_precompressed_variant(client, seed_tea_profiles, encoding):
+    response = client.get("/api/v1/tea_profiles", headers = {"Accept-Encoding": encoding})
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response.headers["Content-Encoding"] == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    # The variant was built when the cache was filled, so a hit sends the same bytes.
+    cache_key = next(key for key in cache.store if key.startswith("tea_profiles:list:"))
+    cached_response = cache.store[cache_key]["value"]
+
+    hit = client.get("/api/v1/tea_profiles", headers = {"Accept-Encoding": encoding})
+    assert hit.headers["Content-Encoding"] == encoding
+    assert hit.headers["Content-Length"] == str(len(cached_response["variants"][encoding]))
+
+def test_get_tea_profiles_identity_encoding(client, seed_tea_profiles):
+    response = client.get("/api/v1/tea_profiles", headers = {"Accept-Encoding": "identity"})
+    assert response.status_code == status.HTTP_200_OK
+
+    assert "Content-Encoding" not in response.headers
+    assert response.json()[0][TeaProfileModelFields.NAME] == "Long Jing"
+
+######################################################################################################
+
+def test_get_tea_profiles_summary_fields(client, seed_tea_profiles):
+    response = client.get("/api/v1/tea_profiles", params = {"fields": "summary"})
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert len(data) == 1
+    assert set(data[0]) == set(SUMMARY_TEA_PROFILE_MODEL_FIELDS)
+    assert data[0][TeaProfileModelFields.NAME] == "Long Jing"
+
+def test_get_tea_profiles_sparse_fields(client, seed_tea_profiles):
+    response = client.get(
+        "/api/v1/tea_profiles", params = {"fields": "tea_type, name", "tea_type": "green"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    # The id always comes along so that cursors keep working.
+    assert response.json() == [{"id": 1, "name": "Long Jing", "tea_type": "green"}]
+
+def test_get_tea_profiles_sparse_fields_are_cached_separately(client, seed_tea_profiles):
+    full = client.get("/api/v1/tea_profiles").json()
+    summary = client.get("/api/v1/tea_profiles", params = {"fields": "summary"}).json()
+
+    assert TeaProfileModelFields.CULTURAL_SIGNIFICANCE in full[0]
+    assert TeaProfileModelFields.CULTURAL_SIGNIFICANCE not in summary[0]
+
+def test_get_tea_profiles_equivalent_filters_share_a_cache_entry(client, seed_tea_profiles):
+    first = client.get("/api/v1/tea_profiles", params = {"country_of_origin": "China"})
+    second = client.get("/api/v1/tea_profiles", params = {"country_of_origin": " china,CHINA"})
+
+    assert first.json() == second.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    list_keys = [key for key in cache.store if key.startswith("tea_profiles:list:")]
+    assert len(list_keys) == 1
+
+def test_get_tea_profiles_out_of_range_paging_shares_a_cache_entry(client, seed_tea_profiles):
+    client.get("/api/v1/tea_profiles", params = {"limit": 1_000_000})
+    client.get("/api/v1/tea_profiles", params = {"limit": 2_000_000})
+
+    list_keys = [key for key in cache.store if key.startswith("tea_profiles:list:")]
+    assert len(list_keys) == 1
+
+@pytest.mark.parametrize("fields", ["not_a_field", "name,not_a_field", ","])
+def test_get_tea_profiles_invalid_fields(client, seed_tea_profiles, fields):
+    response = client.get("/api/v1/tea_profiles", params = {"fields": fields})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    assert response.json()["error"]["type"] == "TeaProfileValidationError"
+
+def test_repository_list_loads_only_requested_columns(create_test_db, seed_tea_profiles):
+    repo = TeaProfilesRepository(create_test_db)
+
+    # Make sure we're not looking at the objects seed_tea_profiles left in the session.
+    create_test_db.expunge_all()
+
+    tea_profiles = repo.list(filters = {}, columns = ["id", "name"])
+    unloaded = inspect(tea_profiles[0]).unloaded
+
+    assert TeaProfileModelFields.NAME not in unloaded
+    assert TeaProfileModelFields.CULTURAL_SIGNIFICANCE in unloaded
+
+@pytest.mark.parametrize("value, expected_ids", [
+    ("fired", [1]), ("%", []), ("pan_fired", []), ("pan%fired", []), ("PAN-", [1])
+])
+def test_get_tea_profiles_escapes_like_wildcards(client, seed_tea_profiles, value, expected_ids):
+    # % and _ in filter values are matched literally instead of as LIKE wildcards.
+    response = client.get(
+        "/api/v1/tea_profiles", params = {TeaProfileModelFields.PROCESSING: value}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [tea_profile["id"] for tea_profile in response.json()] == expected_ids
+
+@pytest.mark.parametrize("value, expected_ids", [
+    ("SWEET", [1, 2]),          # case-insensitive
+    (" sweet , nutty", [2]),    # every value must match
+    ("bitter", []),             # whole elements only, not "slightly bitter"
+    ("slightly bitter", [2]),
+])
+def test_get_tea_profiles_array_filters_match_whole_elements(
+    client, seed_sample_tea_profile, value, expected_ids
+):
+    response = client.get(
+        "/api/v1/tea_profiles", params = {TeaProfileModelFields.LIQUOR_TASTE: value}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [tea_profile["id"] for tea_profile in response.json()] == expected_ids
+
+def test_get_tea_profiles_array_filters_see_updates(client, create_test_db, seed_tea_profiles):
+    # Assigning an array column keeps its normalized twin in sync.
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+    tea_profile.liquor_taste = ["Malt", "Honey"]
+    create_test_db.commit()
+
+    response = client.get(
+        "/api/v1/tea_profiles", params = {TeaProfileModelFields.LIQUOR_TASTE: "malt,honey"}
+    )
+    assert [tea_profile["id"] for tea_profile in response.json()] == [1]
+
+    # The normalized columns are internal and never returned.
+    assert "liquor_taste_normalized" not in response.json()[0]
+
+def test_get_tea_profiles_from_catalog(
+    client, create_test_db, seed_sample_tea_profile, monkeypatch
+):
+    catalog.load(create_test_db)
+
+    def fail_list(*args, **kwargs):
+        raise AssertionError("The database shouldn't be queried while the catalog is loaded.")
+
+    monkeypatch.setattr(AsyncTeaProfilesRepository, "list", fail_list)
+
+    try:
+        response = client.get("/api/v1/tea_profiles", params = {"limit": 1, "fields": "summary"})
+        assert response.status_code == status.HTTP_200_OK
+
+        assert [tea_profile["id"] for tea_profile in response.json()] == [1]
+        assert set(response.json()[0]) == set(SUMMARY_TEA_PROFILE_MODEL_FIELDS)
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = client.get("/api/v1/tea_profiles", params = {"limit": 1, "cursor": cursor})
+        assert [tea_profile["id"] for tea_profile in response.json()] == [2]
+
+    finally:
+        catalog.clear()
+
+######################################################################################################
+
+def test_get_tea_profile_facets(client, seed_sample_tea_profile):
+    response = client.get("/api/v1/tea_profiles/facets")
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert data["total"] == 2
+    assert data["facets"]["tea_type"] == {"green": 2}
+    assert data["facets"]["oxidation_level"] == {"low": 1}
+
+    # Descriptors are counted most common first.
+    assert list(data["facets"]["liquor_taste"])[0] == "sweet"
+    assert data["facets"]["liquor_taste"]["sweet"] == 2
+    assert data["facets"]["liquor_taste"]["smooth"] == 1
+
+def test_get_tea_profile_facets_filtered(client, seed_sample_tea_profile):
+    response = client.get(
+        "/api/v1/tea_profiles/facets", params = {TeaProfileModelFields.LIQUOR_TASTE: "nutty"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert data["total"] == 1
+    assert "smooth" not in data["facets"]["liquor_taste"]
+    assert data["facets"]["oxidation_level"] == {}
+
+def test_get_tea_profile_facets_catalog_matches_database(
+    client, create_test_db, seed_sample_tea_profile
+):
+    params = {TeaProfileModelFields.COUNTRY_OF_ORIGIN: "chin"}
+    from_database = client.get("/api/v1/tea_profiles/facets", params = params).json()
+
+    cache.clear()
+    catalog.load(create_test_db)
+    try:
+        from_catalog = client.get("/api/v1/tea_profiles/facets", params = params).json()
+    finally:
+        catalog.clear()
+
+    assert from_catalog == from_database
+
+######################################################################################################
+
+def test_get_tea_profiles_batch(client, seed_sample_tea_profile):
+    response = client.get("/api/v1/tea_profiles/batch", params = {"ids": "2,1,-1,2"})
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+
+    # Found tea profiles come back in the requested order, without duplicates.
+    assert [tea_profile["id"] for tea_profile in data["tea_profiles"]] == [2, 1]
+    for tea_profile in data["tea_profiles"]:
+        assert isinstance(TeaProfileSchema.model_validate(tea_profile), TeaProfileSchema)
+
+    assert data["not_found"] == [-1]
+
+    # The per-id ETags match what the single tea profile route serves.
+    single = client.get("/api/v1/tea_profiles/1")
+    assert data["etags"]["1"] == single.headers["ETag"]
+
+def test_get_tea_profiles_batch_uses_per_id_cache(client, seed_sample_tea_profile, monkeypatch):
+    # Warm the cache for id 1 through the single tea profile route.
+    client.get("/api/v1/tea_profiles/1")
+
+    requested_ids = []
+    original_get_by_ids = AsyncTeaProfilesRepository.get_by_ids
+
+    async def spy_get_by_ids(self, tea_profile_ids):
+        requested_ids.append(list(tea_profile_ids))
+        return await original_get_by_ids(self, tea_profile_ids)
+
+    monkeypatch.setattr(AsyncTeaProfilesRepository, "get_by_ids", spy_get_by_ids)
+
+    response = client.get("/api/v1/tea_profiles/batch", params = {"ids": "1,2"})
+    assert response.status_code == status.HTTP_200_OK
+
+    # Only the miss went to the database, and it filled the per-id cache.
+    assert requested_ids == [[2]]
+    assert cache.get("tea_profile:2:g0") is not None
+
+    # Everything is cached now, so the database isn't touched at all.
+    client.get("/api/v1/tea_profiles/batch", params = {"ids": "1,2"})
+    assert requested_ids == [[2]]
+
+@pytest.mark.parametrize("ids", ["abc", "1,abc", "", ",".join(str(i) for i in range(201))])
+def test_get_tea_profiles_batch_invalid_ids(client, seed_tea_profiles, ids):
+    response = client.get("/api/v1/tea_profiles/batch", params = {"ids": ids})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    assert response.json()["error"]["type"] == "TeaProfileValidationError"
+
+######################################################################################################
+
+def test_search_tea_profiles(client, seed_sample_tea_profile):
+    # Matches on alternative_names, stemmed ("wells" --> "well"), case-insensitively.
+    response = client.get("/api/v1/tea_profiles/search", params = {"q": "Dragon WELLS"})
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.json()
+    assert [tea_profile["id"] for tea_profile in data] == [1]
+    assert isinstance(TeaProfileSchema.model_validate(data[0]), TeaProfileSchema)
+
+def test_search_tea_profiles_ranks_name_matches_first(client, create_test_db, seed_tea_profiles):
+    # "Jing" appears in this tea's cultural_significance, but in Long Jing's name.
+    create_test_db.add(TeaProfileModel(**{
+        **get_sample_tea_profiles_data(),
+        TeaProfileModelFields.NAME: "Other Tea",
+        TeaProfileModelFields.CULTURAL_SIGNIFICANCE: "Like Long Jing",
+    }))
+    create_test_db.commit()
+
+    response = client.get("/api/v1/tea_profiles/search", params = {"q": "jing"})
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [tea_profile["name"] for tea_profile in response.json()] == ["Long Jing", "Other Tea"]
+
+def test_search_tea_profiles_sees_updates(create_test_db, seed_tea_profiles):
+    repo = TeaProfilesRepository(create_test_db)
+    assert repo.search("dragonwell")
+
+    # The FTS5 triggers keep the index in sync with tea_profiles.
+    tea_profile = repo.get_by_id(1)
+    tea_profile.alternative_names = ["Lung Ching"]
+    create_test_db.commit()
+
+    assert repo.search("dragonwell") == []
+    assert [tea_profile.id for tea_profile in repo.search("lung ching")] == [1]
+
+@pytest.mark.parametrize("q", ['"', "AND OR NOT", "name:*"])
+def test_search_tea_profiles_ignores_query_syntax(client, seed_tea_profiles, q):
+    # Operators and punctuation are treated as plain text instead of erroring.
+    response = client.get("/api/v1/tea_profiles/search", params = {"q": q})
+    assert response.status_code == status.HTTP_200_OK
+
+def test_search_tea_profiles_empty_query(client, seed_tea_profiles):
+    response = client.get("/api/v1/tea_profiles/search", params = {"q": ""})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+def test_concurrent_cache_misses_share_one_query(client, seed_sample_tea_profile, monkeypatch):
+    calls = []
+    original_list = AsyncTeaProfilesRepository.list
+
+    async def slow_list(self, *args, **kwargs):
+        calls.append(1)
+        # Hold the query open long enough for the other requests to miss too.
+        await asyncio.sleep(0.05)
+        return await original_list(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncTeaProfilesRepository, "list", slow_list)
+
+    async def get_concurrently():
+        transport = httpx.ASGITransport(app = client.app)
+        async with httpx.AsyncClient(transport = transport, base_url = "http://test") as c:
+            return await asyncio.gather(*[c.get("/api/v1/tea_profiles") for _ in range(5)])
+
+    responses = asyncio.run(get_concurrently())
+
+    assert all(response.status_code == status.HTTP_200_OK for response in responses)
+    assert len({response.content for response in responses}) == 1
+    assert len(calls) == 1
+    assert single_flight.coalesced == 4
+
+def test_cache_control_allows_stale_while_revalidate(client, seed_tea_profiles):
+    response = client.get("/api/v1/tea_profiles/1")
+
+    assert "stale-while-revalidate=" in response.headers["Cache-Control"]
+
+def test_stale_tea_profile_is_served_then_refreshed(client, create_test_db, seed_tea_profiles):
+    client.get("/api/v1/tea_profiles/1")
+
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+    tea_profile.name = "Xi Hu Long Jing"
+    create_test_db.commit()
+
+    # Push the entry past its soft TTL.
+    cache.store["tea_profile:1:g0"]["stale_at"] = 0
+
+    # The stale copy is served right away...
+    response = client.get("/api/v1/tea_profiles/1")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["name"] == "Long Jing"
+
+    # ...while a background refresh replaces it.
+    deadline = time.monotonic() + 5
+    while cache.is_stale(cache.store["tea_profile:1:g0"]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    response = client.get("/api/v1/tea_profiles/1")
+    assert response.json()["name"] == "Xi Hu Long Jing"
+
+def test_responses_are_cached_in_their_regions(client, seed_tea_profiles):
+    client.get("/api/v1/tea_profiles")
+    client.get("/api/v1/tea_profiles/1")
+
+    list_key = next(key for key in cache.store if key.startswith("tea_profiles:list:"))
+    assert cache.store[list_key]["region"] == "list"
+    assert cache.store["tea_profile:1:g0"]["region"] == "detail"
+
+def test_new_dataset_generation_invalidates_cached_responses(
+    client, create_test_db, seed_tea_profiles
+):
+    first = client.get("/api/v1/tea_profiles/1")
+    assert first.headers["ETag"].startswith("0-")
+
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+    tea_profile.name = "Xi Hu Long Jing"
+    create_test_db.commit()
+
+    # Still cached.
+    assert client.get("/api/v1/tea_profiles/1").json()["name"] == "Long Jing"
+
+    # An ingestion bumps the generation, so the old entry and ETag stop being used.
+    dataset_generations.advance(TeaProfileModel.__tablename__, 1)
+
+    second = client.get(
+        "/api/v1/tea_profiles/1", headers = {"If-None-Match": first.headers["ETag"]}
+    )
+
+    assert second.status_code == status.HTTP_200_OK
+    assert second.json()["name"] == "Xi Hu Long Jing"
+    assert second.headers["ETag"].startswith("1-")
+    assert "tea_profile:1:g1" in cache.store
+
+def test_new_dataset_generation_drops_old_entries(client, seed_tea_profiles):
+    client.get("/api/v1/tea_profiles")
+    client.get("/api/v1/tea_profiles/1")
+    cache.set("unrelated", "value")
+
+    dataset_generations.advance(TeaProfileModel.__tablename__, 1)
+
+    assert list(cache.store) == ["unrelated"]
+
+def test_tea_profile_validators_come_from_row_version(client, create_test_db, seed_tea_profiles):
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+    response = client.get("/api/v1/tea_profiles/1")
+
+    assert response.headers["ETag"] == f"0-{tea_profile.content_hash}"
+    assert response.headers["Last-Modified"] == http_date(as_utc(tea_profile.updated_at))
+
+def test_tea_profiles_validators_survive_restarts(client, create_test_db, seed_sample_tea_profile):
+    first = client.get("/api/v1/tea_profiles")
+
+    # A new worker (or another machine) with nothing cached builds the same validators.
+    cache.clear()
+    second = client.get("/api/v1/tea_profiles")
+
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.headers["Last-Modified"] == first.headers["Last-Modified"]
+
+    # Sparse fieldsets of the same rows agree too, since they're built from the same
+    # row versions.
+    summary = client.get("/api/v1/tea_profiles", params = {"fields": "summary"})
+    assert summary.headers["ETag"] == first.headers["ETag"]
+
+    # Changing a row changes the list's ETag.
+    tea_profile = create_test_db.get(TeaProfileModel, 2)
+    tea_profile.tea_type = "white"
+    create_test_db.commit()
+    cache.clear()
+
+    assert client.get("/api/v1/tea_profiles").headers["ETag"] != first.headers["ETag"]
+
+def test_current_etag_gets_304_without_cache_or_database(
+    client, seed_tea_profiles, monkeypatch
+):
+    etag = client.get("/api/v1/tea_profiles/1").headers["ETag"]
+    list_etag = client.get("/api/v1/tea_profiles").headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The fast path shouldn't touch the cache or the database.")
+
+    monkeypatch.setattr(cache, "get", fail)
+    monkeypatch.setattr(cache, "get_async", fail)
+    monkeypatch.setattr(AsyncTeaProfilesRepository, "get_by_id", fail)
+    monkeypatch.setattr(AsyncTeaProfilesRepository, "list", fail)
+
+    for url, current_etag in [
+        ("/api/v1/tea_profiles/1", etag), ("/api/v1/tea_profiles", list_etag)
+    ]:
+        response = client.get(url, headers = {"If-None-Match": f'W/"{current_etag}"'})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == current_etag
+        assert "max-age" in response.headers["Cache-Control"]
+
+    head = client.head("/api/v1/tea_profiles/1", headers = {"If-None-Match": etag})
+    assert head.status_code == status.HTTP_304_NOT_MODIFIED
+
+def test_etag_from_an_old_generation_is_revalidated(client, seed_tea_profiles):
+    etag = client.get("/api/v1/tea_profiles/1").headers["ETag"]
+
+    dataset_generations.advance(TeaProfileModel.__tablename__, 1)
+
+    response = client.get("/api/v1/tea_profiles/1", headers = {"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"].startswith("1-")
+
+    # Unless the ETag it sent along with it is current.
+    response = client.get(
+        "/api/v1/tea_profiles/1",
+        headers = {"If-None-Match": f"{etag}, {response.headers['ETag']}"}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+def test_export_tea_profiles(client, seed_sample_tea_profile):
+    response = client.get("/api/v1/tea_profiles/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert response.headers["ETag"] == "0-ndjson"
+
+    # One tea profile per line, in id order, each exactly as the detail route has it.
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2]
+    assert json.loads(lines[0]) == client.get("/api/v1/tea_profiles/1").json()
+    assert response.text.endswith("\n")
+
+@pytest.mark.parametrize("accept_encoding, content_encoding", [
+    ("gzip", "gzip"), ("identity", None)
+])
+def test_export_tea_profiles_encodings(
+    client, seed_sample_tea_profile, accept_encoding, content_encoding
+):
+    response = client.get(
+        "/api/v1/tea_profiles/export", headers = {"Accept-Encoding": accept_encoding}
+    )
+
+    assert response.headers.get("Content-Encoding") == content_encoding
+    assert len(response.text.splitlines()) == 2
+
+def test_export_tea_profiles_not_modified(client, seed_tea_profiles):
+    etag = client.get("/api/v1/tea_profiles/export").headers["ETag"]
+
+    response = client.get("/api/v1/tea_profiles/export", headers = {"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+def test_export_tea_profiles_as_csv(client, seed_sample_tea_profile):
+    response = client.get(
+        "/api/v1/tea_profiles/export",
+        params = {"format": "csv"},
+        headers = {"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == "0-csv"
+    assert 'filename="tea_profiles.csv"' in response.headers["Content-Disposition"]
+
+    # A header, then one line per tea profile.
+    lines = response.text.splitlines()
+    assert lines[0].startswith("name,alternative_names,")
+    assert len(lines) == 3
+
+@pytest.mark.parametrize("export_format, media_type", [
+    ("parquet", "application/vnd.apache.parquet"),
+    ("arrow", "application/vnd.apache.arrow.stream"),
+])
+def test_export_tea_profiles_columnar(client, seed_sample_tea_profile, export_format, media_type):
+    pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    response = client.get(
+        "/api/v1/tea_profiles/export",
+        params = {"format": export_format},
+        headers = {"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == media_type
+
+    # Already compact, so it isn't gzipped on top.
+    assert response.headers["Content-Encoding"] == "identity"
+
+    if export_format == "parquet":
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.content))
+    else:
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+
+    assert table.column("id").to_pylist() == [1, 2]
+    assert table.column("alternative_names").to_pylist()[0] == ["Dragonwell", "Dragon Well"]
+
+def test_export_tea_profiles_skips_compression(client, seed_sample_tea_profile, monkeypatch):
+    # Like Parquet and Arrow, which are already compact.
+    monkeypatch.setattr(CsvExportWriter, "compressible", False)
+
+    response = client.get(
+        "/api/v1/tea_profiles/export",
+        params = {"format": "csv"},
+        headers = {"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["Content-Encoding"] == "identity"
+    assert len(response.text.splitlines()) == 3
+
+def test_export_tea_profiles_unsupported_format(client, seed_tea_profiles, monkeypatch):
+    response = client.get("/api/v1/tea_profiles/export", params = {"format": "xml"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Parquet isn't offered without pyarrow.
+    monkeypatch.setattr(arrow_export, "pyarrow", None)
+
+    response = client.get("/api/v1/tea_profiles/export", params = {"format": "parquet"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_repository_stream_batches(create_test_db, seed_sample_tea_profile):
+    batches = list(TeaProfilesRepository(create_test_db).stream(batch_size = 1))
+
+    assert [[row.id for row in batch] for batch in batches] == [[1], [2]]
+
+    # Only the columns clients can see.
+    assert "liquor_taste_normalized" not in batches[0][0]._fields
+    assert "content_hash" not in batches[0][0]._fields
@@ -0,0 +1,31 @@
+from src.cache.cache_keys import get_cache_key, KEY_DIGEST_BYTES
+
+def test_get_cache_key_shape():
+    key = get_cache_key("tea_profiles:list", {"limit": 100}, 3)
+    namespace, digest, generation = key.rsplit(":", 2)
+
+    assert namespace == "tea_profiles:list"
+    assert len(digest) == KEY_DIGEST_BYTES * 2
+    assert generation == "g3"
+
+def test_get_cache_key_ignores_parameter_order():
+    assert get_cache_key("ns", {"a": 1, "b": [1, 2]}, 0) == get_cache_key(
+        "ns", {"b": [1, 2], "a": 1}, 0
+    )
+
+def test_get_cache_key_is_fixed_size():
+    short = get_cache_key("ns", {"filters": {"tea_type": ["green"]}}, 0)
+    long = get_cache_key("ns", {"filters": {"tea_type": ["green" * 1000]}}, 0)
+
+    assert short != long
+    assert len(short) == len(long)
+
+def test_get_cache_key_differs_by_parameters_and_generation():
+    keys = {
+        get_cache_key("ns", {"limit": 100}, 0),
+        get_cache_key("ns", {"limit": 50}, 0),
+        get_cache_key("ns", {"limit": 100}, 1),
+        get_cache_key("other", {"limit": 100}, 0),
+    }
+
+    assert len(keys) == 4
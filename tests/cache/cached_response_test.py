@@ -0,0 +1,21 @@
+from src.cache.cached_response import build_cached_response
+from src.utils.etag import generate_etag_from_bytes
+
+def test_build_cached_response():
+    body = b'[{"id":1}]'
+    cached_response = build_cached_response(body, {"Cache-Control": "public, max-age=300"})
+
+    assert cached_response["body"] == body
+    assert cached_response["etag"] == generate_etag_from_bytes(body)
+
+    # Every header the route needs is precomputed.
+    headers = cached_response["headers"]
+    assert headers["ETag"] == cached_response["etag"]
+    assert headers["Last-Modified"].endswith("GMT")
+    assert headers["Cache-Control"] == "public, max-age=300"
+
+def test_build_cached_response_etag_tracks_body():
+    first = build_cached_response(b'{"id":1}')
+    second = build_cached_response(b'{"id":2}')
+
+    assert first["etag"] != second["etag"]
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from src.cache.cached_response import build_cached_response
+from src.cache.serialization import (
+    SerializationError, dumps, loads, dump_entry, load_entry, get_entry_expires_at,
+    FORMAT_VERSION
+)
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None, True, False, 0, -1, 2 ** 63 - 1, -(2 ** 63), 2 ** 80, 1.5, "", "烏龍茶",
+        b"", b"\x00\xff", [], [1, "two", [3]], {}, {"a": {"b": [None, b"c"]}},
+        datetime(2025, 1, 2, 3, 4, 5, tzinfo = timezone.utc),
+    ]
+)
+def test_round_trip(value):
+    assert loads(dumps(value)) == value
+
+def test_tuples_load_as_lists():
+    assert loads(dumps((1, 2))) == [1, 2]
+
+def test_unsupported_type():
+    with pytest.raises(SerializationError):
+        dumps(object())
+
+@pytest.mark.parametrize("data", [b"", b"x", b"s\x05\x00\x00\x00ab", b"NN", b"i\x00"])
+def test_malformed_data(data):
+    with pytest.raises(SerializationError):
+        loads(data)
+
+def test_bytes_are_not_inflated():
+    body = bytes(range(256)) * 40
+
+    # 1 byte tag + 4 byte length.
+    assert len(dumps(body)) == len(body) + 5
+
+def test_entry_round_trip():
+    cached_response = build_cached_response(b'{"name":"Long Jing"}' * 100, {"X-Test": "1"})
+    entry = {
+        "value": cached_response,
+        "stale_at": 1000.5,
+        "expires_at": 1060.5,
+        "timestamp": datetime(2025, 1, 2, tzinfo = timezone.utc),
+        "region": "detail",
+        "size": 1234,
+    }
+
+    loaded = load_entry(dump_entry(entry))
+
+    assert loaded["value"] == cached_response
+    assert loaded["stale_at"] == 1000.5
+    assert loaded["expires_at"] == 1060.5
+    assert loaded["timestamp"] == entry["timestamp"]
+    assert loaded["region"] == "detail"
+
+    # Left for the cache to compute.
+    assert loaded["size"] == 0
+
+    # Readable without loading the rest of the entry.
+    assert get_entry_expires_at(dump_entry(entry)) == 1060.5
+
+def test_entry_from_another_format_version():
+    entry = {
+        "value": 1, "stale_at": 0.0, "expires_at": 0.0,
+        "timestamp": datetime.now(timezone.utc), "region": "default", "size": 0,
+    }
+    data = bytearray(dump_entry(entry))
+    data[0] = FORMAT_VERSION + 1
+
+    with pytest.raises(SerializationError):
+        load_entry(bytes(data))
+
+    with pytest.raises(SerializationError):
+        get_entry_expires_at(bytes(data))
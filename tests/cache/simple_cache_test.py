@@ -1,4 +1,6 @@
 import logging
+
+import pytest
 from src.cache.simple_cache import SimpleCache
 
 # use __name__ to get a logger named after the module we're in.
@@ -36,3 +38,113 @@ def test_cache_clears():
     assert cache.store == {}
     assert cache.hits == 0
     assert cache.misses == 0
+
+def test_cache_serves_stale_entries_until_hard_ttl():
+    cache = SimpleCache(ttl_seconds = 0, stale_seconds = 300)
+    cache.set("a", 123)
+
+    # Past the soft TTL but within the hard TTL: still a hit, but stale.
+    entry = cache.get("a")
+
+    assert entry is not None
+    assert entry["value"] == 123
+    assert cache.is_stale(entry)
+    assert cache.hits == 1
+    assert cache.stale_hits == 1
+
+def test_cache_fresh_entries_are_not_stale():
+    cache = SimpleCache(ttl_seconds = 300, stale_seconds = 300)
+    cache.set("a", 123)
+
+    entry = cache.get("a")
+
+    assert entry is not None
+    assert not cache.is_stale(entry)
+    assert cache.stale_hits == 0
+
+def test_cache_expires_after_hard_ttl():
+    cache = SimpleCache(ttl_seconds = 0, stale_seconds = 0)
+    cache.set("a", 123)
+
+    # Pretend the stale window has passed.
+    cache.store["a"]["expires_at"] = 0
+
+    assert cache.get("a") is None
+    assert "a" not in cache.store
+
+def test_cache_tracks_entry_sizes():
+    cache = SimpleCache(ttl_seconds = 300)
+    cache.set("a", b"x" * 1000)
+
+    assert cache.store["a"]["size"] >= 1000
+    assert cache.stats()["default"]["bytes"] == cache.store["a"]["size"]
+
+    cache.set("a", b"x" * 10)
+    assert cache.stats()["default"]["bytes"] == cache.store["a"]["size"]
+    assert cache.stats()["default"]["entries"] == 1
+
+def test_cache_evicts_least_recently_used_over_budget():
+    cache = SimpleCache(ttl_seconds = 300, max_bytes = 3000)
+    cache.set("a", b"x" * 1000)
+    cache.set("b", b"x" * 1000)
+
+    # Using "a" makes "b" the least recently used.
+    cache.get("a")
+    cache.set("c", b"x" * 1000)
+
+    assert set(cache.store) == {"a", "c"}
+    assert cache.stats()["default"]["evictions"] == 1
+    assert cache.stats()["default"]["bytes"] <= 3000
+
+def test_cache_skips_entries_larger_than_budget():
+    cache = SimpleCache(ttl_seconds = 300, max_bytes = 1000)
+    cache.set("a", b"x" * 10)
+    cache.set("b", b"x" * 5000)
+
+    assert set(cache.store) == {"a"}
+
+def test_cache_regions_have_their_own_ttl_and_budget():
+    cache = SimpleCache(
+        ttl_seconds = 300, 
+        regions = {"small": {"ttl_seconds": 0, "stale_seconds": 0, "max_bytes": 1500}}
+    )
+    cache.set("default", b"x" * 1000)
+    cache.set("small_1", b"x" * 1000, "small")
+    cache.set("small_2", b"x" * 1000, "small")
+
+    # Only the small region was over budget.
+    assert set(cache.store) == {"default", "small_2"}
+    assert cache.stats()["small"]["evictions"] == 1
+    assert cache.stats()["default"]["evictions"] == 0
+
+    # And only the small region's entries expire right away.
+    assert cache.store["small_2"]["expires_at"] < cache.store["default"]["expires_at"]
+
+def test_cache_rejects_unknown_regions():
+    cache = SimpleCache(ttl_seconds = 300)
+
+    with pytest.raises(ValueError):
+        cache.set("a", 123, "missing")
+
+def test_cache_sweep_removes_expired_entries():
+    cache = SimpleCache(ttl_seconds = 300)
+    cache.set("a", 123)
+    cache.set("b", 456)
+
+    cache.store["a"]["expires_at"] = 0
+
+    assert cache.sweep() == 1
+    assert set(cache.store) == {"b"}
+    assert cache.stats()["default"]["expirations"] == 1
+    assert cache.stats()["default"]["bytes"] == cache.store["b"]["size"]
+
+def test_cache_delete_matching():
+    cache = SimpleCache(ttl_seconds = 300)
+
+    cache.set("tea_profile:1:g1", "old")
+    cache.set("tea_profile:1:g2", "new")
+    cache.set("other", "value")
+
+    assert cache.delete_matching(lambda key: key.endswith(":g1")) == 1
+    assert sorted(cache.store) == ["other", "tea_profile:1:g2"]
+    assert cache.stats()["default"]["entries"] == 2
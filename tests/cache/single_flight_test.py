@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.cache.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_fetch():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*[single_flight.do("key", fetch) for _ in range(5)])
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 1
+    assert single_flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+def test_different_keys_are_not_coalesced():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        await asyncio.gather(single_flight.do("a", fetch), single_flight.do("b", fetch))
+
+    asyncio.run(run())
+    assert single_flight.leaders == 2
+    assert single_flight.coalesced == 0
+
+def test_calls_after_completion_fetch_again():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        return [await single_flight.do("key", fetch), await single_flight.do("key", fetch)]
+
+    assert asyncio.run(run()) == [1, 2]
+
+def test_waiters_get_the_leaders_error():
+    single_flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *[single_flight.do("key", fetch) for _ in range(3)], return_exceptions = True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.leaders == 1
+    assert single_flight.stats()["in_flight"] == 0
+
+def test_waiters_retry_when_the_leader_is_cancelled():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        leader = asyncio.ensure_future(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        # The waiter became the new leader rather than being cancelled too.
+        return await waiter
+
+    assert asyncio.run(run()) == "value"
+    assert len(calls) == 2
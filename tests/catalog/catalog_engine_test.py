@@ -0,0 +1,152 @@
+import pytest
+
+from src.catalog import catalog_engine as catalog_engine_module
+from src.catalog.catalog_engine import (
+    CatalogEngine, CatalogSnapshot, _get_bitmap, _iter_positions
+)
+from src.constants.tea_profiles_constants import TeaProfileModelFields
+from src.db.dataset_generations import bump_dataset_generation
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.repositories.tea_profiles_repository import TeaProfilesRepository
+from src.utils.sample_data_utils import get_sample_tea_profiles_data
+
+@pytest.fixture
+def catalog_engine(create_test_db, seed_sample_tea_profile):
+    engine = CatalogEngine()
+    engine.load(create_test_db)
+    return engine
+
+def test_bitmap_round_trip():
+    positions = [0, 3, 8, 64, 130]
+    assert list(_iter_positions(_get_bitmap(positions, 131))) == positions
+    assert list(_iter_positions(0)) == []
+
+# Ids: 1 = Long Jing, 2 = Bi Luo Chun
+@pytest.mark.parametrize("filters", [
+    {},
+    {TeaProfileModelFields.TEA_TYPE: "GREEN"},
+    {TeaProfileModelFields.NAME: "luo"},
+    {TeaProfileModelFields.NAME: "lu"},                     # shorter than a trigram
+    {TeaProfileModelFields.NAME: "jing, long"},             # every value must match
+    {TeaProfileModelFields.NAME: "jing long"},              # trigrams match, substring doesn't
+    {TeaProfileModelFields.PROCESSING: "fired"},            # NULL for Bi Luo Chun
+    {TeaProfileModelFields.PROCESSING: ""},
+    {TeaProfileModelFields.LIQUOR_TASTE: ["Sweet"]},
+    {TeaProfileModelFields.LIQUOR_TASTE: ["sweet", "nutty"]},
+    {TeaProfileModelFields.LIQUOR_TASTE: ["bitter"]},
+    {TeaProfileModelFields.ALTERNATIVE_NAMES: ["Dragonwell", "Dragon Well"]},
+    {TeaProfileModelFields.ID: 2},
+    {
+        TeaProfileModelFields.COUNTRY_OF_ORIGIN: "china", 
+        TeaProfileModelFields.CULTIVARS: ["dong ting"]
+    },
+    {TeaProfileModelFields.COUNTRY_OF_ORIGIN: "japan"},
+])
+def test_catalog_matches_repository(create_test_db, catalog_engine, filters):
+    repo = TeaProfilesRepository(create_test_db)
+
+    expected = [tea_profile.id for tea_profile in repo.list(filters)]
+    actual = [tea_profile.id for tea_profile in catalog_engine.list(filters)]
+
+    assert actual == expected
+
+def test_catalog_pagination(create_test_db, catalog_engine):
+    assert [t.id for t in catalog_engine.list({}, limit = 1)] == [1]
+    assert [t.id for t in catalog_engine.list({}, limit = 1, offset = 1)] == [2]
+    assert [t.id for t in catalog_engine.list({}, after_id = 1)] == [2]
+    assert catalog_engine.list({}, after_id = 2) == []
+
+def test_catalog_not_loaded():
+    assert CatalogEngine().list({}) is None
+
+def _ingest_tea_profile(session) -> int:
+    '''Adds a tea profile the way an ingestion does, and returns its new generation.'''
+
+    session.add(TeaProfileModel(**get_sample_tea_profiles_data()))
+    generation = bump_dataset_generation(session, TeaProfileModel.__tablename__)
+    session.commit()
+
+    return generation
+
+def test_catalog_reloads_on_new_generation(create_test_db, seed_tea_profiles, monkeypatch):
+    # Run the rebuild when the test says so, rather than on the DB executor.
+    submitted = []
+    monkeypatch.setattr(catalog_engine_module.db_executor, "submit", submitted.append)
+
+    engine = CatalogEngine()
+    engine.configure(lambda: _NonClosingSession(create_test_db))
+    engine.reload()
+
+    old_snapshot = engine.snapshot
+    assert [t.id for t in engine.list({})] == [1]
+
+    # Another process ingests a tea profile, and this one hears about its generation.
+    generation = _ingest_tea_profile(create_test_db)
+    engine.on_dataset_generation(TeaProfileModel.__tablename__, generation)
+
+    # Unloaded until the rebuild finishes, so queries fall through to the database
+    # instead of answering from old data.
+    assert engine.list({}) is None
+    assert engine.facets({}) is None
+
+    assert len(submitted) == 1
+    submitted[0]()
+
+    # A brand new snapshot was swapped in. The old one is untouched, so requests that
+    # were already using it still get consistent results.
+    assert engine.snapshot is not old_snapshot
+    assert engine.snapshot.generation == generation # type: ignore
+    assert [t.id for t in engine.list({}, generation = generation)] == [1, 2]
+    assert [t.id for t in old_snapshot.list({})] == [1] # type: ignore
+
+    # Generations we've already seen (and other tables) don't rebuild it again.
+    engine.on_dataset_generation(TeaProfileModel.__tablename__, generation)
+    engine.on_dataset_generation("other_table", generation + 1)
+    assert len(submitted) == 1
+
+def test_catalog_only_answers_its_own_generation(create_test_db, seed_tea_profiles):
+    engine = CatalogEngine()
+    engine.configure(lambda: _NonClosingSession(create_test_db))
+    engine.reload()
+
+    generation = engine.snapshot.generation # type: ignore
+
+    assert engine.list({}, generation = generation) is not None
+    assert engine.facets({}, generation = generation) is not None
+
+    # A request that has already seen the next generation (before the listeners have
+    # run) goes to the database rather than caching this snapshot under it.
+    assert engine.list({}, generation = generation + 1) is None
+    assert engine.facets({}, generation = generation + 1) is None
+
+def test_catalog_discards_build_from_older_generation(
+    create_test_db, seed_tea_profiles, monkeypatch
+):
+    monkeypatch.setattr(catalog_engine_module.db_executor, "submit", lambda func: None)
+
+    engine = CatalogEngine()
+    engine.configure(lambda: _NonClosingSession(create_test_db))
+
+    # A newer generation arrives while the catalog is being built.
+    build = CatalogSnapshot.__init__
+
+    def build_during_new_generation(snapshot, tea_profiles, generation):
+        build(snapshot, tea_profiles, generation)
+        engine.on_dataset_generation(TeaProfileModel.__tablename__, 3)
+
+    monkeypatch.setattr(CatalogSnapshot, "__init__", build_during_new_generation)
+    engine.reload()
+
+    assert engine.snapshot is None
+
+class _NonClosingSession:
+    '''Hands out the test session as a context manager without closing it.'''
+
+    def __init__(self, session):
+        self._session = session
+
+    def __enter__(self):
+        return self._session
+
+    def __exit__(self, *exc_info):
+        return False
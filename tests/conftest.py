@@ -1,5 +1,7 @@
 import os 
-from sqlalchemy.pool import StaticPool
+import uuid
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from fastapi.testclient import TestClient
 import pytest
 import csv
@@ -11,9 +13,16 @@ from src.app.main import app
 from src.db.base import Base
 # SQLAlchemy only creates tables for models that have been imported into memory. 
 from src.db.models.tea_profiles_model import TeaProfileModel 
-from src.utils.session_utils import get_session 
+from src.db.models.dataset_generations_model import DatasetGenerationModel  # noqa: F401
+from src.utils.session_utils import get_session, get_async_session
 from src.utils.model_utils import get_model_column_names
 from src.constants.model_metadata_constants import DELIMITER_VALUE
+from src.cache.simple_cache import cache
+from src.cache.single_flight import single_flight
+from src.core.metrics import metrics_aggregator
+from src.cache.dataset_generation import dataset_generations
+from src.core.rate_limit.setup_rate_limit import rate_limiter
+from src.utils.sample_data_utils import get_sample_tea_profiles_data
 
 # Mark the process as a pytest run. The application checks this flag to skip 
 # production startup logicsuch as creating real database tables or connecting 
@@ -23,8 +32,29 @@ os.environ["PYTEST_RUNNING"] = "1"
 # Report leaks (slow)
 # tracemalloc.start()
 
+# The cache is a module-level singleton, so entries from one test would otherwise leak
+# into the next (each test gets a brand new database that may hold different rows).
+@pytest.fixture(autouse = True)
+def clear_cache():
+    cache.clear()
+    single_flight.clear()
+    metrics_aggregator.clear()
+    dataset_generations.clear()
+    yield
+    cache.clear()
+    single_flight.clear()
+    metrics_aggregator.clear()
+    dataset_generations.clear()
+
+# Every test client request comes from the same address, so the rate limits would 
+# otherwise start returning 429s once the suite makes enough requests to one route.
+@pytest.fixture(autouse = True)
+def reset_rate_limits():
+    rate_limiter.reset()
+    yield
+
 @pytest.fixture
-def client(create_test_db):
+def client(create_test_db, test_database_url):
     # Override FastAPI's DB dependency so routes use the test DB.
     def override_get_session():
         try:
@@ -32,7 +62,22 @@ def client(create_test_db):
         finally:
             pass
 
+    # The async routes get their own connections to the same in-memory database (see
+    # test_database_url). NullPool opens a fresh connection for every session, since
+    # the test client may run each request on a different event loop.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_database_url}", poolclass = NullPool
+    )
+    AsyncTestingSessionLocal = async_sessionmaker(
+        bind = async_engine, expire_on_commit = False
+    )
+
+    async def override_get_async_session():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_async_session] = override_get_async_session
 
     # FastAPI provides the TestClient helper for simulating HTTP requests without
     # running a server. It's like a mock browser. Define it here, since we'll be using it
@@ -42,6 +87,7 @@ def client(create_test_db):
 
     # Clean up after test
     app.dependency_overrides.clear()
+    async_engine.sync_engine.dispose()
 
 @pytest.fixture
 def long_jing_tea_profile_id(create_test_db, seed_tea_profiles):
@@ -58,12 +104,19 @@ def long_jing_tea_profile_id(create_test_db, seed_tea_profiles):
 # This fixture provides an isolated, in‑memory SQLite database for tests.
 # It ensures every test runs in a clean sandbox so no real database or files
 # are touched.
+# A uniquely named, shared-cache in-memory SQLite database for each test. Every
+# connection opened with this URI (sync or async) sees the same database, which lives
+# for as long as at least one connection to it is open.
 @pytest.fixture(scope = "function")
-def create_test_db():
+def test_database_url():
+    return f"file:tea_tapestry_{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true"
+
+@pytest.fixture(scope = "function")
+def create_test_db(test_database_url):
     # Create an in‑memory SQLite engine. Using StaticPool + check_same_thread=False
     # ensures all connections share the same in‑memory database.
     engine = create_engine(
-        "sqlite://",
+        f"sqlite:///{test_database_url}",
         connect_args = {"check_same_thread": False},
         poolclass = StaticPool
     )
@@ -74,6 +127,10 @@ def create_test_db():
     # Create all tables on this connection.
     Base.metadata.create_all(bind = connection)
 
+    # Commit the tables so that the session's commits are real commits, which the 
+    # async routes' own connections can see.
+    connection.commit()
+
     # Create a sessionmaker bound to this shared connection.
     TestingSessionLocal = sessionmaker(bind = connection)
 
@@ -109,7 +166,7 @@ def create_test_csv(tmp_path):
             return str(csv_file)
 
         # Build the data row from the model and sample_data (if any) that was passed in.
-        model_col_names = get_model_column_names(model, False)
+        model_col_names = get_model_column_names(model, False, False)
         # For each column name in the model, return the corresponding value 
         # from sample_data. If the key (the column name) is not present in
         # sample_data or sample_data wasn't specified, return "" for the value instead.
@@ -169,3 +226,10 @@ def seed_tea_profiles(create_test_db):
         wet_leaf_aroma=["fresh"]
     ))
     create_test_db.commit()
+
+@pytest.fixture
+def seed_sample_tea_profile(create_test_db, seed_tea_profiles):
+    # Adds Bi Luo Chun on top of Long Jing so that tests have more than one row to page
+    # through.
+    create_test_db.add(TeaProfileModel(**get_sample_tea_profiles_data()))
+    create_test_db.commit()
@@ -0,0 +1,63 @@
+import asyncio
+import gzip
+import zlib
+import pytest
+
+from src.core.compression import (
+    MINIMUM_COMPRESSION_SIZE, compress_variants, choose_encoding, get_supported_encodings,
+    gzip_stream, GZIP_WBITS
+)
+
+def test_compress_variants_skips_small_bodies():
+    assert compress_variants(b"x" * (MINIMUM_COMPRESSION_SIZE - 1)) == {}
+
+def test_compress_variants():
+    body = b'{"name":"Long Jing"}' * 100
+    variants = compress_variants(body)
+
+    assert list(variants) == get_supported_encodings()
+    assert gzip.decompress(variants["gzip"]) == body
+
+    for variant in variants.values():
+        assert len(variant) < len(body)
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip, br;q=0.8", "gzip"),
+        ("br;q=0, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "zstd"),
+        ("*;q=0.1, gzip", "gzip"),
+        ("gzip;q=abc", None),
+    ]
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ["zstd", "br", "gzip"]) == expected
+
+def test_choose_encoding_only_picks_available():
+    assert choose_encoding("br", ["gzip"]) is None
+    assert choose_encoding("gzip", []) is None
+
+def test_gzip_stream():
+    chunks = [b"first line\n", b"", b"second line\n" * 100]
+
+    async def produce():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [compressed async for compressed in gzip_stream(produce())]
+
+    compressed_chunks = asyncio.run(run())
+    assert gzip.decompress(b"".join(compressed_chunks)) == b"".join(chunks)
+
+    # Every chunk is flushed, so the first one decompresses on its own.
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    assert decompressor.decompress(compressed_chunks[0]) == chunks[0]
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.core.metrics import Histogram, MetricsAggregator
+
+def test_count_and_gauge():
+    aggregator = MetricsAggregator()
+
+    aggregator.count("cache.hit")
+    aggregator.count("cache.hit", 2)
+    aggregator.gauge("cache.size", 1)
+    aggregator.gauge("cache.size", 5)
+
+    summary = aggregator.flush()
+
+    assert summary["counters"] == {"cache.hit": 3}
+    assert summary["gauges"] == {"cache.size": 5}
+
+def test_flush_resets_the_window_but_not_the_totals():
+    aggregator = MetricsAggregator()
+
+    aggregator.count("cache.hit")
+    aggregator.flush()
+    aggregator.count("cache.hit")
+
+    assert aggregator.flush()["counters"] == {"cache.hit": 1}
+    assert aggregator.flush()["counters"] == {}
+    assert aggregator.snapshot()["totals"] == {"cache.hit": 2}
+
+def test_attributes_are_separate_metrics():
+    aggregator = MetricsAggregator()
+
+    aggregator.count("cache.evicted", attributes = {"region": "list"})
+    aggregator.count("cache.evicted", attributes = {"region": "detail"})
+    aggregator.count("cache.evicted", attributes = {"region": "list"})
+
+    assert aggregator.flush()["counters"] == {
+        "cache.evicted{region=list}": 2,
+        "cache.evicted{region=detail}": 1,
+    }
+
+def test_flush_merges_threads():
+    aggregator = MetricsAggregator()
+
+    def record():
+        for _ in range(1000):
+            aggregator.count("requests")
+            aggregator.observe("latency", 3)
+
+    threads = [threading.Thread(target = record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = aggregator.flush()
+
+    assert summary["counters"] == {"requests": 4000}
+    assert summary["histograms"]["latency"]["count"] == 4000
+
+def test_flush_while_threads_record_loses_nothing():
+    aggregator = MetricsAggregator()
+    total = 0
+
+    def record():
+        for _ in range(20000):
+            aggregator.count("requests")
+
+    threads = [threading.Thread(target = record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    while any(thread.is_alive() for thread in threads):
+        total += aggregator.flush()["counters"].get("requests", 0)
+
+    for thread in threads:
+        thread.join()
+
+    total += aggregator.flush()["counters"].get("requests", 0)
+
+    assert total == 80000
+
+def test_flush_periodically_survives_a_failed_flush(monkeypatch):
+    aggregator = MetricsAggregator()
+    flushes = []
+
+    def flush():
+        flushes.append(len(flushes))
+
+        if len(flushes) == 1:
+            raise RuntimeError("transport failed")
+
+        return {}
+
+    monkeypatch.setattr(aggregator, "flush", flush)
+
+    async def run():
+        task = asyncio.create_task(aggregator.flush_periodically(0))
+
+        while len(flushes) < 3:
+            await asyncio.sleep(0)
+
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert len(flushes) >= 3
+
+def test_histogram_summary():
+    histogram = Histogram()
+
+    for value in range(1, 101):
+        histogram.observe(value)
+
+    summary = histogram.summary()
+
+    assert summary["count"] == 100
+    assert summary["mean"] == pytest.approx(50.5)
+    assert summary["max"] == 100
+
+    # Percentiles are bucket upper bounds (see HISTOGRAM_BUCKETS).
+    assert summary["p50"] == 50
+    assert summary["p95"] == 100
+
+def test_histogram_percentile_of_last_bucket_is_the_max():
+    histogram = Histogram()
+    histogram.observe(50000)
+
+    assert histogram.percentile(0.5) == 50000
+
+def test_clear():
+    aggregator = MetricsAggregator()
+
+    aggregator.count("cache.hit")
+    aggregator.flush()
+    aggregator.count("cache.hit")
+    aggregator.clear()
+
+    assert aggregator.flush()["counters"] == {}
+    assert aggregator.snapshot()["totals"] == {}
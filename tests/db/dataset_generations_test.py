@@ -0,0 +1,29 @@
+import pytest
+
+from src.db.dataset_generations import (
+    bump_dataset_generation, get_dataset_generations, get_notify_payload, parse_notify_payload
+)
+
+def test_bump_dataset_generation(create_test_db):
+    assert get_dataset_generations(create_test_db) == {}
+
+    assert bump_dataset_generation(create_test_db, "tea_profiles") == 1
+    assert bump_dataset_generation(create_test_db, "tea_profiles") == 2
+    assert bump_dataset_generation(create_test_db, "other") == 1
+    create_test_db.commit()
+
+    assert get_dataset_generations(create_test_db) == {"tea_profiles": 2, "other": 1}
+
+def test_bump_dataset_generation_rolls_back_with_its_transaction(create_test_db):
+    bump_dataset_generation(create_test_db, "tea_profiles")
+    create_test_db.rollback()
+
+    assert get_dataset_generations(create_test_db) == {}
+
+def test_notify_payload_round_trip():
+    assert parse_notify_payload(get_notify_payload("tea_profiles", 3)) == ("tea_profiles", 3)
+
+@pytest.mark.parametrize("payload", ["", "not json", "{}", '{"table": "tea_profiles"}', "[]"])
+def test_parse_notify_payload_rejects_malformed_payloads(payload):
+    with pytest.raises(ValueError):
+        parse_notify_payload(payload)
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.db.db_executor import DBExecutor
+
+def test_run_returns_result_off_the_event_loop():
+    executor = DBExecutor(max_workers = 2)
+
+    async def run():
+        return await executor.run(lambda value: (value, threading.current_thread().name), 42)
+
+    value, thread_name = asyncio.run(run())
+
+    assert value == 42
+    assert thread_name.startswith("db-executor")
+    assert executor.stats()["completed"] == 1
+
+    executor.shutdown()
+
+def test_run_raises_errors_from_the_call():
+    executor = DBExecutor(max_workers = 1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(executor.run(fail))
+
+    # A failed call still counts as done.
+    assert executor.stats()["completed"] == 1
+    assert executor.stats()["running"] == 0
+
+    executor.shutdown()
+
+def test_stats_report_queue_depth_and_wait():
+    executor = DBExecutor(max_workers = 1)
+    release = threading.Event()
+    stats_while_blocked = {}
+
+    async def run():
+        # The first call holds the only thread, so the second has to queue behind it.
+        first = asyncio.ensure_future(executor.run(release.wait))
+        second = asyncio.ensure_future(executor.run(lambda: None))
+
+        while executor.stats()["running"] == 0:
+            await asyncio.sleep(0.001)
+
+        stats_while_blocked.update(executor.stats())
+
+        await asyncio.sleep(0.02)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(run())
+
+    assert stats_while_blocked["queue_depth"] == 1
+    assert stats_while_blocked["running"] == 1
+
+    stats = executor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["completed"] == 2
+    assert stats["max_wait_ms"] >= 20
+
+    executor.reset_stats()
+    assert executor.stats()["completed"] == 0
+
+    executor.shutdown()
+
+def test_run_after_shutdown_starts_a_new_pool():
+    executor = DBExecutor(max_workers = 1)
+
+    assert asyncio.run(executor.run(lambda: 1)) == 1
+    executor.shutdown()
+    assert asyncio.run(executor.run(lambda: 2)) == 2
+
+    executor.shutdown()
@@ -0,0 +1,64 @@
+from src.constants.tea_profiles_constants import (
+    REQUIRED_TEA_PROFILE_MODEL_FIELDS, TeaProfileModelFields
+)
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.row_versions import get_content_column_names, get_content_hash
+from src.utils.csv_utils import load_and_clean_csv
+from src.utils.sample_data_utils import get_sample_tea_profiles_data
+
+def test_get_content_hash_is_stable():
+    values = {"name": "Long Jing", "cultivars": ["Longjing #43"], "processing": None}
+
+    assert get_content_hash(values) == get_content_hash(dict(reversed(values.items())))
+    assert get_content_hash(values) != get_content_hash({**values, "processing": "pan-fired"})
+
+    # SQLite reads an empty array back as [""].
+    assert get_content_hash({"subregions": []}) == get_content_hash({"subregions": [""]})
+
+def test_insert_sets_row_version(create_test_db, seed_tea_profiles):
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+
+    assert tea_profile.updated_at is not None
+    assert tea_profile.content_hash == get_content_hash({
+        column_name: getattr(tea_profile, column_name)
+        for column_name in get_content_column_names(TeaProfileModel)
+    })
+
+def test_update_moves_row_version_only_when_content_changes(create_test_db, seed_tea_profiles):
+    tea_profile = create_test_db.get(TeaProfileModel, 1)
+    updated_at, content_hash = tea_profile.updated_at, tea_profile.content_hash
+
+    # Assigning the same value is a no-op.
+    tea_profile.name = "Long Jing"
+    create_test_db.commit()
+
+    assert (tea_profile.updated_at, tea_profile.content_hash) == (updated_at, content_hash)
+
+    tea_profile.name = "Xi Hu Long Jing"
+    create_test_db.commit()
+
+    assert tea_profile.content_hash != content_hash
+    assert tea_profile.updated_at > updated_at
+
+def test_load_and_clean_csv_hashes_like_the_orm(create_test_db, create_test_csv):
+    sample_data = get_sample_tea_profiles_data()
+    csv_path = create_test_csv(TeaProfileModel, sample_data)
+
+    df = load_and_clean_csv(
+        csv_path = csv_path,
+        model = TeaProfileModel,
+        required_fields = REQUIRED_TEA_PROFILE_MODEL_FIELDS[1:],
+        conflict_cols = [TeaProfileModelFields.NAME]
+    )
+
+    # The same values written through the ORM get the same hash.
+    create_test_db.add(TeaProfileModel(**{
+        column_name: df.loc[0, column_name]
+        for column_name in get_content_column_names(TeaProfileModel)
+    }))
+    create_test_db.commit()
+
+    tea_profile = create_test_db.query(TeaProfileModel).one()
+
+    assert df.loc[0, "content_hash"] == tea_profile.content_hash
+    assert df.loc[0, "updated_at"] is not None
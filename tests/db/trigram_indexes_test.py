@@ -0,0 +1,22 @@
+from src.constants.tea_profiles_constants import TeaProfileModelFields
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.db.trigram_indexes import get_trigram_index_ddl, get_trigram_indexed_columns
+
+def test_trigram_indexed_columns():
+    columns = get_trigram_indexed_columns(TeaProfileModel.__table__)
+
+    # The same columns migration 8d2f6b04a913 indexes.
+    assert columns == [
+        TeaProfileModelFields.NAME,
+        TeaProfileModelFields.TEA_TYPE,
+        TeaProfileModelFields.PROCESSING,
+        TeaProfileModelFields.OXIDATION_LEVEL,
+        TeaProfileModelFields.CULTURAL_SIGNIFICANCE,
+        TeaProfileModelFields.CULTURAL_SIGNIFICANCE_SOURCE,
+        TeaProfileModelFields.COUNTRY_OF_ORIGIN,
+    ]
+
+    # Row version columns aren't filtered on, so they don't get one.
+    assert "content_hash" not in columns
+    ddl = get_trigram_index_ddl(TeaProfileModel.__table__)
+    assert not any("content_hash" in statement for statement in ddl)
@@ -1,4 +1,4 @@
-from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import postgresql, sqlite
 from src.db.types.sqlite_compatible_array import SQLiteCompatibleArray
 
 def test_load_dialect_impl_postgres():
@@ -16,4 +16,13 @@ def test_process_bind_param_postgres():
     value = ["nutty", "sweet"]
     # For Postgres, the list should be returned unchanged
     result = type_.process_bind_param(value, dialect)
-    assert result == ["nutty", "sweet"]
\ No newline at end of file
+    assert result == ["nutty", "sweet"]
+
+def test_process_bind_param_normalize():
+    type_ = SQLiteCompatibleArray(normalize = True)
+    value = [" Malt", "honey", "MALT", "", "  "]
+
+    # Lowercased, trimmed, and de-duplicated in both dialects.
+    assert type_.process_bind_param(value, postgresql.dialect()) == ["malt", "honey"]
+    assert type_.process_bind_param(value, sqlite.dialect()) == "malt;honey"
+    assert type_.process_bind_param(None, sqlite.dialect()) is None
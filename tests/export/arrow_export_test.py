@@ -0,0 +1,47 @@
+import pytest
+
+from src.export import arrow_export
+from src.export.arrow_export import ArrowIpcExportWriter, ParquetExportWriter
+from src.export.export_formats import get_export_formats, get_export_writer
+from src.export.export_stream import iter_export
+from src.db.repositories.tea_profiles_statements import EXPORT_COLUMNS
+
+def test_arrow_formats_need_pyarrow(monkeypatch):
+    monkeypatch.setattr(arrow_export, "pyarrow", None)
+
+    assert get_export_formats() == ["ndjson", "csv"]
+
+    with pytest.raises(ValueError):
+        get_export_writer("parquet")
+
+    with pytest.raises(RuntimeError):
+        ArrowIpcExportWriter()
+
+def test_arrow_ipc_export(create_test_db, seed_sample_tea_profile):
+    pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    data = b"".join(iter_export(create_test_db, ArrowIpcExportWriter(), batch_size = 1))
+    table = pyarrow.ipc.open_stream(data).read_all()
+
+    assert table.column_names == EXPORT_COLUMNS
+    assert table.column("id").to_pylist() == [1, 2]
+
+    # Arrays stay arrays.
+    assert table.column("alternative_names").to_pylist()[0] == ["Dragonwell", "Dragon Well"]
+
+def test_parquet_export(create_test_db, seed_sample_tea_profile, tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    path = tmp_path / "tea_profiles.parquet"
+    path.write_bytes(b"".join(iter_export(create_test_db, ParquetExportWriter(), batch_size = 1)))
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+
+    # One row group per batch.
+    assert parquet_file.metadata.num_row_groups == 2
+
+    table = parquet_file.read()
+    assert table.column("id").to_pylist() == [1, 2]
+    assert table.column("alternative_names").to_pylist()[0] == ["Dragonwell", "Dragon Well"]
@@ -0,0 +1,55 @@
+import csv
+import io
+
+from src.constants.tea_profiles_constants import (
+    TeaProfileModelFields, REQUIRED_TEA_PROFILE_MODEL_FIELDS
+)
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.export.csv_export import CSV_COLUMNS, CsvExportWriter
+from src.export.export_stream import iter_export
+from src.utils.csv_utils import load_and_clean_csv
+
+def _export_csv(session, batch_size: int = 1) -> bytes:
+    return b"".join(iter_export(session, CsvExportWriter(), batch_size))
+
+def test_csv_export_layout(create_test_db, seed_sample_tea_profile):
+    rows = list(csv.reader(io.StringIO(_export_csv(create_test_db).decode("utf-8"))))
+
+    # One header, however many batches, and no id or bookkeeping columns.
+    assert rows[0] == CSV_COLUMNS
+    assert TeaProfileModelFields.ID not in rows[0]
+    assert "content_hash" not in rows[0]
+    assert len(rows) == 3
+
+    long_jing = dict(zip(rows[0], rows[1]))
+    assert long_jing[TeaProfileModelFields.NAME] == "Long Jing"
+    assert long_jing[TeaProfileModelFields.ALTERNATIVE_NAMES] == "Dragonwell; Dragon Well"
+
+def test_csv_export_round_trips_through_ingestion(
+    create_test_db, seed_sample_tea_profile, tmp_path
+):
+    path = tmp_path / "tea_profiles.csv"
+    path.write_bytes(_export_csv(create_test_db))
+
+    df = load_and_clean_csv(
+        str(path),
+        TeaProfileModel,
+        [field for field in REQUIRED_TEA_PROFILE_MODEL_FIELDS if field != TeaProfileModelFields.ID],
+        [TeaProfileModelFields.NAME]
+    )
+
+    tea_profiles = create_test_db.query(TeaProfileModel).order_by(TeaProfileModel.id).all()
+    assert len(df) == len(tea_profiles)
+
+    for (_, row), tea_profile in zip(df.iterrows(), tea_profiles):
+        for column_name in CSV_COLUMNS:
+            value = getattr(tea_profile, column_name)
+
+            # SQLite reads [] back as [""], and blank cells are ingested as None.
+            if isinstance(value, list):
+                value = [v for v in value if v != ""]
+
+            assert row[column_name] == (value or None)
+
+def test_csv_export_of_empty_table(create_test_db):
+    assert _export_csv(create_test_db).decode("utf-8") == ",".join(CSV_COLUMNS) + "\n"
@@ -11,6 +11,7 @@ from src.constants.tea_profiles_constants import (
     REQUIRED_TEA_PROFILE_MODEL_FIELDS, TeaProfileModelFields
 )
 from src.utils.sample_data_utils import get_sample_tea_profiles_data
+from src.db.dataset_generations import get_dataset_generations
 from tests.utils.test_utils import make_df_sqlite_compatible
 
 # use __name__ to get a logger named after the module we're in.
@@ -71,6 +72,23 @@ def test_ingest_data(monkeypatch, create_test_db, create_test_csv):
     assert result.liquor_taste == \
         sample_tea_profiles_data[TeaProfileModelFields.LIQUOR_TASTE]
 
+    # The new rows bumped the dataset generation.
+    assert get_dataset_generations(create_test_db) == {"tea_profiles": 1}
+
+    # Ingesting the same rows again adds nothing, so the generation stays put.
+    ingest_data(
+        create_test_db,
+        csv_file, 
+        TeaProfileModel, 
+        [
+            field for field in REQUIRED_TEA_PROFILE_MODEL_FIELDS 
+            if field != TeaProfileModelFields.ID
+        ], 
+        [TeaProfileModelFields.NAME]
+    )
+
+    assert get_dataset_generations(create_test_db) == {"tea_profiles": 1}
+
 def test_ingest_data_failure(monkeypatch, create_test_db, create_test_csv):
     sample_tea_profiles_data = get_sample_tea_profiles_data()
     csv_file = create_test_csv(TeaProfileModel, sample_tea_profiles_data)
@@ -95,4 +113,5 @@ def test_ingest_data_failure(monkeypatch, create_test_db, create_test_csv):
 
     # After rollback, the table should be empty.
     num_rows = create_test_db.execute(text("SELECT COUNT(*) FROM tea_profiles")).scalar()
-    assert num_rows == 0
\ No newline at end of file
+    assert num_rows == 0
+    assert get_dataset_generations(create_test_db) == {}
\ No newline at end of file
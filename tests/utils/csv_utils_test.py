@@ -5,6 +5,11 @@ from src.utils.csv_utils import (
 )
 from src.constants.model_metadata_constants import DELIMITER_VALUE
 from tests.types.test_types import FakeModel
+from src.db.models.tea_profiles_model import TeaProfileModel
+from src.constants.tea_profiles_constants import (
+    TeaProfileModelFields, REQUIRED_TEA_PROFILE_MODEL_FIELDS
+)
+from src.utils.sample_data_utils import get_sample_tea_profiles_data
 
 
 @pytest.mark.parametrize(
@@ -75,4 +80,24 @@ def test_load_and_clean_csv_arrays_booleans(tmp_path, csv_data, expected_active)
     # starts at row 0.
     assert isinstance(df.loc[0, "tags"], list)
     assert df.loc[0, "tags"] == ["a", "b", "c"]
-    assert list(df["active"]) == expected_active
\ No newline at end of file
+    assert list(df["active"]) == expected_active
+
+
+def test_load_and_clean_csv_fills_normalized_columns(create_test_csv):
+    csv_path = create_test_csv(TeaProfileModel, {
+        **get_sample_tea_profiles_data(),
+        TeaProfileModelFields.LIQUOR_TASTE: ["Malt", "honey ", "malt"],
+    })
+
+    df = load_and_clean_csv(
+        csv_path = csv_path,
+        model = TeaProfileModel,
+        required_fields = REQUIRED_TEA_PROFILE_MODEL_FIELDS[1:],
+        conflict_cols = [TeaProfileModelFields.NAME]
+    )
+
+    # The source column is cleaned but keeps its case. Its normalized twin is filled
+    # in even though the CSV doesn't have it, and empty arrays stay empty.
+    assert df.loc[0, "liquor_taste"] == ["Malt", "honey", "malt"]
+    assert df.loc[0, "liquor_taste_normalized"] == ["malt", "honey"]
+    assert df.loc[0, "subregions_normalized"] is None
@@ -0,0 +1,28 @@
+import pytest
+
+from src.utils.cursor_utils import encode_cursor, decode_cursor
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(42)
+
+    # Cursors should be URL safe and opaque.
+    assert "=" not in cursor
+    assert "42" not in cursor
+    assert decode_cursor(cursor) == 42
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        "bm90IGpzb24",              # base64 for "not json"
+        "WzQyXQ",                   # base64 for [42]
+        "eyJpZCI6ICI0MiJ9",         # base64 for {"id": "42"}
+        "eyJpZCI6IHRydWV9",         # base64 for {"id": true}
+        "eyJpZCI6IDFlMzB9",         # base64 for {"id": 1e30}
+        "eyJpZCI6IC0xfQ",           # base64 for {"id": -1}
+        "eyJpZCI6IDkyMjMzNzIwMzY4NTQ3NzU4MDh9",     # base64 for {"id": 2**63}
+    ]
+)
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
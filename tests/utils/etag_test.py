@@ -0,0 +1,24 @@
+import pytest
+
+from src.utils.etag import get_etag_generation, parse_if_none_match
+
+@pytest.mark.parametrize("header, expected", [
+    (None, []),
+    ("", []),
+    ("1-abc", ["1-abc"]),
+    ('"1-abc"', ["1-abc"]),
+    ('W/"1-abc", 2-def', ["1-abc", "2-def"]),
+    ("*", ["*"]),
+])
+def test_parse_if_none_match(header, expected):
+    assert parse_if_none_match(header) == expected
+
+@pytest.mark.parametrize("etag, expected", [
+    ("5-5d41402abc4b2a76", 5),
+    ("0-abc", 0),
+    ("5d41402abc4b2a76", None),
+    ("x-abc", None),
+    ("*", None),
+])
+def test_get_etag_generation(etag, expected):
+    assert get_etag_generation(etag) == expected
@@ -0,0 +1,21 @@
+from src.utils.filter_utils import canonicalize_filters, split_filter_values
+
+def test_split_filter_values():
+    assert split_filter_values(" Green , OOLONG") == ["green", "oolong"]
+    assert split_filter_values(["Green", "Oolong"]) == ["green", "oolong"]
+
+def test_canonicalize_filters():
+    filters = {"tea_type": "Green", "country_of_origin": "Japan,china, CHINA"}
+
+    assert canonicalize_filters(filters) == {
+        "country_of_origin": ["china", "japan"],
+        "tea_type": ["green"],
+    }
+
+    # Field order doesn't matter either.
+    assert list(canonicalize_filters(filters)) == ["country_of_origin", "tea_type"]
+
+def test_canonicalize_filters_same_selection_same_form():
+    assert canonicalize_filters({"liquor_taste": "sweet,Floral"}) == canonicalize_filters(
+        {"liquor_taste": "floral, SWEET, sweet"}
+    )
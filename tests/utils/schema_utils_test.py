@@ -1,5 +1,6 @@
 from tests.types.test_types import UnsupportedTypeModel
 from src.utils.schema_utils import get_schema_from_model
+from src.db.models.tea_profiles_model import TeaProfileModel
 
 
 def test_get_schema_from_model_handles_not_implemented_error():
@@ -9,4 +10,11 @@ def test_get_schema_from_model_handles_not_implemented_error():
 
     # If get_schema_from_model hits the exception as expected, the unsupported 
     # column should be of type str. 
-    assert schema.model_fields["unsupported"].annotation is str
\ No newline at end of file
+    assert schema.model_fields["unsupported"].annotation is str
+
+def test_get_schema_from_model_include():
+    schema = get_schema_from_model(
+        model = TeaProfileModel, name = "ProjectedSchema", include = ["id", "name"]
+    )
+
+    assert list(schema.model_fields) == ["id", "name"]
@@ -1,6 +1,8 @@
+import asyncio
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.utils.session_utils import get_session_cm, get_session
+from src.utils.session_utils import get_session_cm, get_session, get_async_session
 
 def test_get_session_cm():
     with get_session_cm() as session:
@@ -17,4 +19,17 @@ def test_get_session():
     assert isinstance(session, Session)
 
     # Close the session (advances to the finally of the generator).
-    generator.close()
\ No newline at end of file
+    generator.close()
+
+def test_get_async_session():
+    async def get_and_close_session():
+        generator = get_async_session()
+
+        # Advance to when the session is yielded.
+        session = await generator.__anext__()
+        assert isinstance(session, AsyncSession)
+
+        # Close the session (advances to the end of the async with).
+        await generator.aclose()
+
+    asyncio.run(get_and_close_session())